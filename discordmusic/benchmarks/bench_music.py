@@ -0,0 +1,284 @@
+"""
+Offline benchmarks for the Music cog hot paths.
+
+Run from the discordmusic directory:
+
+    python -m benchmarks.bench_music --output results.json
+
+Everything runs against the fakes in benchmarks.fakes: no Discord connection, no
+network and no YouTube. The track transition benchmark needs FFmpeg on PATH and
+is skipped otherwise.
+"""
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("BOT_OWNER_ID", "0")
+os.environ.setdefault("LOG_CHANNEL_ID", "0")
+# The fakes are never throttled, so extraction pacing is lifted unless set explicitly
+os.environ.setdefault("EXTRACT_RATE", "10000")
+os.environ.setdefault("EXTRACT_BURST", "10000")
+
+BOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from aiohttp import web  # noqa: E402
+
+from benchmarks.common import run_metadata, summarize  # noqa: E402
+from benchmarks.fakes import FakeAudioSource, FakeBot, FakeContext, FakeExtractor, make_test_tone  # noqa: E402
+from cogs.music import Music  # noqa: E402
+from cogs.youtube import YTDLSource  # noqa: E402
+from utils import metrics  # noqa: E402
+from utils.playback import TrackedAudio  # noqa: E402
+
+QUEUE_SIZES = (10, 1000, 10000)
+
+
+async def timed(factory, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            await setup()
+        start = time.perf_counter()
+        await factory()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def histogram_mean(histogram):
+    child = histogram.labels()
+    count = sum(child.counts)
+    return {'count': count, 'mean_ms': child.sum / count * 1000 if count else None}
+
+
+class Harness:
+    def __init__(self, loop, extractor):
+        self.loop = loop
+        self.extractor = extractor
+        self.bot = FakeBot(loop)
+        self.music = self.bot.add_cog(Music(self.bot))
+
+    def new_context(self, **guild_kwargs):
+        return FakeContext(self.bot, self.bot.add_guild(**guild_kwargs))
+
+    async def fill_queue(self, ctx, size):
+        """
+        Fills a guild's queue directly with song entries shaped like the ones _fetch_and_queue produces.
+        """
+        queue = await self.music.get_queue(ctx.guild.id)
+        while not queue.empty():
+            queue.get_nowait()
+        for i in range(size):
+            data = self.extractor.extract(f"ytsearch:benchmark track {i}", {})['entries'][0]
+            queue.put_nowait({'data': data, 'stream': True})
+        return queue
+
+    async def close(self):
+        for handle in self.music.inactivity_timers.values():
+            handle.cancel()
+        for task in self.music.nowplaying_tasks.values():
+            task.cancel()
+        for guild in self.bot.guilds.values():
+            if guild.voice_client:
+                await guild.voice_client.disconnect()
+
+
+async def bench_fetch_and_queue(harness, tracks, concurrency):
+    """
+    Queues single tracks through _fetch_and_queue with no voice client, so only
+    extraction, queueing and the reply embed are measured.
+    """
+    ctx = harness.new_context()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await harness.music._fetch_and_queue(ctx, f"benchmark query {i}", process_playlist=False)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(tracks)))
+    elapsed = time.perf_counter() - start
+    queued = (await harness.music.get_queue(ctx.guild.id)).qsize()
+    return {
+        'tracks': tracks,
+        'queued': queued,
+        'concurrency': concurrency,
+        'extract_latency_ms': harness.extractor.latency * 1000,
+        'elapsed_s': elapsed,
+        'tracks_per_s': queued / elapsed if elapsed else None,
+        'per_call': summarize(latencies),
+    }
+
+
+async def bench_queue_ops(harness, sizes, repeat):
+    results = {}
+    for size in sizes:
+        ctx = harness.new_context()
+        await harness.fill_queue(ctx, size)
+        runs = max(1, repeat if size < 10000 else repeat // 5)
+
+        async def refill():
+            # remove() shrinks the queue; keep it at the target size
+            queue = await harness.music.get_queue(ctx.guild.id)
+            if queue.qsize() < size:
+                await harness.fill_queue(ctx, size)
+
+        results[str(size)] = {
+            'remove_middle': await timed(lambda: harness.music.remove(ctx, size // 2 or 1), runs, setup=refill),
+            'remove_last': await timed(lambda: harness.music.remove(ctx, size), runs, setup=refill),
+            'shuffle': await timed(lambda: harness.music.shuffle(ctx), runs),
+            'queue_info': await timed(lambda: harness.music.queue_info(ctx), runs),
+        }
+        ctx.channel.messages.clear()
+    return results
+
+
+async def bench_nowplaying_render(harness, sizes, repeat):
+    """
+    Measures one _update_nowplaying_display refresh (embed and view build plus the
+    fetch/edit round trip against a zero-latency fake channel).
+    """
+    results = {}
+    for size in sizes:
+        ctx = harness.new_context()
+        queue = await harness.fill_queue(ctx, size)
+        harness.music.current_song[ctx.guild.id] = queue._queue[0]['data']
+        harness.music.tracked_sources[ctx.guild.id] = TrackedAudio(FakeAudioSource(), start=42)
+        await harness.music._update_nowplaying_display(ctx.guild.id, ctx.channel.id)  # Initial send
+        results[str(size)] = await timed(lambda: harness.music._update_nowplaying_display(ctx.guild.id, ctx.channel.id, silent_update=True), repeat)
+    return results
+
+
+async def bench_memory_per_track(harness, tracks):
+    """
+    Traces allocations retained by the queue after queueing tracks through _fetch_and_queue.
+    """
+    ctx = harness.new_context()
+    await harness.music._fetch_and_queue(ctx, "warm up", process_playlist=False)
+    queue = await harness.music.get_queue(ctx.guild.id)
+    queue.get_nowait()
+    ctx.channel.messages.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(tracks):
+        await harness.music._fetch_and_queue(ctx, f"memory query {i}", process_playlist=False)
+    ctx.channel.messages.clear()  # Reply embeds are not part of the queue's footprint
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return {'tracks': queue.qsize(), 'retained_bytes': retained, 'bytes_per_track': retained / max(1, queue.qsize())}
+
+
+async def serve_file(path):
+    """
+    Serves a file over local HTTP so FFmpeg gets the same kind of input (and the
+    same reconnect options) it gets from YouTube.
+    """
+    app = web.Application()
+    app.router.add_get('/tone', lambda request: web.FileResponse(path))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/tone"
+
+
+async def bench_track_transitions(loop, tracks, tone_seconds):
+    """
+    Plays a queue of short FFmpeg-fed test tones back to back and measures the
+    silence between one track's last frame and the next track's first frame.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        tone = make_test_tone(tmp, tone_seconds)
+        if tone is None:
+            return {'skipped': "ffmpeg not found on PATH"}
+        runner, url = await serve_file(tone)
+        extractor = FakeExtractor(stream_url=url, duration=tone_seconds).install()
+        harness = Harness(loop, extractor)
+        try:
+            metrics.TRACK_TRANSITION_SECONDS.clear()
+            ctx = harness.new_context()
+            ctx.guild.voice_client = await ctx.guild.voice_channel.connect()
+            voice_client = ctx.guild.voice_client
+            for i in range(tracks):
+                result = await YTDLSource.from_url(f"tone {i}", loop=loop, stream=True)
+                await (await harness.music.get_queue(ctx.guild.id)).put(result)  # A search resolves to its top result
+            await harness.music.play_next(ctx)
+            deadline = time.perf_counter() + tracks * (tone_seconds + 10)
+            while len(voice_client.finished_at) < tracks and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            gaps = [start - end for end, start in zip(voice_client.finished_at, voice_client.first_frame_at[1:])]
+            return {
+                'tracks': tracks,
+                'tone_seconds': tone_seconds,
+                'completed': len(voice_client.finished_at),
+                'gap': summarize(gaps) if gaps else None,
+                'after_playback_to_play': histogram_mean(metrics.TRACK_TRANSITION_SECONDS),
+            }
+        finally:
+            await harness.close()
+            extractor.uninstall()
+            await runner.cleanup()
+
+
+async def run(args):
+    loop = asyncio.get_running_loop()
+    extractor = FakeExtractor(latency=args.extract_latency).install()
+    harness = Harness(loop, extractor)
+    sizes = tuple(size for size in QUEUE_SIZES if size <= args.max_queue)
+    results = {}
+    try:
+        results['fetch_and_queue'] = await bench_fetch_and_queue(harness, args.tracks, args.concurrency)
+        results['queue_ops'] = await bench_queue_ops(harness, sizes, args.repeat)
+        results['nowplaying_render'] = await bench_nowplaying_render(harness, sizes, args.repeat)
+        results['memory_per_track'] = await bench_memory_per_track(harness, args.memory_tracks)
+    finally:
+        await harness.close()
+        extractor.uninstall()
+    results['track_transition'] = await bench_track_transitions(loop, args.transition_tracks, args.tone_seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Music cog hot paths.")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout.")
+    parser.add_argument("--tracks", type=int, default=500, help="Tracks queued by the _fetch_and_queue benchmark.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent _fetch_and_queue calls.")
+    parser.add_argument("--extract-latency", type=float, default=0.0, help="Simulated yt-dlp extraction latency in seconds.")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetitions per queue operation and render.")
+    parser.add_argument("--max-queue", type=int, default=max(QUEUE_SIZES), help="Largest queue size to benchmark.")
+    parser.add_argument("--memory-tracks", type=int, default=1000, help="Tracks queued for the memory benchmark.")
+    parser.add_argument("--transition-tracks", type=int, default=5, help="Test tones played back to back.")
+    parser.add_argument("--tone-seconds", type=float, default=1.0, help="Length of each test tone.")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)  # The cog logs every command at INFO
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = asyncio.run(run(args))
+    report = {'meta': run_metadata(args, started), 'results': results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures cold start up to the point where the bot would connect to the gateway.
+
+Run from the discordmusic directory:
+
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+
+Each run is a fresh interpreter that imports bot.py and loads every extension, in
+a scratch directory so no logs, caches or indexes are shared. Both FAST_START
+modes are measured; the gateway connection itself is not part of the number.
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import BOT_DIR, run_metadata, summarize
+
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {bot_dir!r})
+import bot
+imported = time.perf_counter()
+if not bot.config.FAST_START:
+    bot.preload_dependencies()
+preloaded = time.perf_counter()
+
+async def load():
+    async with bot.bot:
+        await bot.load_extensions()
+
+asyncio.run(load())
+done = time.perf_counter()
+print(json.dumps({{'imports': imported - start, 'preload': preloaded - imported, 'extensions': done - preloaded, 'total': done - start}}))
+"""
+
+
+def measure(fast_start, runs):
+    env = dict(os.environ, FAST_START="true" if fast_start else "false", METRICS_PORT="0")
+    env.setdefault("BOT_OWNER_ID", "0")
+    env.setdefault("LOG_CHANNEL_ID", "0")
+    phases = {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as scratch:
+            result = subprocess.run([sys.executable, "-c", PROBE.format(bot_dir=BOT_DIR)], cwd=scratch, env=env, capture_output=True, text=True, check=True)
+        for phase, seconds in json.loads(result.stdout.strip().splitlines()[-1]).items():
+            phases.setdefault(phase, []).append(seconds)
+    return {phase: summarize(samples) for phase, samples in phases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bot cold start up to the gateway connection.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode.")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = {'fast_start': measure(True, args.runs), 'preload_first': measure(False, args.runs)}
+    output = json.dumps({'meta': run_metadata(args, started), 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
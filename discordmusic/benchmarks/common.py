@@ -0,0 +1,63 @@
+"""
+Helpers shared by the benchmark scripts: timing statistics and run metadata.
+"""
+import datetime
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+BOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def summarize(samples):
+    """
+    Reduces a list of durations in seconds to millisecond statistics.
+    """
+    if not samples:
+        return {'n': 0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+    return {
+        'n': len(ordered),
+        'min_ms': ordered[0] * 1000,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def rss_bytes():
+    """
+    Returns the current resident set size of this process, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_metadata(args, started):
+    return {
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'started_at': started.isoformat(),
+        'duration_s': (datetime.datetime.now(datetime.timezone.utc) - started).total_seconds(),
+        'args': vars(args),
+    }
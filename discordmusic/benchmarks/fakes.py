@@ -0,0 +1,425 @@
+"""
+Offline stand-ins for the Discord objects and yt-dlp extraction the Music cog uses.
+
+Nothing here talks to the network: Discord contexts, channels and voice clients
+are plain Python objects with optional injected latency, and yt-dlp's
+extract_info is replaced with a fixture-backed fake.
+"""
+import asyncio
+import copy
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import yt_dlp
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FRAME_LENGTH = 0.02  # Discord sends one 20 ms Opus frame per packet
+
+_ids = itertools.count(1)
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_test_tone(directory, seconds=2.0):
+    """
+    Renders a local sine test tone with FFmpeg and returns its path, or None if FFmpeg is missing.
+    """
+    if not shutil.which("ffmpeg"):
+        return None
+    path = os.path.join(directory, f"tone-{seconds:g}s.webm")
+    if not os.path.exists(path):
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+             "-ac", "2", "-ar", "48000", "-c:a", "libopus", path],
+            check=True,
+        )
+    return path
+
+
+class FakeExtractor:
+    """
+    Replaces yt_dlp.YoutubeDL.extract_info with canned info dicts from the fixtures.
+
+    Every video gets a distinct ID derived from the query, so caches and dedupe
+    logic see realistic key spreads. latency (seconds) is slept inside the call,
+    which runs in an executor thread just like the real extraction. duration should
+    match the fake audio's length, or the Music cog treats every track as a stream
+    that died early and fails it over. It is rounded to whole seconds, as YouTube
+    reports it and as the queue and now-playing embeds format it.
+    """
+
+    def __init__(self, latency=0.0, stream_url=None, playlist_size=None, duration=None):
+        self.latency = latency
+        self.stream_url = stream_url
+        self.video = load_fixture("video.json")
+        if duration is not None:
+            self.video['duration'] = int(round(duration))
+        self.playlist = load_fixture("playlist.json")
+        if playlist_size is not None:
+            entries = self.playlist['entries']
+            self.playlist['entries'] = [dict(entries[i % len(entries)], id=f"pl{i:08d}") for i in range(playlist_size)]
+        self.calls = 0
+        self._original = None
+        self._lock = threading.Lock()
+
+    def install(self):
+        self._original = yt_dlp.YoutubeDL.extract_info
+        extractor = self
+
+        def extract_info(ydl, url, download=True, ie_key=None, extra_info=None, process=True, force_generic_extractor=False):
+            return extractor.extract(url, ydl.params)
+
+        yt_dlp.YoutubeDL.extract_info = extract_info
+        return self
+
+    def uninstall(self):
+        if self._original is not None:
+            yt_dlp.YoutubeDL.extract_info = self._original
+            self._original = None
+
+    def _video(self, video_id, title=None, flat=False):
+        if flat:
+            return {'_type': 'url', 'ie_key': 'Youtube', 'id': video_id, 'url': f"https://www.youtube.com/watch?v={video_id}",
+                    'title': title or self.video['title'], 'duration': self.video['duration']}
+        info = copy.deepcopy(self.video)
+        info['id'] = video_id
+        info['webpage_url'] = f"https://www.youtube.com/watch?v={video_id}"
+        if title:
+            info['title'] = title
+        if self.stream_url:
+            info['url'] = self.stream_url
+            for fmt in info.get('formats', []):
+                fmt['url'] = self.stream_url
+        return info
+
+    def extract(self, url, params):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        flat = bool(params.get('extract_flat'))
+        # Like yt-dlp, noplaylist only matters for watch URLs that also carry a list
+        if 'list=' in url and not ('v=' in url and params.get('noplaylist')):
+            entries = self.playlist['entries']
+            items = params.get('playlist_items')
+            if items:
+                start, _, end = str(items).partition('-')
+                entries = entries[int(start) - 1:int(end or start)]
+            return {**{k: v for k, v in self.playlist.items() if k != 'entries'},
+                    'entries': [self._video(entry['id'], entry.get('title'), flat) for entry in entries]}
+        if '?v=' in url or '&v=' in url:
+            video_id = url.split('v=', 1)[1].split('&', 1)[0]
+        elif 'youtu.be/' in url:
+            video_id = url.split('youtu.be/', 1)[1].split('?', 1)[0]
+        else:
+            query = url.split(':', 1)[1] if url.startswith('ytsearch') else url
+            video_id = hashlib.sha1(query.encode()).hexdigest()[:11]
+            return {'_type': 'playlist', 'id': query, 'title': query, 'entries': [self._video(video_id, query, flat)]}
+        return self._video(video_id, flat=flat)
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None, view=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embeds = [embed] if embed else []
+        self.view = view
+
+    async def edit(self, *, content=None, embed=None, view=None):
+        await self.channel._rest()
+        if embed is not None:
+            self.embeds = [embed]
+        if view is not None:
+            self.view = view
+        return self
+
+    async def delete(self):
+        await self.channel._rest()
+        self.channel.messages.pop(self.id, None)
+
+
+class FakeTextChannel:
+    def __init__(self, guild, latency=0.0):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = f"text-{self.id}"
+        self.latency = latency
+        self.messages = {}
+        self.sent = 0
+
+    async def _rest(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        await self._rest()
+        message = FakeMessage(self, content, embed, view)
+        self.messages[message.id] = message
+        self.sent += 1
+        return message
+
+    async def fetch_message(self, message_id):
+        import discord
+        await self._rest()
+        message = self.messages.get(message_id)
+        if message is None:
+            raise discord.NotFound(type('Response', (), {'status': 404, 'reason': 'Not Found'})(), 'Unknown Message')
+        return message
+
+
+class FakeAudioSource:
+    """
+    An Opus source that yields a fixed number of silent frames, standing in for
+    FFmpegOpusAudio where no FFmpeg process should be spawned.
+    """
+
+    def __init__(self, url=None, *, seconds=5.0, **kwargs):
+        self.url = url
+        self.options = kwargs
+        self.frames = int(seconds / FRAME_LENGTH)
+        self.volume = 1.0
+
+    def read(self):
+        if self.frames <= 0:
+            return b''
+        self.frames -= 1
+        return b'\xf8\xff\xfe'  # An Opus silence frame
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.frames = 0
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild, bitrate=64000):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = f"voice-{self.id}"
+        self.bitrate = bitrate
+        self.members = []
+
+    async def connect(self, **kwargs):
+        voice_client = FakeVoiceClient(self, realtime=self.guild.realtime_voice)
+        self.guild.voice_client = voice_client
+        return voice_client
+
+    def __str__(self):
+        return self.name
+
+
+class _FakePlayer:
+    def __init__(self, source):
+        self.source = source
+        self.stopped = threading.Event()
+        self.paused = threading.Event()
+
+
+class FakeVoiceClient:
+    """
+    Mimics discord.VoiceClient's player: a thread pulls 20 ms frames from the source
+    and calls after() when it runs dry or is stopped. With realtime=False frames are
+    read as fast as the source produces them.
+    """
+
+    def __init__(self, channel, realtime=False):
+        self.channel = channel
+        self.guild = channel.guild
+        self.realtime = realtime
+        self._connected = True
+        self._player = None
+        self.frames_sent = 0
+        self.first_frame_at = []  # perf_counter timestamps of each source's first frame
+        self.finished_at = []  # perf_counter timestamps of each source running dry
+
+    def is_connected(self):
+        return self._connected
+
+    @property
+    def source(self):
+        return self._player.source if self._player else None
+
+    @source.setter
+    def source(self, value):
+        # Like discord.py: swap what the running player reads, without calling after()
+        if self._player is None:
+            raise ValueError("Not playing anything.")
+        self._player.source = value
+
+    def is_playing(self):
+        return self._player is not None and not self._player.paused.is_set()
+
+    def is_paused(self):
+        return self._player is not None and self._player.paused.is_set()
+
+    def play(self, source, *, after=None):
+        if self._player is not None:
+            raise RuntimeError("Already playing audio.")
+        self._player = player = _FakePlayer(source)
+        threading.Thread(target=self._run, args=(player, after), daemon=True).start()
+
+    def _run(self, player, after):
+        error = None
+        first = True
+        next_frame = time.perf_counter()
+        try:
+            while not player.stopped.is_set():
+                if player.paused.is_set():
+                    time.sleep(FRAME_LENGTH)
+                    next_frame = time.perf_counter()
+                    continue
+                data = player.source.read()
+                if not data:
+                    self.finished_at.append(time.perf_counter())
+                    break
+                if first:
+                    self.first_frame_at.append(time.perf_counter())
+                    first = False
+                self.frames_sent += 1
+                if self.realtime:
+                    next_frame += FRAME_LENGTH
+                    time.sleep(max(0.0, next_frame - time.perf_counter()))
+        except Exception as e:
+            error = e
+        finally:
+            if self._player is player:
+                self._player = None
+            try:
+                player.source.cleanup()
+            except Exception:
+                pass
+            if after is not None:
+                after(error)
+
+    def stop(self):
+        # Like discord.py, stopping is immediate and after() runs from the player thread
+        if self._player is not None:
+            self._player.stopped.set()
+            self._player = None
+
+    def pause(self):
+        if self._player is not None:
+            self._player.paused.set()
+
+    def resume(self):
+        if self._player is not None:
+            self._player.paused.clear()
+
+    async def move_to(self, channel):
+        self.channel = channel
+
+    async def disconnect(self, *, force=False):
+        self.stop()
+        self._connected = False
+        self.guild.voice_client = None
+
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeMember:
+    def __init__(self, guild, voice_channel=None):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = f"user-{self.id}"
+        self.voice = FakeVoiceState(voice_channel) if voice_channel else None
+
+    def __str__(self):
+        return self.name
+
+
+class FakeGuild:
+    def __init__(self, rest_latency=0.0, bitrate=64000, realtime_voice=False):
+        self.id = next(_ids)
+        self.name = f"guild-{self.id}"
+        self.realtime_voice = realtime_voice
+        self.voice_client = None
+        self.text_channel = FakeTextChannel(self, latency=rest_latency)
+        self.voice_channel = FakeVoiceChannel(self, bitrate=bitrate)
+        self.me = FakeMember(self)
+
+
+class FakeContext:
+    def __init__(self, bot, guild, author=None):
+        self.bot = bot
+        self.guild = guild
+        self.channel = guild.text_channel
+        self.author = author or FakeMember(guild, guild.voice_channel)
+        self.message = None
+
+    @property
+    def voice_client(self):
+        return self.guild.voice_client
+
+    async def send(self, content=None, **kwargs):
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeBot:
+    """
+    Just enough of commands.Bot for the Music and OllamaAI cogs.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.guilds = {}
+        self.cogs = {}
+        self.user = None
+        self.presence_changes = 0
+        self.dispatched = 0
+
+    @property
+    def voice_clients(self):
+        return [guild.voice_client for guild in self.guilds.values() if guild.voice_client]
+
+    def add_guild(self, **kwargs):
+        guild = FakeGuild(**kwargs)
+        self.guilds[guild.id] = guild
+        return guild
+
+    def get_guild(self, guild_id):
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds.values():
+            if guild.text_channel.id == channel_id:
+                return guild.text_channel
+        return None
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def add_cog(self, cog):
+        """
+        Registers a cog and binds its commands so they can be awaited directly.
+        """
+        for command in cog.walk_commands():
+            command.cog = cog
+        self.cogs[cog.qualified_name] = cog
+        return cog
+
+    async def change_presence(self, **kwargs):
+        self.presence_changes += 1
+
+    def dispatch(self, event, *args, **kwargs):
+        self.dispatched += 1
+        for cog in self.cogs.values():
+            for name, listener in cog.get_listeners():
+                if name == f"on_{event}":
+                    self.loop.create_task(listener(*args, **kwargs))
+
+    async def wait_until_ready(self):
+        return None
@@ -0,0 +1,236 @@
+"""
+Load generator that drives the real Music and OllamaAI cogs with many synthetic guilds.
+
+Run from the discordmusic directory:
+
+    python -m benchmarks.loadgen --guilds 10,50,100,200 --duration 60 --output load.json
+
+Each stage starts a fresh bot with the given number of guilds. Every guild issues a
+random mix of play, playlist, skip, queue and aidj commands with exponential think
+times, against fake Discord objects (with injectable REST latency), fixture-backed
+yt-dlp extraction (with injectable latency) and a local Ollama mock server. Voice
+clients consume silent 20 ms frames in real time instead of spawning FFmpeg.
+
+Per stage it reports p50/p99 latency per command, the exceptions each command raised
+by type, event loop lag, the call sites the watchdog caught blocking the loop, and
+memory growth.
+"""
+import argparse
+import asyncio
+import datetime
+import functools
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+os.environ.setdefault("BOT_OWNER_ID", "0")
+os.environ.setdefault("LOG_CHANNEL_ID", "0")
+# The fakes are never throttled, so extraction pacing is lifted unless set explicitly
+os.environ.setdefault("EXTRACT_RATE", "10000")
+os.environ.setdefault("EXTRACT_BURST", "10000")
+
+BOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+from benchmarks.common import rss_bytes, run_metadata, summarize  # noqa: E402
+from benchmarks.fakes import FakeAudioSource, FakeBot, FakeContext, FakeExtractor  # noqa: E402
+from benchmarks.ollama_mock import OllamaMock  # noqa: E402
+
+DEFAULT_MIX = "play=35,queue=25,skip=15,playlist=5,aidj=5"
+MOODS = ["late night coding", "rainy sunday", "gym session", "road trip", "dinner party", "focus"]
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLfixture0000000000000000000000000"
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {'play', 'playlist', 'skip', 'queue', 'aidj'}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown commands in mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Stage:
+    """
+    One bot instance with a fixed number of synthetic guilds.
+    """
+
+    def __init__(self, loop, args, guild_count):
+        from cogs.music import Music
+        from cogs.ollama_ai import OllamaAI
+
+        self.args = args
+        self.bot = FakeBot(loop)
+        self.music = self.bot.add_cog(Music(self.bot))
+        self.ai = self.bot.add_cog(OllamaAI(self.bot))
+        self.contexts = [FakeContext(self.bot, self.bot.add_guild(rest_latency=args.rest_latency, realtime_voice=True)) for _ in range(guild_count)]
+        self.latencies = {name: [] for name in args.mix}
+        self.errors = {name: Counter() for name in args.mix}  # Command -> exception type -> count
+        self.commands = {
+            'play': lambda ctx: self.music.play(ctx, query=f"loadgen {ctx.guild.id} {random.randrange(10 ** 6)}"),
+            'playlist': lambda ctx: self.music.playlist(ctx, query=PLAYLIST_URL),
+            'skip': lambda ctx: self.music.skip(ctx),
+            'queue': lambda ctx: self.music.queue_info(ctx),
+            'aidj': lambda ctx: self.ai.aidj(ctx, query=random.choice(MOODS)),
+        }
+
+    async def guild_worker(self, ctx, stop_at):
+        names, weights = list(self.args.mix), list(self.args.mix.values())
+        # Stagger the first command so guilds don't all fire at once
+        await asyncio.sleep(random.uniform(0, self.args.think_time))
+        while time.perf_counter() < stop_at:
+            name = random.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                await self.commands[name](ctx)
+            except Exception as e:
+                self.errors[name][type(e).__name__] += 1
+            self.latencies[name].append(time.perf_counter() - start)
+            await asyncio.sleep(random.expovariate(1 / self.args.think_time))
+
+    async def close(self):
+        for handle in self.music.inactivity_timers.values():
+            handle.cancel()
+        for task in self.music.nowplaying_tasks.values():
+            task.cancel()
+        for ctx in self.contexts:
+            if ctx.guild.voice_client:
+                await ctx.guild.voice_client.disconnect()
+        # Let the players' after() callbacks drain
+        await asyncio.sleep(0.5)
+        self.music.song_queues.clear()
+
+
+async def sample_loop_lag(samples, interval=0.05):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_stage(loop, args, guild_count, extractor, mock):
+    from utils.watchdog import LoopWatchdog
+
+    gc.collect()
+    rss_start = rss_bytes()
+    extract_calls, ollama_requests = extractor.calls, dict(mock.requests)
+    stage = Stage(loop, args, guild_count)
+    lag_samples = []
+    lag_task = loop.create_task(sample_loop_lag(lag_samples))
+    watchdog = LoopWatchdog(loop, threshold=args.stall_threshold / 1000)
+    watchdog.start()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(stage.guild_worker(ctx, started + args.duration) for ctx in stage.contexts))
+    elapsed = time.perf_counter() - started
+    rss_peak = rss_bytes()
+
+    watchdog.stop()
+    lag_task.cancel()
+    queued = sum(queue.qsize() for queue in stage.music.song_queues.values())
+    await stage.close()
+    latencies, errors = stage.latencies, stage.errors
+    del stage
+    gc.collect()
+    rss_end = rss_bytes()
+
+    all_latencies = [sample for samples in latencies.values() for sample in samples]
+    return {
+        'guilds': guild_count,
+        'elapsed_s': elapsed,
+        'commands_per_s': len(all_latencies) / elapsed,
+        'latency': {
+            'all': summarize(all_latencies),
+            **{name: {**summarize(samples), 'errors': sum(errors[name].values()), 'error_types': dict(errors[name])}
+               for name, samples in latencies.items()},
+        },
+        'loop_lag': summarize(lag_samples),
+        'loop_stalls': watchdog.stalls,
+        'worst_blocking_sites': [
+            {'site': culprit, 'count': stats['count'], 'total_ms': stats['total_lag'] * 1000, 'max_ms': stats['max_lag'] * 1000}
+            for culprit, stats in watchdog.report(5)
+        ],
+        'memory': {
+            'rss_start_bytes': rss_start,
+            'rss_peak_bytes': rss_peak,
+            'rss_after_teardown_bytes': rss_end,
+            'growth_bytes': rss_peak - rss_start if rss_start is not None else None,
+            'retained_bytes': rss_end - rss_start if rss_start is not None else None,
+        },
+        'queued_at_end': queued,
+        'extractions': extractor.calls - extract_calls,
+        'ollama_requests': {path: count - ollama_requests.get(path, 0) for path, count in mock.requests.items()},
+    }
+
+
+async def run(args, extractor, mock):
+    loop = asyncio.get_running_loop()
+    stages = []
+    for guild_count in args.guilds:
+        stage = await run_stage(loop, args, guild_count, extractor, mock)
+        stages.append(stage)
+        print(f"{guild_count:>5} guilds: p50 {stage['latency']['all'].get('p50_ms', 0):8.1f} ms  "
+              f"p99 {stage['latency']['all'].get('p99_ms', 0):8.1f} ms  "
+              f"loop lag p99 {stage['loop_lag'].get('p99_ms', 0):7.1f} ms  "
+              f"rss +{(stage['memory']['growth_bytes'] or 0) / 2 ** 20:.1f} MiB", file=sys.stderr)
+        for name in args.mix:
+            if stage['latency'][name]['error_types']:
+                failures = ", ".join(f"{error} x{count}" for error, count in stage['latency'][name]['error_types'].items())
+                print(f"{'':>13} {name} failed: {failures}", file=sys.stderr)
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the Music and OllamaAI cogs with many synthetic guilds.")
+    parser.add_argument("--guilds", type=lambda spec: [int(n) for n in spec.split(',')], default=[10, 50, 100, 200], help="Comma-separated guild counts, one stage each.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds each stage runs.")
+    parser.add_argument("--think-time", type=float, default=3.0, help="Mean seconds between commands per guild.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Command weights (default: {DEFAULT_MIX}).")
+    parser.add_argument("--track-seconds", type=float, default=20.0, help="Length of every fake track.")
+    parser.add_argument("--extract-latency", type=float, default=0.3, help="Simulated yt-dlp extraction latency in seconds.")
+    parser.add_argument("--playlist-size", type=int, default=25, help="Entries in the fixture playlist.")
+    parser.add_argument("--rest-latency", type=float, default=0.05, help="Simulated Discord REST latency in seconds.")
+    parser.add_argument("--ollama-latency", type=float, default=0.5, help="Simulated Ollama time to first token in seconds.")
+    parser.add_argument("--ollama-tps", type=float, default=40.0, help="Simulated Ollama tokens per second.")
+    parser.add_argument("--stall-threshold", type=float, default=100.0, help="Loop stalls longer than this (ms) are attributed by the watchdog.")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for command mix and think times.")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)  # The cogs log every command at INFO
+    random.seed(args.seed)
+
+    mock = OllamaMock(latency=args.ollama_latency, tokens_per_second=args.ollama_tps)
+    # The ollama client reads OLLAMA_HOST on import, so the mock must be up before the cogs load
+    os.environ["OLLAMA_HOST"] = mock.start()
+
+    import discord
+    extractor = FakeExtractor(latency=args.extract_latency, playlist_size=args.playlist_size, duration=args.track_seconds).install()
+    discord.FFmpegOpusAudio = discord.FFmpegPCMAudio = functools.partial(FakeAudioSource, seconds=args.track_seconds)
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        stages = asyncio.run(run(args, extractor, mock))
+    finally:
+        extractor.uninstall()
+        mock.stop()
+    report = {'meta': run_metadata(args, started), 'stages': stages}
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+A local stand-in for the Ollama HTTP API.
+
+Serves /api/chat, /api/generate, /api/embeddings and /api/embed on its own event
+loop thread, so its simulated latency never competes with the bot's loop. Chat
+replies are 'Song Title - Artist' lines, which is what the AI cogs parse.
+"""
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+
+import numpy as np
+from aiohttp import web
+
+ARTISTS = ["Fixture Artist", "The Benchmarks", "Loop Lag", "Queue Depth", "DJ Percentile", "Cold Start"]
+
+
+def fake_embedding(text, dim):
+    """
+    A deterministic unit vector for a piece of text, so repeated embeds agree.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class OllamaMock:
+    def __init__(self, latency=0.2, tokens_per_second=40.0, embed_latency=0.02, embedding_dim=256):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.embed_latency = embed_latency
+        self.embedding_dim = embedding_dim
+        self.requests = {}
+        self.host = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def _count(self, path):
+        self.requests[path] = self.requests.get(path, 0) + 1
+
+    def _song_lines(self, prompt):
+        match = re.search(r"suggest (\d+) songs", prompt)
+        count = int(match.group(1)) if match else 3
+        return "\n".join(f"Mock Song {random.randrange(100000)} - {random.choice(ARTISTS)}" for _ in range(count))
+
+    async def _generate(self, prompt):
+        text = self._song_lines(prompt)
+        tokens = len(text.split()) * 2
+        duration = self.latency + tokens / self.tokens_per_second
+        await asyncio.sleep(duration)
+        return text, {'done': True, 'eval_count': tokens, 'eval_duration': int(tokens / self.tokens_per_second * 1e9), 'total_duration': int(duration * 1e9)}
+
+    async def chat(self, request):
+        self._count('chat')
+        body = await request.json()
+        text, stats = await self._generate(body['messages'][-1]['content'])
+        return web.json_response({'model': body.get('model'), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ'), 'message': {'role': 'assistant', 'content': text}, **stats})
+
+    async def generate(self, request):
+        self._count('generate')
+        body = await request.json()
+        text, stats = await self._generate(body.get('prompt', ''))
+        return web.json_response({'model': body.get('model'), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ'), 'response': text, **stats})
+
+    async def embeddings(self, request):
+        self._count('embeddings')
+        body = await request.json()
+        await asyncio.sleep(self.embed_latency)
+        return web.json_response({'embedding': fake_embedding(body.get('prompt', ''), self.embedding_dim)})
+
+    async def embed(self, request):
+        self._count('embed')
+        body = await request.json()
+        inputs = body.get('input', '')
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        await asyncio.sleep(self.embed_latency)
+        return web.json_response({'model': body.get('model'), 'embeddings': [fake_embedding(text, self.embedding_dim) for text in inputs]})
+
+    def start(self, host='127.0.0.1', port=0):
+        """
+        Starts serving on a background thread and returns the base URL.
+        """
+        started = threading.Event()
+
+        async def serve():
+            app = web.Application()
+            app.router.add_post('/api/chat', self.chat)
+            app.router.add_post('/api/generate', self.generate)
+            app.router.add_post('/api/embeddings', self.embeddings)
+            app.router.add_post('/api/embed', self.embed)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, host, port)
+            await site.start()
+            self.host = f"http://{host}:{site._server.sockets[0].getsockname()[1]}"
+            started.set()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="ollama-mock", daemon=True)
+        self._thread.start()
+        started.wait(10)
+        return self.host
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
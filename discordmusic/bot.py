@@ -1,25 +1,35 @@
 #!/usr/bin/env python3
+import time
+launch_time = time.perf_counter()  # Taken before the other imports so they count towards startup
+
 import asyncio
 import os
 import discord
 from discord.ext import commands
 import config
 import logging
+from utils import metrics
 from utils.discord_log_handler import DiscordLogHandler
+from utils.logging_setup import setup_logging
 from utils.speeds import preload_dependencies
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s:%(levelname)s:%(name)s: %(message)s',
-    handlers=[
-        logging.FileHandler("bot_activity.log"),
-        logging.StreamHandler()
-    ]
-)
+startup_phases = {}  # phase -> seconds, logged once the bot is ready
+
+def record_startup_phase(phase, started):
+    startup_phases[phase] = time.perf_counter() - started
+    metrics.STARTUP_PHASE_SECONDS.labels(phase=phase).set(startup_phases[phase])
+    return time.perf_counter()
 
-# Set discord.py logger to DEBUG level
-logging.getLogger('discord').setLevel(logging.DEBUG)
+# Configure logging. Records are queued and written by a background thread,
+# so logging never blocks the event loop on disk or console I/O.
+log_listener = setup_logging(
+    "bot_activity.log",
+    level=config.LOG_LEVEL,
+    module_levels=config.LOG_LEVELS,
+    max_bytes=config.LOG_MAX_BYTES,
+    backup_count=config.LOG_BACKUP_COUNT,
+)
+record_startup_phase("imports", launch_time)
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -28,10 +38,31 @@ intents.voice_states = True
 bot = commands.Bot(command_prefix='?', intents=intents, owner_id=config.BOT_OWNER_ID)
 
 discord_log_handler = None
+connect_started = None
+
+def log_startup_summary():
+    record_startup_phase("connect", connect_started)
+    ready_after = time.perf_counter() - launch_time
+    metrics.STARTUP_PHASE_SECONDS.labels(phase="total").set(ready_after)
+    phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in startup_phases.items())
+    message = f"Ready {ready_after:.2f}s after launch ({phases}; target {config.STARTUP_TARGET_SECONDS:g}s)."
+    if ready_after > config.STARTUP_TARGET_SECONDS:
+        logging.warning(f"Slow startup: {message}")
+    else:
+        logging.info(message)
+
+async def warm_dependencies():
+    started = time.perf_counter()
+    await asyncio.to_thread(preload_dependencies)
+    record_startup_phase("warmup", started)
 
 @bot.event
 async def on_ready():
     global discord_log_handler
+    if "connect" not in startup_phases:
+        log_startup_summary()
+        if config.FAST_START:
+            asyncio.create_task(warm_dependencies())
     logging.info(f'Logged in as {bot.user} (ID: {bot.user.id})')
     logging.info('------')
     # Generate and print invite URL
@@ -39,10 +70,17 @@ async def on_ready():
     invite_url = f"https://discord.com/oauth2/authorize?client_id={bot.user.id}&permissions={permissions_integer}&scope=bot"
     logging.info(f"Bot Invite URL: {invite_url}")
     logging.info('------')
+    if discord_log_handler:
+        return  # on_ready fires again after reconnects; the handler is already installed
     if config.LOG_CHANNEL_ID and config.LOG_CHANNEL_ID != "YOUR_LOG_CHANNEL_ID":
-        discord_log_handler = DiscordLogHandler(bot, config.LOG_CHANNEL_ID)
+        discord_log_handler = DiscordLogHandler(
+            bot,
+            config.LOG_CHANNEL_ID,
+            level=logging.getLevelName(config.DISCORD_LOG_LEVEL),
+            flush_interval=config.DISCORD_LOG_FLUSH_INTERVAL,
+        )
         logging.getLogger().addHandler(discord_log_handler)
-        logging.info(f"Discord log handler added for channel ID: {config.LOG_CHANNEL_ID}")
+        logging.info(f"Discord log handler added for channel ID: {config.LOG_CHANNEL_ID} (level {config.DISCORD_LOG_LEVEL}, flushing every {config.DISCORD_LOG_FLUSH_INTERVAL}s)")
     else:
         logging.warning("LOG_CHANNEL_ID is not set. Discord logging will be disabled.")
 
@@ -60,23 +98,33 @@ async def load_extensions():
         'cogs.ollama_ai', # New Ollama AI cog
         # 'cogs.meme',
         'cogs.music', # music.py should be loaded as a cog
+        'cogs.broadcast', # One stream fanned out to many voice channels; needs cogs.music
+        'cogs.metrics', # Prometheus-style metrics endpoint
+        'cogs.watchdog', # Event loop stall detection
         # 'utils.self_healing', # Self-healing is also treated as a cog
     ]
     for extension in cogs_to_load:
         try:
+            started = time.perf_counter()
             await bot.load_extension(extension)
-            logging.info(f'Successfully loaded extension: {extension}')
+            logging.info(f'Successfully loaded extension: {extension} ({(time.perf_counter() - started) * 1000:.0f} ms)')
         except Exception as e:
             logging.error(f'Failed to load extension {extension}: {e}', exc_info=True)
 
 async def main():
-    preload_dependencies()
+    global connect_started
+    if not config.FAST_START:
+        started = time.perf_counter()
+        preload_dependencies()
+        record_startup_phase("preload", started)
     os.makedirs("audio_cache", exist_ok=True)
-    os.makedirs("yt_dlp_cache", exist_ok=True)
+    os.makedirs(config.YTDL_CACHE_DIR, exist_ok=True)
     logging.info("Checked and ensured cache directories exist.")
 
     async with bot:
+        started = time.perf_counter()
         await load_extensions()
+        connect_started = record_startup_phase("extensions", started)
         try:
             await bot.start(config.DISCORD_TOKEN)
         except discord.errors.LoginFailure:
@@ -88,8 +136,8 @@ async def main():
 async def reload(ctx, extension):
     """Reloads an extension."""
     try:
-        await bot.unload_extension(extension)
-        await bot.load_extension(extension)
+        # reload_extension rolls back to the old module if the new one fails to load
+        await bot.reload_extension(extension)
         await ctx.send(f"Extension {extension} reloaded.")
     except Exception as e:
         await ctx.send(f"Error reloading extension {extension}: {e}")
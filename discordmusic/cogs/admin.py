@@ -1,3 +1,4 @@
+import asyncio
 import discord
 from discord.ext import commands
 import config
@@ -6,6 +7,7 @@ import aiohttp
 from datetime import datetime
 import logging
 import os
+import time
 from utils import log_and_cookie_utils
 from http.cookies import SimpleCookie
 
@@ -15,13 +17,16 @@ class Admin(commands.Cog):
 
     @commands.command(name="analyze_logs")
     @commands.is_owner()
-    async def analyze_logs(self, ctx):
-        """Analyzes the bot's log files for errors and warnings."""
+    async def analyze_logs(self, ctx, hours: float = 24):
+        """Analyzes the bot's log files for errors and warnings.
+        Usage: ?analyze_logs [hours]
+        """
         try:
-            await ctx.send("🔬 Analyzing log files, please wait...")
+            await ctx.send(f"🔬 Analyzing log files for the last {hours:g} hour(s), please wait...")
             # Get the absolute path of the bot's root directory
             base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-            summary = log_and_cookie_utils.analyze_logs(base_dir)
+            # Only lines appended since the last run are parsed, off the event loop
+            summary = await asyncio.to_thread(log_and_cookie_utils.analyze_logs, base_dir, hours)
             
             # Send the summary in chunks if it's too long
             for chunk in [summary[i:i + 1900] for i in range(0, len(summary), 1900)]:
@@ -92,8 +97,8 @@ class Admin(commands.Cog):
                     logging.info(f"Successfully wrote {len(cookie_lines)} cookie lines to youtube_cookie.txt")
                     
                     from cogs import youtube
-                    youtube.YTDL_FORMAT_OPTIONS["cookiefile"] = "youtube_cookie.txt"
-                    logging.info("Updated yt_dlp cookiefile option.")
+                    youtube.EXTRACTION_SCHEDULER.pool.add("youtube_cookie.txt")
+                    logging.info("Added youtube_cookie.txt to the extraction identity pool.")
 
                     await ctx.send(embed=self.create_embed("Cookies Set", f"{config.SUCCESS_EMOJI} Successfully fetched and set cookies from `{url}` to `youtube_cookie.txt`."))
 
@@ -104,6 +109,31 @@ class Admin(commands.Cog):
             logging.error(f"An unexpected error occurred in fetch_and_set_cookies for {url}: {e}", exc_info=True)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} An unexpected error occurred: {e}", discord.Color.red()))
 
+    @commands.command(name="throttle")
+    @commands.is_owner()
+    async def throttle(self, ctx):
+        """Shows whether YouTube is throttling extractions and the state of each cookie identity."""
+        from cogs import youtube
+        from utils.throttle import PRIORITIES
+        scheduler = youtube.EXTRACTION_SCHEDULER
+        lines = [
+            f"**State:** {'throttled' if scheduler.throttled else 'normal'}",
+            f"**Rate:** {f'{scheduler.bucket.rate:.2f}/s of {scheduler.base_rate:.2f}/s' if scheduler.paced else 'not paced'}, {scheduler.running}/{scheduler.concurrency} extraction(s) running",
+            "**Waiting:** " + ", ".join(f"{scheduler.queued(priority)} {priority}" for priority in PRIORITIES),
+        ]
+        for identity in scheduler.pool.identities:
+            if not identity.usable():
+                state = "missing file"
+            elif identity.cooldown():
+                state = f"cooling down for {identity.cooldown():.0f}s (strike {identity.strikes})"
+            else:
+                state = "ready"
+            lines.append(f"`{identity.name}`: {state}")
+        if scheduler.last_throttle:
+            at, name, error = scheduler.last_throttle
+            lines.append(f"**Last throttle:** {time.monotonic() - at:.0f}s ago on `{name}`: {error[:200]}")
+        await ctx.send(embed=self.create_embed("Extraction Throttling", "\n".join(lines), discord.Color.orange() if scheduler.throttled else discord.Color.blurple()))
+
     @commands.command(name="shutdown")
     @commands.is_owner()
     async def shutdown(self, ctx):
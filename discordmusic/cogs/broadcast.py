@@ -0,0 +1,186 @@
+import asyncio
+import collections
+import functools
+import logging
+
+import discord
+from discord.ext import commands
+
+import config
+from utils.broadcast import Broadcast, BroadcastListener
+
+from .youtube import YTDLSource, FFMPEG_OPTIONS, YTDL_FORMAT_OPTIONS, ffmpeg_input_options, opus_copyable, opus_encoder_settings
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastCog(commands.Cog, name="Broadcast"):
+    """
+    Radio events: one playlist is extracted and decoded once, and every voice channel
+    that tunes in plays the same frames from a shared buffer.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.broadcast = None  # utils.broadcast.Broadcast while on air
+        self.playlist = collections.deque()  # Info dicts still to play; flat entries are resolved when their turn comes
+        self.current = None  # Info dict of the track on air
+        self._advance_lock = asyncio.Lock()
+
+    async def cog_unload(self):
+        await self._stop_broadcast()
+
+    def create_embed(self, title, description, color=discord.Color.blurple()):
+        return discord.Embed(title=title, description=description, color=color)
+
+    def _music(self):
+        music_cog = self.bot.get_cog('Music')
+        if music_cog is None:
+            raise RuntimeError("The Music cog is not loaded.")
+        return music_cog
+
+    async def _spawn(self, data):
+        player_options = FFMPEG_OPTIONS.copy()
+        input_options = ffmpeg_input_options(data)
+        if input_options:
+            player_options['before_options'] = f"{input_options} {player_options['before_options']}"
+        # Listeners may sit in channels of any bitrate, so the broadcast is encoded for the best of them
+        bitrate, complexity = opus_encoder_settings(None)
+        codec = 'opus' if opus_copyable(data, bitrate) else None  # 'opus' makes discord.py copy the stream
+        if not codec:
+            player_options['options'] = f"{player_options['options']} -compression_level {complexity}"
+        factory = functools.partial(discord.FFmpegOpusAudio, data['url'], codec=codec, bitrate=bitrate, **player_options)
+        return await self._music().ffmpeg.spawn(factory, is_live=lambda source: self.broadcast is not None and self.broadcast.source is source,
+                                                encoding='copy' if codec else f"{bitrate}k/c{complexity}")
+
+    async def _retire(self, source):
+        if source is not None:
+            await asyncio.to_thread(source.cleanup)
+            self._music().ffmpeg.release(source)
+
+    def _on_track_end(self, source):
+        # Called from the pump thread
+        asyncio.run_coroutine_threadsafe(self._advance(finished=source), self.bot.loop)
+
+    async def _advance(self, finished=None):
+        """
+        Puts the next playable track of the playlist on air, resolving it first if needed.
+        """
+        await self._retire(finished)
+        async with self._advance_lock:
+            while self.playlist and self.broadcast is not None:
+                entry = self.playlist.popleft()
+                try:
+                    data = entry
+                    if data.get('_type') == 'url':  # A flat playlist entry, resolved now that it's up
+                        ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+                        ytdl_opts['noplaylist'] = True
+                        result = await YTDLSource.from_url(entry.get('webpage_url') or entry['url'], loop=self.bot.loop, stream=True, ytdl_opts=ytdl_opts, priority='prefetch')
+                        data = (result[0] if isinstance(result, list) else result)['data']
+                    source = await self._spawn(data)
+                except Exception as e:
+                    logger.warning("Broadcast: skipping %s: %s", entry.get('title') or entry.get('url'), e)
+                    continue
+                if self.broadcast is None:
+                    await self._retire(source)
+                    return
+                self.current = data
+                await self._retire(self.broadcast.set_source(source))
+                logger.info("Broadcast: now on air: %s (%s listener(s)).", data.get('title'), len(self.broadcast.listeners))
+                return
+            self.current = None
+
+    async def _stop_broadcast(self):
+        broadcast, self.broadcast = self.broadcast, None
+        self.playlist.clear()
+        self.current = None
+        if broadcast is not None:
+            await self._retire(broadcast.stop())
+
+    @commands.command(name="broadcast")
+    @commands.is_owner()
+    async def broadcast_cmd(self, ctx, *, query):
+        """Starts a broadcast with a song or playlist, or adds to the one on air.
+        Usage: ?broadcast <song or playlist>
+        """
+        ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+        ytdl_opts['noplaylist'] = False
+        ytdl_opts['extract_flat'] = 'in_playlist'  # Entries are resolved one at a time as they come up
+        try:
+            result = await YTDLSource.from_url(query, loop=self.bot.loop, ytdl_opts=ytdl_opts, guild_id=ctx.guild.id)
+        except Exception as e:
+            logger.error("Broadcast: could not fetch %s: %s", query, e)
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not fetch `{query}`: {e}", discord.Color.red()))
+        entries = [item['data'] for item in (result if isinstance(result, list) else [result]) if item.get('data')]
+        if not entries:
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Nothing to broadcast for `{query}`.", discord.Color.red()))
+        self.playlist.extend(entries)
+
+        if self.broadcast is None:
+            self.broadcast = Broadcast(buffer_seconds=config.BROADCAST_BUFFER_SECONDS, on_track_end=self._on_track_end)
+            self.broadcast.start()
+            await self._advance()
+            await ctx.send(embed=self.create_embed("On Air", f"{config.SUCCESS_EMOJI} Broadcasting {len(entries)} song(s). Listeners join with `?tunein`."))
+        else:
+            if self.current is None:
+                await self._advance()
+            await ctx.send(embed=self.create_embed("Broadcast Updated", f"{config.QUEUE_EMOJI} Added {len(entries)} song(s) to the broadcast."))
+
+    @commands.command(name="broadcastskip")
+    @commands.is_owner()
+    async def broadcastskip(self, ctx):
+        """Skips the song on air for every listener."""
+        if self.broadcast is None:
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Nothing is on air.", discord.Color.red()))
+        await self._retire(self.broadcast.set_source(None))
+        await self._advance()
+        await ctx.send(embed=self.create_embed("Broadcast Skipped", f"{config.SKIP_EMOJI} Now on air: `{self.current.get('title') if self.current else 'nothing'}`."))
+
+    @commands.command(name="broadcaststop")
+    @commands.is_owner()
+    async def broadcaststop(self, ctx):
+        """Ends the broadcast; every listening channel stops playing."""
+        if self.broadcast is None:
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Nothing is on air.", discord.Color.red()))
+        listeners = len(self.broadcast.listeners)
+        await self._stop_broadcast()
+        await ctx.send(embed=self.create_embed("Off Air", f"{config.SUCCESS_EMOJI} Broadcast ended for {listeners} listening channel(s)."))
+
+    @commands.command(name="onair")
+    async def onair(self, ctx):
+        """Shows what the broadcast is playing and how many channels are tuned in."""
+        if self.broadcast is None:
+            return await ctx.send(embed=self.create_embed("Off Air", "No broadcast is running."))
+        title = self.current.get('title') if self.current else "Nothing (waiting for songs)"
+        await ctx.send(embed=self.create_embed("On Air", f"{config.PLAY_EMOJI} **{title}**\n{len(self.broadcast.listeners)} channel(s) tuned in, {len(self.playlist)} song(s) to come."))
+
+    @commands.command(name="tunein")
+    async def tunein(self, ctx):
+        """Plays the broadcast in your voice channel."""
+        if self.broadcast is None:
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Nothing is on air.", discord.Color.red()))
+        voice_client = await self._music()._ensure_voice_connection(ctx)
+        if not voice_client:
+            return
+        if isinstance(voice_client.source, BroadcastListener):
+            return await ctx.send(embed=self.create_embed("Tuned In", "This channel is already listening to the broadcast."))
+        if voice_client.is_playing() or voice_client.is_paused():
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Music is playing here; `?stop` it before tuning in.", discord.Color.red()))
+        voice_client.play(self.broadcast.listen(), after=lambda error: error and logger.error("Broadcast listener in %s failed: %s", ctx.guild.name, error))
+        logger.info("%s tuned in to the broadcast in %s (%s listener(s)).", ctx.author, ctx.guild.name, len(self.broadcast.listeners))
+        await ctx.send(embed=self.create_embed("Tuned In", f"{config.PLAY_EMOJI} Now playing the broadcast in `{voice_client.channel}`."))
+
+    @commands.command(name="tuneout")
+    async def tuneout(self, ctx):
+        """Stops playing the broadcast here; your own queue picks up again."""
+        if not ctx.voice_client or not isinstance(ctx.voice_client.source, BroadcastListener):
+            return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} This channel isn't listening to the broadcast.", discord.Color.red()))
+        ctx.voice_client.stop()
+        await ctx.send(embed=self.create_embed("Tuned Out", f"{config.SUCCESS_EMOJI} Stopped playing the broadcast."))
+        music_cog = self._music()
+        if not (await music_cog.get_queue(ctx.guild.id)).empty():
+            await music_cog.play_next(ctx)
+
+
+async def setup(bot):
+    await bot.add_cog(BroadcastCog(bot))
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import re
+import time
+from urllib.parse import urlsplit
+
+import discord
+from aiohttp import web
+from discord.ext import commands, tasks
+
+import config
+from utils import metrics
+from utils.throttle import PRIORITIES
+
+from . import youtube
+
+
+class RateLimitLogFilter(logging.Filter):
+    """
+    Counts the 429 responses discord.py reports while it retries requests internally.
+    """
+
+    def filter(self, record):
+        if isinstance(record.msg, str) and "responded with 429" in record.msg and isinstance(record.args, tuple) and len(record.args) >= 2:
+            method, url = record.args[0], str(record.args[1])
+            path = re.sub(r'/\d{15,}', '/{id}', urlsplit(url).path)
+            path = re.sub(r'^/api/v\d+', '', path)
+            metrics.DISCORD_RATE_LIMITED_TOTAL.labels(route=f"{method} {path}").inc()
+        return True
+
+
+class Metrics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.runner = None
+        self.rate_limit_filter = RateLimitLogFilter()
+        self._original_request = None
+
+    async def cog_load(self):
+        # Count every Discord REST call by route
+        self._original_request = self.bot.http.request
+        original_request = self._original_request
+
+        async def instrumented_request(route, **kwargs):
+            metrics.DISCORD_REST_REQUESTS_TOTAL.labels(route=route.key).inc()
+            try:
+                return await original_request(route, **kwargs)
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    metrics.DISCORD_RATE_LIMITED_TOTAL.labels(route=route.key).inc()
+                raise
+
+        self.bot.http.request = instrumented_request
+        logging.getLogger('discord.http').addFilter(self.rate_limit_filter)
+
+        if config.METRICS_PORT:
+            app = web.Application()
+            app.router.add_get('/metrics', self.handle_metrics)
+            self.runner = web.AppRunner(app, access_log=None)
+            await self.runner.setup()
+            await web.TCPSite(self.runner, config.METRICS_HOST, config.METRICS_PORT).start()
+            logging.info(f"Metrics endpoint listening on http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+
+        self.sample_gauges.start()
+        self.measure_loop_lag.start()
+
+    async def cog_unload(self):
+        self.sample_gauges.cancel()
+        self.measure_loop_lag.cancel()
+        logging.getLogger('discord.http').removeFilter(self.rate_limit_filter)
+        if self._original_request is not None:
+            self.bot.http.request = self._original_request
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def handle_metrics(self, request):
+        return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8', headers={'X-Content-Type-Options': 'nosniff'})
+
+    @tasks.loop(seconds=5)
+    async def sample_gauges(self):
+        """
+        Samples the state-based gauges: queue lengths, guild sessions, voice clients, broadcast listeners, extraction scheduling and FFmpeg processes.
+        """
+        music_cog = self.bot.get_cog('Music')
+        broadcast_cog = self.bot.get_cog('Broadcast')
+        metrics.QUEUE_LENGTH.clear()
+        if music_cog:
+            for guild_id, queue in list(music_cog.song_queues.items()):
+                metrics.QUEUE_LENGTH.labels(guild=guild_id).set(queue.qsize())
+            metrics.GUILD_SESSIONS.set(len(music_cog.sessions))
+            metrics.GUILD_SESSION_BYTES.set(music_cog.sessions.size_bytes())
+            metrics.TIMER_WHEEL_TIMERS.set(len(music_cog.timers))
+        metrics.VOICE_CLIENTS.set(len(self.bot.voice_clients))
+        metrics.BROADCAST_LISTENERS.set(len(broadcast_cog.broadcast.listeners) if broadcast_cog and broadcast_cog.broadcast else 0)
+        scheduler = youtube.EXTRACTION_SCHEDULER
+        metrics.EXTRACT_IDENTITIES_COOLING.set(scheduler.pool.cooling())
+        metrics.EXTRACT_RUNNING.set(scheduler.running)
+        for priority in PRIORITIES:
+            metrics.EXTRACT_QUEUED.labels(priority=priority).set(scheduler.queued(priority))
+        metrics.FFMPEG_PROCESSES.set(await asyncio.to_thread(metrics.count_ffmpeg_children))
+
+    @tasks.loop(seconds=1)
+    async def measure_loop_lag(self):
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        metrics.EVENT_LOOP_LAG_SECONDS.set(time.perf_counter() - start)
+
+
+async def setup(bot):
+    await bot.add_cog(Metrics(bot))
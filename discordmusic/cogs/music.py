@@ -1,33 +1,182 @@
 import asyncio
+import functools
 import discord
 from discord.ext import commands
 import random
 import logging
 import time
 import os
-import shutil
 
 import config
+from utils import metrics
 from utils.speeds import get_youtube_service
-
-from .youtube import YTDLSource, FFMPEG_OPTIONS, YTDL_FORMAT_OPTIONS
+from utils.autoplay import AutoplayPool
+from utils.canonical import canonicalize
+from utils.ffmpeg import FFmpegManager
+from utils.playback import FRAME_LENGTH, TrackedAudio, format_timestamp, parse_timestamp
+from utils.session import GuildSession, GuildSessions
+from utils.timerwheel import TimerWheel
+
+from .youtube import YTDLSource, FFMPEG_OPTIONS, YTDL_FORMAT_OPTIONS, ffmpeg_input_options, opus_copyable, opus_encoder_settings, pick_audio_format
 from .queuebuffer import QueueBuffer
 
+logger = logging.getLogger(__name__)
+
+# Hot reload: the outgoing Music instance leaves its per-guild state on the bot and
+# the incoming one adopts it, so live playback survives `?reload cogs.music`.
+HANDOFF_VERSION = 10
+HANDOFF_MAX_AGE = 60  # Seconds a stashed handoff stays valid
+HANDOFF_STATE = ('sessions', 'ffmpeg')
+SESSION_SWEEP_INTERVAL = 60  # Seconds between checks for expired guild sessions
+
+# Fields of a yt-dlp info dict that describe the selected stream rather than the track
+STREAM_FIELDS = ('url', 'ext', 'acodec', 'protocol', 'format_id', 'abr')
+
 class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.song_queues = {}
-        self.search_results = {}
-        self.current_song = {}
-        self.nowplaying_message = {}
-        self.queue_message = {}
-        self.playback_speed = {}
+        # Per-guild state lives on one GuildSession per guild. self.current_song,
+        # self.song_queues and the other GuildSession.FIELDS are dict-like views of it.
+        self.sessions = GuildSessions()
+        self._bind_session_fields()
+        self.timers = TimerWheel(tick=1.0)  # Idle, refresh and expiry deadlines
         self.youtube_speeds = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0]
-        self.looping = {}
-        self.song_start_time = {}
-        self.nowplaying_tasks = {}
-        self.current_volume = {}
-        self.inactivity_timers = {}
+        self.pending_fetches = set()  # (guild_id, query, process_playlist) of fetches in flight
+        self.ffmpeg = FFmpegManager(
+            max_processes=config.FFMPEG_MAX_PROCESSES, queue_timeout=config.FFMPEG_QUEUE_TIMEOUT, nice=config.FFMPEG_NICE,
+            max_rss_bytes=config.FFMPEG_MAX_RSS_MB * 2 ** 20, max_cpu_percent=config.FFMPEG_MAX_CPU_PERCENT,
+        )
+        self._sweep_timer = None
+        self._retired = False  # Set once this instance has handed its state off
+        self._successor = None  # The instance that adopted our state
+
+    async def cog_load(self):
+        handoff = getattr(self.bot, 'music_handoff', None)
+        if handoff is not None:
+            self.bot.music_handoff = None
+            age = time.monotonic() - handoff['exported_at']
+            if handoff.get('version') != HANDOFF_VERSION or age > HANDOFF_MAX_AGE:
+                logger.warning("Discarding Music state handoff (version %s, %.0fs old).", handoff.get('version'), age)
+            else:
+                self.adopt_state(handoff)
+        self.ffmpeg.is_live = self._ffmpeg_source_live
+        self.ffmpeg.start()
+        self._sweep_timer = self.timers.schedule(SESSION_SWEEP_INTERVAL, self._expire_sessions)
+
+    async def cog_unload(self):
+        self.bot.music_handoff = self.export_state()
+
+    def export_state(self):
+        """
+        Detaches this instance from its per-guild state so a reloaded instance can adopt it.
+        Background tasks and timers running this instance's code are stopped; queues,
+        current songs and live voice clients are left untouched.
+        """
+        self._retired = True
+        nowplaying_guilds = [guild_id for guild_id, task in self.nowplaying_tasks.items() if task and not task.done()]
+        for guild_id in nowplaying_guilds:
+            self.nowplaying_tasks[guild_id].cancel()
+        inactivity_remaining = {guild_id: handle.remaining() for guild_id, handle in self.inactivity_timers.items()}
+        self.timers.stop()  # Also drops the idle timers, which run this instance's code
+        for pool in self.autoplay_pools.values():
+            if pool.refill_task and not pool.refill_task.done():
+                pool.refill_task.cancel()
+            pool.refill_task = None
+        for task in self.standby_tasks.values():
+            task.cancel()
+        # Dropped voice connections are reconnected by the adopting instance
+        reconnect_guilds = [guild_id for guild_id, task in self.reconnect_tasks.items() if not task.done()]
+        for guild_id in list(self.reconnect_tasks):
+            self.reconnect_tasks.pop(guild_id).cancel()
+        logger.info("Exported Music state for %s guild(s) with %s live player(s).", len(self.song_queues), len(nowplaying_guilds))
+        return {
+            'version': HANDOFF_VERSION,
+            'exported_at': time.monotonic(),
+            'cog': self,
+            'state': {attr: getattr(self, attr) for attr in HANDOFF_STATE},
+            'nowplaying_guilds': nowplaying_guilds,
+            'inactivity_remaining': inactivity_remaining,
+            'reconnect_guilds': reconnect_guilds,
+        }
+
+    def adopt_state(self, handoff):
+        """
+        Takes over the state exported by a previous instance, restarts its background
+        work with this instance's code and redirects its players' callbacks here.
+        """
+        for attr, value in handoff['state'].items():
+            setattr(self, attr, value)
+        self._bind_session_fields()
+        handoff['cog']._successor = self
+        for guild_id in handoff['nowplaying_guilds']:
+            ctx = self.player_contexts.get(guild_id)
+            if ctx and ctx.voice_client:
+                self.nowplaying_tasks[guild_id] = self.bot.loop.create_task(self._update_nowplaying_message(guild_id, ctx.channel.id))
+        for guild_id, remaining in handoff['inactivity_remaining'].items():
+            self._start_inactivity_timer(guild_id, delay=remaining)
+        for guild_id in self.autoplay_enabled:
+            self._schedule_autoplay_refill(guild_id)
+        for guild_id in handoff['reconnect_guilds']:
+            self._schedule_reconnect(guild_id, "its reconnect was interrupted by a reload")
+        logger.info("Adopted Music state for %s guild(s) from the previous instance.", len(self.song_queues))
+
+    def _bind_session_fields(self):
+        for name in GuildSession.FIELDS:
+            setattr(self, name, self.sessions.field(name))
+
+    def _end_session(self, guild_id, reason):
+        """
+        Reclaims everything held for a guild: cancels its tasks and timers, stops any
+        standby FFmpeg process and drops its session. The caller leaves voice first.
+        """
+        self._discard_standby(guild_id)
+        session = self.sessions.reclaim(guild_id)
+        if session is None:
+            return
+        current = asyncio.current_task()
+        for name in ('nowplaying_tasks', 'standby_tasks', 'reconnect_tasks', 'inactivity_timers'):
+            handle = getattr(session, name, None)
+            if handle is not None and handle is not current:
+                handle.cancel()
+        pool = getattr(session, 'autoplay_pools', None)
+        if pool is not None and pool.refill_task:
+            pool.refill_task.cancel()
+        metrics.GUILD_SESSIONS_RECLAIMED_TOTAL.labels(reason=reason).inc()
+        logger.info("Reclaimed the session of guild %s (%s).", guild_id, reason)
+
+    def _expire_sessions(self):
+        """
+        Reclaims sessions of guilds the bot is not in voice in and that have not changed
+        for SESSION_IDLE_TTL seconds, such as ones only used for ?search. Reschedules itself.
+        """
+        cutoff = time.monotonic() - config.SESSION_IDLE_TTL
+        for guild_id, session in list(self.sessions.sessions.items()):
+            guild = self.bot.get_guild(guild_id)
+            if session.last_used < cutoff and not (guild and guild.voice_client) and not hasattr(session, 'reconnect_tasks'):
+                self._end_session(guild_id, 'expired')
+        self._sweep_timer = self.timers.schedule(SESSION_SWEEP_INTERVAL, self._expire_sessions)
+
+    def _after_callback(self, ctx):
+        """
+        Builds the `after` callback for voice_client.play. It runs on the player thread,
+        and may fire after a hot reload, so it resolves the live cog instance first.
+        """
+        def after(error):
+            asyncio.run_coroutine_threadsafe(self._forward_after_playback(ctx, error), self.bot.loop)
+        return after
+
+    async def _forward_after_playback(self, ctx, error):
+        target = self
+        deadline = time.monotonic() + HANDOFF_MAX_AGE
+        while target._retired:
+            if target._successor is not None:
+                target = target._successor
+            elif time.monotonic() > deadline:
+                logger.warning("Playback ended in guild %s but no Music instance adopted it.", ctx.guild.id)
+                return
+            else:
+                await asyncio.sleep(0.1)  # Mid-reload: the new instance has not loaded yet
+        await target._after_playback(ctx, error)
 
     async def get_queue(self, guild_id):
         if guild_id not in self.song_queues:
@@ -54,36 +203,72 @@ class Music(commands.Cog):
             del self.inactivity_timers[guild_id]
         guild = self.bot.get_guild(guild_id)
         if guild and guild.voice_client and not guild.voice_client.is_playing():
+            self.intentional_disconnects[guild_id] = True
             await guild.voice_client.disconnect()
-            logging.info(f"Bot disconnected from voice channel in {guild.name} due to inactivity.")
+            self._end_session(guild_id, 'idle')
+            logger.info("Bot disconnected from voice channel in %s due to inactivity.", guild.name)
 
-    def _start_inactivity_timer(self, guild_id):
+    def _start_inactivity_timer(self, guild_id, delay=600):
         if guild_id in self.inactivity_timers:
             self.inactivity_timers[guild_id].cancel()
-        self.inactivity_timers[guild_id] = self.bot.loop.call_later(600, lambda: asyncio.ensure_future(self._disconnect_if_idle(guild_id)))
+        self.inactivity_timers[guild_id] = self.timers.schedule(delay, self._disconnect_if_idle, guild_id)
+
+    def _guild_lock(self, guild_id):
+        """
+        The lock that serializes a guild's playback state transitions: connecting, starting
+        the next track, restarting the current one and stream recovery. Without it two
+        racing play_next calls both pass the is_playing() check and spawn FFmpeg twice.
+        """
+        lock = self.guild_locks.get(guild_id)
+        if lock is None:
+            lock = self.guild_locks[guild_id] = asyncio.Lock()
+        return lock
 
     async def _ensure_voice_connection(self, ctx):
         """Ensures the bot is connected to the user's voice channel."""
         if not ctx.author.voice or not ctx.author.voice.channel:
-            logging.warning("User not in a voice channel.")
+            logger.warning("User not in a voice channel.")
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} You must be in a voice channel to play music.", discord.Color.red()))
             return None
 
-        voice_client = ctx.voice_client
-        target_channel = ctx.author.voice.channel
-
-        if not voice_client:
-            logging.info(f"Bot not in a voice channel, attempting to join {target_channel.name}.")
-            return await target_channel.connect()
-        elif voice_client.channel != target_channel or not voice_client.is_connected():
-            logging.info(f"Bot not in the correct channel or disconnected, moving to {target_channel.name}.")
-            await voice_client.move_to(target_channel)
-        
-        logging.info(f"Bot is in voice channel: {ctx.voice_client.channel}")
+        moved = False
+        async with self._guild_lock(ctx.guild.id):
+            voice_client = ctx.voice_client
+            target_channel = ctx.author.voice.channel
+
+            if not voice_client:
+                logger.info("Bot not in a voice channel, attempting to join %s.", target_channel.name)
+                self.intentional_disconnects.pop(ctx.guild.id, None)
+                return await target_channel.connect()
+            elif voice_client.channel != target_channel or not voice_client.is_connected():
+                logger.info("Bot not in the correct channel or disconnected, moving to %s.", target_channel.name)
+                await voice_client.move_to(target_channel)
+                moved = True
+
+        logger.info("Bot is in voice channel: %s", ctx.voice_client.channel)
+        if moved:
+            await self._retune(ctx)
         return ctx.voice_client
 
-    async def _fetch_and_queue(self, ctx, query: str, *, process_playlist: bool):
-        """Fetches songs from a query and adds them to the queue."""
+    async def _fetch_and_queue(self, ctx, query: str, *, process_playlist: bool, voice_ready=None):
+        """
+        Fetches songs from a query and adds them to the queue. A request identical to one
+        still being fetched for the guild (a double-sent command, repeated AI suggestions)
+        is coalesced into it rather than extracted and queued a second time.
+        """
+        fetch_key = (ctx.guild.id, canonicalize(query, noplaylist=not process_playlist) or query.strip(), process_playlist)
+        if fetch_key in self.pending_fetches:
+            metrics.COALESCED_REQUESTS_TOTAL.labels(kind='enqueue').inc()
+            logger.info("Coalesced duplicate request for %s in guild %s.", query, ctx.guild.id)
+            await ctx.send(embed=self.create_embed("Already Fetching", f"{config.QUEUE_EMOJI} `{query}` is already being added to the queue."))
+            return
+        self.pending_fetches.add(fetch_key)
+        try:
+            await self._fetch_query(ctx, query, process_playlist=process_playlist, voice_ready=voice_ready)
+        finally:
+            self.pending_fetches.discard(fetch_key)
+
+    async def _fetch_query(self, ctx, query: str, *, process_playlist: bool, voice_ready=None):
         queue = await self.get_queue(ctx.guild.id)
         
         try:
@@ -93,9 +278,6 @@ class Music(commands.Cog):
             else:
                 url = query
 
-            if 'start_radio=' in url:
-                url = url.split('&start_radio=')[0]
-                
             if process_playlist:
                 # --- Step 1: Fetch and play the first song immediately ---
                 first_song_ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
@@ -104,23 +286,27 @@ class Music(commands.Cog):
                 if 'list=' in url or 'playlist' in url:
                     first_song_ytdl_opts['playlist_items'] = '1'
 
-                logging.info(f"Fetching first song from playlist: {url}")
-                first_song_result = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True, ytdl_opts=first_song_ytdl_opts)
+                logger.info("Fetching first song from playlist: %s", url)
+                extract_started = time.perf_counter()
+                first_song_result = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True, ytdl_opts=first_song_ytdl_opts, guild_id=ctx.guild.id)
+                self._mark_ttfa_phase(ctx.guild.id, 'extract', time.perf_counter() - extract_started)
 
                 if not first_song_result or not isinstance(first_song_result, dict) or 'data' not in first_song_result or 'stream' not in first_song_result:
                     await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not fetch the first song from the playlist. Please check the URL.", discord.Color.red()))
                     return
 
                 first_song_info = first_song_result
+                if not await self._voice_ready(ctx, voice_ready):
+                    return
                 await queue.put(first_song_info)
                 await ctx.send(embed=self.create_embed("Song Added", f"{config.QUEUE_EMOJI} Added `{first_song_info['data'].get('title', 'Unknown Title')}` to the queue."))
 
                 # Start playback if needed (for the first song)
                 if ctx.voice_client and not ctx.voice_client.is_playing() and not queue.empty():
-                    logging.info("Voice client is not playing and queue is not empty. Calling play_next for the first song.")
+                    logger.info("Voice client is not playing and queue is not empty. Calling play_next for the first song.")
                     await self.play_next(ctx)
                 else:
-                    logging.info("Voice client is already playing or queue is empty (after first song).")
+                    logger.info("Voice client is already playing or queue is empty (after first song).")
 
                 # --- Step 2: Fetch the rest of the playlist in the background ---
                 asyncio.create_task(self._fetch_and_queue_rest_of_playlist(ctx, url, queue))
@@ -129,10 +315,12 @@ class Music(commands.Cog):
                 ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
                 ytdl_opts['noplaylist'] = True
                 
-                logging.info(f"Processing URL: {url} (Process Playlist: {process_playlist})")
-                logging.info("Calling YTDLSource.from_url...")
-                result = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True, ytdl_opts=ytdl_opts)
-                logging.info(f"YTDLSource.from_url returned. Fetched {len(result) if isinstance(result, list) else 1} song(s).")
+                logger.info("Processing URL: %s (Process Playlist: %s)", url, process_playlist)
+                logger.info("Calling YTDLSource.from_url...")
+                extract_started = time.perf_counter()
+                result = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True, ytdl_opts=ytdl_opts, guild_id=ctx.guild.id)
+                self._mark_ttfa_phase(ctx.guild.id, 'extract', time.perf_counter() - extract_started)
+                logger.info("YTDLSource.from_url returned. Fetched %s song(s).", len(result) if isinstance(result, list) else 1)
 
                 if not result:
                     await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not fetch any songs. Please check the URL or search query.", discord.Color.red()))
@@ -142,12 +330,14 @@ class Music(commands.Cog):
                 playable_songs = [item for item in songs_to_queue if item and 'data' in item and item['data'].get('url')]
                 unplayable_songs = [item for item in songs_to_queue if not (item and 'data' in item and item['data'].get('url'))]
 
-                logging.info(f"Found {len(playable_songs)} playable and {len(unplayable_songs)} unplayable songs.")
+                logger.info("Found %s playable and %s unplayable songs.", len(playable_songs), len(unplayable_songs))
 
                 if not playable_songs:
                     await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No playable songs found.", discord.Color.red()))
                     return
 
+                if not await self._voice_ready(ctx, voice_ready):
+                    return
                 for song_info in playable_songs:
                     await queue.put(song_info)
 
@@ -163,139 +353,202 @@ class Music(commands.Cog):
 
                 # Start playback if needed (for single song)
                 if ctx.voice_client and not ctx.voice_client.is_playing() and not queue.empty():
-                    logging.info("Voice client is not playing and queue is not empty. Calling play_next.")
+                    logger.info("Voice client is not playing and queue is not empty. Calling play_next.")
                     await self.play_next(ctx)
                 else:
-                    logging.info("Voice client is already playing or queue is empty.")
+                    logger.info("Voice client is already playing or queue is empty.")
 
         except Exception as e:
-            logging.error(f"Error in _fetch_and_queue: {e}", exc_info=True)
+            logger.error("Error in _fetch_and_queue: %s", e, exc_info=True)
             await ctx.send(embed=self.create_embed("Error", f"An unexpected error occurred: {e}", discord.Color.red()))
 
     async def _fetch_and_queue_rest_of_playlist(self, ctx, url: str, queue: asyncio.Queue):
-        logging.info(f"Fetching rest of playlist in background: {url}")
+        """
+        Lists the playlist, then resolves the rest of its entries PLAYLIST_BATCH_SIZE at a
+        time and queues them in order. The first batch plays next, so it is extracted as
+        prefetch work; later batches are background work, which other guilds' requests
+        overtake between batches. Stops once the session it started in is reclaimed (the
+        bot left).
+        """
+        guild_id = ctx.guild.id
+        session = self.sessions.get(guild_id)
+        logger.info("Fetching rest of playlist in background: %s", url)
         try:
-            full_playlist_ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
-            full_playlist_ytdl_opts['noplaylist'] = False # Get the full playlist
-            full_playlist_ytdl_opts['lazy_playlist'] = True # Keep lazy loading for efficiency
+            listing_ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+            listing_ytdl_opts['noplaylist'] = False # Get the full playlist
+            listing_ytdl_opts['extract_flat'] = 'in_playlist' # Titles and IDs only; entries are resolved in batches below
 
-            full_playlist_result = await YTDLSource.from_url(url, loop=self.bot.loop, stream=True, ytdl_opts=full_playlist_ytdl_opts)
+            listing = await YTDLSource.from_url(url, loop=self.bot.loop, ytdl_opts=listing_ytdl_opts, priority='background', guild_id=guild_id)
 
-            if not full_playlist_result or not isinstance(full_playlist_result, list):
-                logging.warning(f"Could not fetch full playlist in background: {url}")
+            if not listing or not isinstance(listing, list):
+                logger.warning("Could not fetch full playlist in background: %s", url)
                 return
 
+            entry_ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+            entry_ytdl_opts['noplaylist'] = True
+
+            async def resolve(entry, priority):
+                try:
+                    result = await YTDLSource.from_url(entry.get('url') or entry.get('webpage_url'), loop=self.bot.loop, stream=True,
+                                                       ytdl_opts=entry_ytdl_opts, priority=priority, guild_id=guild_id)
+                except Exception as e:
+                    logger.warning("Could not resolve playlist entry %s: %s", entry.get('title') or entry.get('url'), e)
+                    return None
+                return result if isinstance(result, dict) and result['data'].get('url') else None
+
             # Skip the first song as it's already handled
-            remaining_songs = full_playlist_result[1:]
-            
-            playable_remaining_songs = [item for item in remaining_songs if item and 'data' in item and item['data'].get('url')]
-            unplayable_remaining_songs = [item for item in remaining_songs if not (item and 'data' in item and item['data'].get('url'))]
+            remaining_entries = [item['data'] for item in listing[1:] if item and item.get('data')]
+            added = 0
+            unplayable_titles = []
+            for start in range(0, len(remaining_entries), config.PLAYLIST_BATCH_SIZE):
+                if self.sessions.get(guild_id) is not session:
+                    logger.info("Stopped loading playlist %s: guild %s's session was reclaimed.", url, guild_id)
+                    return
+                batch = remaining_entries[start:start + config.PLAYLIST_BATCH_SIZE]
+                results = await asyncio.gather(*(resolve(entry, 'prefetch' if start == 0 else 'background') for entry in batch))
+                if self.sessions.get(guild_id) is not session:
+                    logger.info("Stopped loading playlist %s: guild %s's session was reclaimed.", url, guild_id)
+                    return
+                for entry, song_info in zip(batch, results):
+                    if song_info:
+                        await queue.put(song_info)
+                        added += 1
+                    else:
+                        unplayable_titles.append(entry.get('title', 'Unknown Title'))
 
-            for song_info in playable_remaining_songs:
-                await queue.put(song_info)
-            
-            logging.info(f"Added {len(playable_remaining_songs)} remaining songs to queue from playlist {url}.")
+            logger.info("Added %s remaining songs to queue from playlist %s.", added, url)
 
-            if unplayable_remaining_songs:
-                unplayable_titles = [item.get('data', {}).get('title', 'Unknown Title') for item in unplayable_remaining_songs]
-                await ctx.send(embed=self.create_embed("Unplayable Songs (Playlist)", f"{config.ERROR_EMOJI} Skipped {len(unplayable_remaining_songs)} unplayable songs from playlist:\n- " + "\n- ".join(unplayable_titles), discord.Color.orange()))
+            if unplayable_titles:
+                await ctx.send(embed=self.create_embed("Unplayable Songs (Playlist)", f"{config.ERROR_EMOJI} Skipped {len(unplayable_titles)} unplayable songs from playlist:\n- " + "\n- ".join(unplayable_titles), discord.Color.orange()))
 
             await ctx.send(embed=self.create_embed("Playlist Loaded", f"{config.SUCCESS_EMOJI} The rest of the playlist has been added to the queue."))
 
         except Exception as e:
-            logging.error(f"Error fetching rest of playlist in background: {e}", exc_info=True)
+            logger.error("Error fetching rest of playlist in background: %s", e, exc_info=True)
             await ctx.send(embed=self.create_embed("Error", f"An error occurred while loading the rest of the playlist: {e}", discord.Color.red()))
 
     @commands.command(name="join")
     async def join(self, ctx):
-        logging.info(f"Join command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Join command invoked by %s in %s", ctx.author, ctx.guild.name)
         voice_client = await self._ensure_voice_connection(ctx)
         if voice_client:
             await ctx.send(embed=self.create_embed("Joined Channel", f"{config.SUCCESS_EMOJI} Joined `{voice_client.channel}`"))
 
     @commands.command(name="leave")
     async def leave(self, ctx):
-        logging.info(f"Leave command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Leave command invoked by %s in %s", ctx.author, ctx.guild.name)
         if ctx.voice_client:
+            self.intentional_disconnects[ctx.guild.id] = True
             await ctx.voice_client.disconnect()
-            logging.info(f"Bot disconnected from voice channel in {ctx.guild.name}")
-            
-            # Cancel nowplaying update task
-            if ctx.guild.id in self.nowplaying_tasks and self.nowplaying_tasks[ctx.guild.id] and not self.nowplaying_tasks[ctx.guild.id].done():
-                self.nowplaying_tasks[ctx.guild.id].cancel()
-                del self.nowplaying_tasks[ctx.guild.id]
+            logger.info("Bot disconnected from voice channel in %s", ctx.guild.name)
 
-            # Clear the yt-dlp cache
-            if os.path.exists("yt_dlp_cache"):
-                shutil.rmtree("yt_dlp_cache")
-                os.makedirs("yt_dlp_cache")
-                logging.info("Cleared the yt-dlp cache.")
+            self._disable_autoplay(ctx.guild.id)
+            self._end_session(ctx.guild.id, 'leave')
 
             await ctx.send(embed=self.create_embed("Left Channel", f"{config.SUCCESS_EMOJI} Successfully disconnected from the voice channel."))
         else:
-            logging.warning(f"Leave command invoked but bot not in a voice channel in {ctx.guild.name}")
+            logger.warning("Leave command invoked but bot not in a voice channel in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} I am not currently in a voice channel.", discord.Color.red()))
 
     @commands.command(name="search")
     async def search(self, ctx, *, query):
-        logging.info(f"Search command invoked by {ctx.author} in {ctx.guild.name} with query: {query}")
+        logger.info("Search command invoked by %s in %s with query: %s", ctx.author, ctx.guild.name, query)
         if not config.YOUTUBE_API_KEY:
-            logging.error("YouTube API key is not set.")
+            logger.error("YouTube API key is not set.")
             return await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} YouTube API key is not set.", discord.Color.red()))
         try:
             youtube_service = get_youtube_service(config.YOUTUBE_API_KEY)
             search_response = youtube_service.search().list(q=query, part="snippet", maxResults=10, type="video").execute()
             
             if not search_response:
-                logging.warning(f"YouTube API returned empty response for query: {query}")
+                logger.warning("YouTube API returned empty response for query: %s", query)
                 return await ctx.send(embed=self.create_embed("Search Error", "The YouTube API returned an empty response. Please check your API key.", discord.Color.red()))
 
             videos = [(item["snippet"]["title"], item["id"]["videoId"]) for item in search_response.get("items", [])]
             if not videos:
-                logging.info(f"No videos found for query: {query}")
+                logger.info("No videos found for query: %s", query)
                 return await ctx.send(embed=self.create_embed("No Results", f"{config.ERROR_EMOJI} No songs found for your query.", discord.Color.orange()))
             self.search_results[ctx.guild.id] = videos
             response = "\n".join(f"**{i+1}.** {title}" for i, (title, _) in enumerate(videos))
-            logging.info(f"Found {len(videos)} search results for query: {query}")
+            logger.info("Found %s search results for query: %s", len(videos), query)
             await ctx.send(embed=self.create_embed("Search Results", response))
         except Exception as e:
-            logging.error(f"Error in search command for query '{query}': {e}")
+            logger.error("Error in search command for query '%s': %s", query, e)
             await ctx.send(embed=self.create_embed("Search Error", f"An error occurred: {e}", discord.Color.red()))
 
     @commands.command(name="play")
     async def play(self, ctx, *, query):
-        logging.info(f"--- Play command initiated by {ctx.author} ---")
-        await ctx.send(embed=self.create_embed("Processing", f"{config.QUEUE_EMOJI} Fetching your request..."))
-        
-        voice_client = await self._ensure_voice_connection(ctx)
-        if not voice_client:
-            return
-
-        await self._fetch_and_queue(ctx, query, process_playlist=False)
+        logger.info("--- Play command initiated by %s ---", ctx.author)
+        await self._play_pipelined(ctx, query, process_playlist=False, notice=self.create_embed("Processing", f"{config.QUEUE_EMOJI} Fetching your request..."))
 
     @commands.command(name="playlist")
     async def playlist(self, ctx, *, query):
-        logging.info(f"--- Playlist command initiated by {ctx.author} ---")
-        await ctx.send(embed=self.create_embed("Processing", f"{config.QUEUE_EMOJI} Fetching your playlist..."))
-        
-        voice_client = await self._ensure_voice_connection(ctx)
-        if not voice_client:
+        logger.info("--- Playlist command initiated by %s ---", ctx.author)
+        await self._play_pipelined(ctx, query, process_playlist=True, notice=self.create_embed("Processing", f"{config.QUEUE_EMOJI} Fetching your playlist..."))
+
+    async def _play_pipelined(self, ctx, query, *, process_playlist, notice):
+        """
+        Sends the "Processing" notice, performs the voice handshake and extracts the query
+        concurrently instead of one after another; only queueing waits for the first two.
+        """
+        if not ctx.author.voice or not ctx.author.voice.channel:
+            await self._ensure_voice_connection(ctx)  # Tells the user to join a channel first
             return
+        self._mark_play_requested(ctx)
+        ready = asyncio.gather(ctx.send(embed=notice), self._timed_voice_connection(ctx))
+        try:
+            await self._fetch_and_queue(ctx, query, process_playlist=process_playlist, voice_ready=ready)
+        finally:
+            # A failed or coalesced fetch never awaited the handshake; let it settle
+            await asyncio.gather(ready, return_exceptions=True)
+
+    async def _voice_ready(self, ctx, voice_ready):
+        """
+        Waits for the notice and voice handshake _play_pipelined started alongside the
+        extraction. Returns False if the bot is not in the author's channel, in which case
+        the fetched songs are dropped rather than queued for a guild with no voice client.
+        """
+        if voice_ready is None:
+            return True
+        try:
+            _, voice_client = await voice_ready
+        except Exception as e:
+            logger.error("Voice handshake failed in guild %s; dropping the fetched songs: %s", ctx.guild.id, e, exc_info=True)
+            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not join your voice channel: {e}", discord.Color.red()))
+            return False
+        if not voice_client:
+            # _ensure_voice_connection already told the user why
+            logger.info("No voice client in guild %s; dropping the fetched songs.", ctx.guild.id)
+            return False
+        return True
 
-        await self._fetch_and_queue(ctx, query, process_playlist=True)
+    async def _timed_voice_connection(self, ctx):
+        started = time.perf_counter()
+        voice_client = await self._ensure_voice_connection(ctx)
+        self._mark_ttfa_phase(ctx.guild.id, 'voice_connect', time.perf_counter() - started)
+        return voice_client
 
     async def play_next(self, ctx):
-        logging.info("play_next called.")
+        async with self._guild_lock(ctx.guild.id):
+            await self._play_next(ctx)
+
+    async def _play_next(self, ctx):
+        logger.info("play_next called.")
         if not ctx.voice_client or not ctx.voice_client.is_connected():
-            logging.error(f"play_next cannot execute because voice client is not connected in guild {ctx.guild.id}.")
+            if ctx.guild.id in self.reconnect_tasks:
+                logger.info("play_next deferred in guild %s until the voice connection is back.", ctx.guild.id)
+                return
+            logger.error("play_next cannot execute because voice client is not connected in guild %s.", ctx.guild.id)
             await ctx.send(embed=self.create_embed("Playback Error", "I am no longer connected to the voice channel.", discord.Color.red()))
             return
 
         if ctx.voice_client.is_playing():
-            logging.warning("play_next called but audio is already playing.")
+            metrics.COALESCED_REQUESTS_TOTAL.labels(kind='play_next').inc()
+            logger.warning("play_next called but audio is already playing.")
             return
             
         queue = await self.get_queue(ctx.guild.id)
+        self._autoplay_top_up(ctx.guild.id, queue)
         if not queue.empty() and ctx.voice_client:
             # Get the dictionary containing data and stream flag
             # Get the dictionary containing data and stream flag
@@ -310,87 +563,289 @@ class Music(commands.Cog):
             # Get the dictionary containing data and stream flag
             # Get the dictionary containing data and stream flag
             song_info = await queue.get()
-            data = song_info['data']
+            data = self._tune_stream(ctx.guild.id, song_info['data'])
             stream = song_info['stream']
 
             try:
-                logging.info(f"Attempting to play {data.get('title')}")
-
-                # Dynamically create FFMPEG options with atempo filter
-                player_options = FFMPEG_OPTIONS.copy()
-                current_speed = self.playback_speed.get(ctx.guild.id, 1.0)
-                if current_speed != 1.0:
-                    # Ensure 'options' key exists
-                    if 'options' not in player_options:
-                        player_options['options'] = ''
-                    # Add atempo filter, ensuring it's space-separated if other options exist
-                    player_options['options'] += f' -filter:a "atempo={current_speed}"'
-
-
-                # Create the appropriate audio source based on the stream flag
-                if stream:
-                    # Use FFmpegOpusAudio for streaming
-                    player = discord.FFmpegOpusAudio(data['url'], **player_options)
-                else:
-                    # Use FFmpegPCMAudio for non-streaming (fallback)
-                    player = discord.FFmpegPCMAudio(data['url'], **player_options)
-
-                # Apply volume
-                player.volume = self.current_volume.get(ctx.guild.id, 0.5) # Default volume 0.5
-
-                ctx.voice_client.play(player, after=lambda e: self.bot.loop.create_task(self._after_playback(ctx, e)))
-
-                self.current_song[ctx.guild.id] = data # Store the original data
-                self.song_start_time[ctx.guild.id] = time.time()
-                logging.debug(f"play_next: Song start time set to {self.song_start_time[ctx.guild.id]} for guild {ctx.guild.id}")
+                logger.info("Attempting to play %s", data.get('title'))
+
+                player = self._take_standby(ctx.guild.id, song_info) or await self._create_source(ctx.guild.id, data, stream)
+                if ctx.guild.id in self.play_requested_at:
+                    player.on_first_frame = functools.partial(self.bot.loop.call_soon_threadsafe, self._record_first_audio, ctx.guild.id, player)
+                ctx.voice_client.play(player, after=self._after_callback(ctx))
+                self._record_playback_started(ctx.guild.id)
+                self.player_contexts[ctx.guild.id] = ctx
+
+                self.current_song[ctx.guild.id] = data # Store the original data, with the stream picked for this channel
+                self.voice_channels[ctx.guild.id] = ctx.voice_client.channel
+                self.tracked_sources[ctx.guild.id] = player
+                self.failover_attempts.pop(ctx.guild.id, None)
                 await self.bot.change_presence(activity=discord.Activity(type=discord.ActivityType.listening, name=data.get('title')))
-                logging.info(f"Playing {data.get('title')} in {ctx.guild.name}")
+                logger.info("Playing %s in %s", data.get('title'), ctx.guild.name)
+                self.bot.dispatch('track_start', ctx.guild.id, data)
+                if self.autoplay_enabled.get(ctx.guild.id):
+                    self.autoplay_pools[ctx.guild.id].mark_seen(data.get('id'))
+                    self._schedule_autoplay_refill(ctx.guild.id)
 
                 if ctx.guild.id not in self.nowplaying_tasks or self.nowplaying_tasks[ctx.guild.id].done():
                     self.nowplaying_tasks[ctx.guild.id] = self.bot.loop.create_task(self._update_nowplaying_message(ctx.guild.id, ctx.channel.id))
+                if config.FFMPEG_STANDBY_LEAD > 0:
+                    if ctx.guild.id in self.standby_tasks:
+                        self.standby_tasks[ctx.guild.id].cancel()
+                    self.standby_tasks[ctx.guild.id] = self.bot.loop.create_task(self._prime_standby(ctx.guild.id))
             except Exception as e:
-                logging.error(f"Error playing next song: {e}", exc_info=True)
+                logger.error("Error playing next song: %s", e, exc_info=True)
                 await ctx.send(embed=self.create_embed("Error", f"Could not play the next song: {e}", discord.Color.red()))
         else:
-            logging.info("Queue is empty, stopping playback.")
+            logger.info("Queue is empty, stopping playback.")
             await self.bot.change_presence(activity=None)
             self._start_inactivity_timer(ctx.guild.id)
 
+    async def _create_source(self, guild_id, data, stream=True, position=0.0, wait=True):
+        """
+        Builds the FFmpeg audio source for a resolved track, applying the guild's speed
+        and, when position is set, an input-side seek so FFmpeg starts there directly.
+        yt-dlp's format info tells FFmpeg the container up front. Audio is encoded at the
+        bitrate and complexity matched to the voice channel, and Opus streams close to that
+        bitrate played at normal speed are passed through without re-encoding.
+        FFmpeg is started through the process manager, so this waits for a free slot (or
+        returns None at once with wait=False). The source is wrapped in TrackedAudio so its
+        frames drive the playback position and its cleanup frees the slot.
+        """
+        player_options = FFMPEG_OPTIONS.copy()
+        if not data['url'].startswith(('http://', 'https://')):
+            player_options['before_options'] = ''  # The reconnect flags only apply to HTTP inputs
+        input_options = ffmpeg_input_options(data)
+        if input_options:
+            player_options['before_options'] = f"{input_options} {player_options['before_options']}".strip()
+        current_speed = self.playback_speed.get(guild_id, 1.0)
+        if current_speed != 1.0:
+            # Add atempo filter, ensuring it's space-separated if other options exist
+            player_options['options'] = player_options.get('options', '') + f' -filter:a "atempo={current_speed}"'
+        if position > 0:
+            player_options['before_options'] = f"-ss {position:.3f} " + player_options.get('before_options', '')
+
+        # Use FFmpegOpusAudio for streaming, FFmpegPCMAudio for non-streaming (fallback)
+        bitrate, complexity = opus_encoder_settings(self._channel_bitrate(guild_id))
+        if stream:
+            codec = 'opus' if current_speed == 1.0 and opus_copyable(data, bitrate) else None  # 'opus' makes discord.py copy the stream
+            if not codec:
+                player_options['options'] = f"{player_options.get('options', '')} -compression_level {complexity}"
+            factory = functools.partial(discord.FFmpegOpusAudio, data['url'], codec=codec, bitrate=bitrate, **player_options)
+            encoding = 'copy' if codec else f"{bitrate}k/c{complexity}"
+        else:
+            factory = functools.partial(discord.FFmpegPCMAudio, data['url'], **player_options)
+            encoding = 'pcm'  # discord.py encodes PCM itself, in the player thread
+        player = await self.ffmpeg.spawn(factory, guild_id=guild_id, wait=wait, encoding=encoding)
+        if player is None:
+            return None
+        player.volume = self.current_volume.get(guild_id, 0.5) # Default volume 0.5
+        source = TrackedAudio(player, start=position, speed=current_speed)
+        source.bitrate = bitrate
+        source.on_cleanup = functools.partial(self.ffmpeg.release, player)
+        return source
+
+    def _channel_bitrate(self, guild_id):
+        """
+        The bitrate (bits per second) of the voice channel the bot is in, or None if it isn't in one.
+        """
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        return getattr(voice_client.channel, 'bitrate', None) if voice_client else None
+
+    def _tune_stream(self, guild_id, data):
+        """
+        Returns data with the stream fields of the yt-dlp format that best fits the guild's
+        voice channel (see pick_audio_format), or data itself if it already has that one.
+        """
+        bitrate, _ = opus_encoder_settings(self._channel_bitrate(guild_id))
+        fmt = pick_audio_format(data, bitrate, copy=self.playback_speed.get(guild_id, 1.0) == 1.0)
+        if not fmt or fmt['url'] == data.get('url'):
+            return data
+        return {**data, **{field: fmt.get(field) for field in STREAM_FIELDS}}
+
+    async def _retune(self, ctx):
+        """
+        After the bot moves to a channel with a different bitrate, restarts the current
+        track at its position with the stream and encoding picked for the new channel.
+        """
+        guild_id = ctx.guild.id
+        source = self.tracked_sources.get(guild_id)
+        data = self.current_song.get(guild_id)
+        bitrate, _ = opus_encoder_settings(self._channel_bitrate(guild_id))
+        if not source or not data or source.bitrate == bitrate:
+            return
+        self._discard_standby(guild_id)  # Encoded for the old channel
+        try:
+            await self._restart_at(ctx, source.position, data=self._tune_stream(guild_id, data))
+        except RuntimeError:
+            return  # Nothing is playing any more
+        logger.info("Re-tuned %s for a %s kbps channel in guild %s.", data.get('title'), bitrate, guild_id)
+
+    def _ffmpeg_source_live(self, source):
+        """
+        Whether an FFmpeg source is still wanted: playing (or paused) in a guild, or on standby.
+        """
+        return any(tracked.source is source for tracked in self.tracked_sources.values()) or \
+            any(standby.source is source for _, _, standby in self.standby_sources.values())
+
+    async def _prime_standby(self, guild_id):
+        """
+        Starts FFmpeg for the song at the head of the queue once the current track is within
+        FFMPEG_STANDBY_LEAD seconds of its end, so the next track skips process startup and
+        stream probing. Nothing is started when no FFmpeg slot is free.
+        """
+        data = self.current_song.get(guild_id)
+        while True:
+            source = self.tracked_sources.get(guild_id)
+            if self.current_song.get(guild_id) is not data or not source or source.ended or not data.get('duration'):
+                return
+            remaining = (data['duration'] - source.position) / source.speed
+            if remaining <= config.FFMPEG_STANDBY_LEAD:
+                break
+            await asyncio.sleep(min(remaining - config.FFMPEG_STANDBY_LEAD, 5))  # Re-check: pauses and seeks move the end
+
+        queue = await self.get_queue(guild_id)
+        self._autoplay_top_up(guild_id, queue)
+        if queue.empty():
+            return
+        song_info = queue._queue[0]
+        speed = self.playback_speed.get(guild_id, 1.0)
+        standby = self.standby_sources.get(guild_id)
+        if standby and standby[0] is song_info and standby[1] == speed:
+            return
+        self._discard_standby(guild_id)
+        source = await self._create_source(guild_id, self._tune_stream(guild_id, song_info['data']), song_info['stream'], wait=False)
+        if source:
+            self.standby_sources[guild_id] = (song_info, speed, source)
+            logger.info("Started FFmpeg ahead for %s in guild %s.", song_info['data'].get('title'), guild_id)
+
+    def _take_standby(self, guild_id, song_info):
+        """
+        Returns the pre-started source for song_info, if the standby matches it and the current speed.
+        """
+        standby = self.standby_sources.get(guild_id)
+        if standby and standby[0] is song_info and standby[1] == self.playback_speed.get(guild_id, 1.0):
+            del self.standby_sources[guild_id]
+            metrics.FFMPEG_STANDBY_TOTAL.labels(outcome='used').inc()
+            return standby[2]
+        self._discard_standby(guild_id)
+        return None
+
+    def _discard_standby(self, guild_id):
+        standby = self.standby_sources.pop(guild_id, None)
+        if standby:
+            metrics.FFMPEG_STANDBY_TOTAL.labels(outcome='discarded').inc()
+            self.bot.loop.create_task(asyncio.to_thread(standby[2].cleanup))
+
+    def current_position(self, guild_id):
+        """
+        Returns the position in the current track in seconds, or 0 if nothing is playing.
+        """
+        source = self.tracked_sources.get(guild_id)
+        return source.position if source else 0.0
+
+    async def _restart_at(self, ctx, position, data=None):
+        """
+        Resumes the current track at position (seconds) by restarting only FFmpeg against
+        the already resolved stream URL, or against data's stream if given. The voice
+        client's player keeps running and just switches sources, so the after-playback
+        callback does not fire.
+        """
+        guild_id = ctx.guild.id
+        async with self._guild_lock(guild_id):
+            data = data or self.current_song.get(guild_id)
+            voice_client = ctx.voice_client
+            if not data or not voice_client or not (voice_client.is_playing() or voice_client.is_paused()):
+                raise RuntimeError("Nothing is playing.")
+            duration = data.get('duration') or 0
+            position = max(0.0, min(position, duration - 1 if duration else position))
+
+            was_paused = voice_client.is_paused()
+            old_source = voice_client.source
+            new_source = await self._create_source(guild_id, data, position=position)
+            voice_client.source = new_source
+            if was_paused:
+                voice_client.pause()  # Swapping the source resumes the player
+            self.tracked_sources[guild_id] = new_source
+            self.current_song[guild_id] = data
+        self.bot.loop.create_task(self._retire_source(old_source))
+        logger.info("Restarted %s at %s in guild %s", data.get('title'), format_timestamp(position), guild_id)
+        return position
+
+    async def _retire_source(self, source):
+        # The player thread may still be inside a read() on the old source; give it a moment
+        # before killing its FFmpeg process so that read doesn't end the track early
+        await asyncio.sleep(0.5)
+        await asyncio.to_thread(source.cleanup)
+
+    def _mark_play_requested(self, ctx):
+        # Only requests that will start playback count towards time-to-first-audio
+        if not ctx.voice_client or not (ctx.voice_client.is_playing() or ctx.voice_client.is_paused()):
+            self.play_requested_at[ctx.guild.id] = time.perf_counter()
+            self.ttfa_phases[ctx.guild.id] = {}
+
+    def _mark_ttfa_phase(self, guild_id, phase, seconds):
+        if guild_id in self.play_requested_at:
+            self.ttfa_phases.setdefault(guild_id, {})[phase] = seconds
+
+    def _record_first_audio(self, guild_id, source):
+        """
+        Records time-to-first-audio and its breakdown once a requested track's first frame
+        has been sent. Runs on the event loop, scheduled from the player thread.
+        """
+        requested_at = self.play_requested_at.pop(guild_id, None)
+        phases = self.ttfa_phases.pop(guild_id, {})
+        if requested_at is None:
+            return
+        phases['ffmpeg_start'] = source.first_frame_at - source.created_at
+        total = source.first_frame_at - requested_at
+        metrics.TIME_TO_FIRST_AUDIO_SECONDS.observe(total)
+        for phase, seconds in phases.items():
+            metrics.TTFA_PHASE_SECONDS.labels(phase=phase).observe(seconds)
+        logger.info("Time to first audio in guild %s: %.0f ms (%s)", guild_id, total * 1000, ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in phases.items()))
+
+    def _record_playback_started(self, guild_id):
+        now = time.perf_counter()
+        ended_at = self.track_ended_at.pop(guild_id, None)
+        if ended_at is not None:
+            metrics.TRACK_TRANSITION_SECONDS.observe(now - ended_at)
+
     async def _update_nowplaying_message(self, guild_id, channel_id):
-        logging.info(f"_update_nowplaying_message: Starting task for guild {guild_id}")
+        logger.info("_update_nowplaying_message: Starting task for guild %s", guild_id)
         while True:
             try:
                 guild = self.bot.get_guild(guild_id)
                 if not guild or not guild.voice_client:
-                    logging.warning(f"_update_nowplaying_message: Bot not in a voice channel for guild {guild_id}. Cancelling task.")
+                    logger.warning("_update_nowplaying_message: Bot not in a voice channel for guild %s. Cancelling task.", guild_id)
                     break
 
                 channel = self.bot.get_channel(channel_id)
                 if not channel:
-                    logging.warning(f"_update_nowplaying_message: Channel ({channel_id}) not found. Cancelling task.")
+                    logger.warning("_update_nowplaying_message: Channel (%s) not found. Cancelling task.", channel_id)
                     break
                 
                 await self._update_nowplaying_display(guild_id, channel.id, silent_update=True)
-                logging.debug(f"_update_nowplaying_message: Message updated for guild {guild_id}. Stored Message ID: {self.nowplaying_message.get(guild_id).id if self.nowplaying_message.get(guild_id) else 'None'}")
-                await asyncio.sleep(30)  # Update every 30 seconds
+                logger.debug("_update_nowplaying_message: Message updated for guild %s. Stored Message ID: %s", guild_id, self.nowplaying_message.get(guild_id).id if self.nowplaying_message.get(guild_id) else 'None')
+                await self.timers.sleep(30)  # Update every 30 seconds
             except asyncio.CancelledError:
-                logging.info(f"_update_nowplaying_message: Task cancelled for {guild_id}")
+                logger.info("_update_nowplaying_message: Task cancelled for %s", guild_id)
                 break
             except Exception as e:
-                logging.error(f"_update_nowplaying_message: Error updating message for guild {guild_id}: {e}", exc_info=True)
-                await asyncio.sleep(5) # Wait before retrying
+                logger.error("_update_nowplaying_message: Error updating message for guild %s: %s", guild_id, e, exc_info=True)
+                await self.timers.sleep(5) # Wait before retrying
 
     async def _update_nowplaying_display(self, guild_id, channel_id, silent_update=False):
-        logging.debug(f"_update_nowplaying_display: Called for guild {guild_id}, channel {channel_id}. Silent: {silent_update}.")
+        logger.debug("_update_nowplaying_display: Called for guild %s, channel %s. Silent: %s.", guild_id, channel_id, silent_update)
         guild = self.bot.get_guild(guild_id)
         channel = self.bot.get_channel(channel_id)
 
         if not guild or not channel:
-            logging.warning(f"nowplaying_display: Guild ({guild_id}) or channel ({channel_id}) not found. Aborting update.")
+            logger.warning("nowplaying_display: Guild (%s) or channel (%s) not found. Aborting update.", guild_id, channel_id)
             return
 
         current_nowplaying_message = self.nowplaying_message.get(guild_id)
-        logging.debug(f"_update_nowplaying_display: Stored message object: {current_nowplaying_message.id if current_nowplaying_message else 'None'}")
+        logger.debug("_update_nowplaying_display: Stored message object: %s", current_nowplaying_message.id if current_nowplaying_message else 'None')
 
         if guild_id in self.current_song and self.current_song[guild_id]:
             # data is now the raw dictionary from yt-dlp
@@ -412,9 +867,9 @@ class Music(commands.Cog):
             data = self.current_song[guild_id]
             queue = await self.get_queue(guild_id)
             
-            current_time = int(time.time() - self.song_start_time[guild_id])
+            current_time = int(self.current_position(guild_id))
             duration = data.get('duration', 0)
-            logging.debug(f"NowPlaying Update: Guild {guild_id}, Current Time: {current_time}, Duration: {duration}")
+            logger.debug("NowPlaying Update: Guild %s, Current Time: %s, Duration: %s", guild_id, current_time, duration)
             progress_bar = self._get_progress_bar(current_time, duration)
             
             queue_list = list(queue._queue)
@@ -439,65 +894,228 @@ class Music(commands.Cog):
                 try:
                     # Attempt to fetch the message to ensure it still exists and is valid
                     fetched_message = await channel.fetch_message(current_nowplaying_message.id)
-                    logging.debug(f"nowplaying_display: Fetched message {fetched_message.id} for editing.")
+                    logger.debug("nowplaying_display: Fetched message %s for editing.", fetched_message.id)
                     # Access title from the dictionary for logging
                     await fetched_message.edit(embed=embed, view=view)
                     self.nowplaying_message[guild_id] = fetched_message # Update reference in case it changed
-                    logging.info(f"nowplaying_display: Edited message {fetched_message.id} for {data.get('title', 'Unknown Title')} in {guild.name}")
+                    logger.debug("nowplaying_display: Edited message %s for %s in %s", fetched_message.id, data.get('title', 'Unknown Title'), guild.name)
                 except discord.NotFound:
-                    logging.warning(f"nowplaying_display: Previous message {current_nowplaying_message.id} not found for editing in {guild.name}. Sending new message.")
+                    logger.warning("nowplaying_display: Previous message %s not found for editing in %s. Sending new message.", current_nowplaying_message.id, guild.name)
                     self.nowplaying_message[guild_id] = await channel.send(embed=embed, view=view)
                     # Access title from the dictionary for logging
-                    logging.info(f"nowplaying_display: Sent new message {self.nowplaying_message[guild_id].id} for {data.get('title', 'Unknown Title')} in {guild.name}")
+                    logger.info("nowplaying_display: Sent new message %s for %s in %s", self.nowplaying_message[guild_id].id, data.get('title', 'Unknown Title'), guild.name)
                 except Exception as e:
                     # Access title from the dictionary for logging
-                    logging.error(f"nowplaying_display: Error editing message {current_nowplaying_message.id} for {data.get('title', 'Unknown Title')} in {guild.name}: {e}", exc_info=True)
+                    logger.error("nowplaying_display: Error editing message %s for %s in %s: %s", current_nowplaying_message.id, data.get('title', 'Unknown Title'), guild.name, e, exc_info=True)
                     # If editing fails for other reasons, try sending a new message
                     self.nowplaying_message[guild_id] = await channel.send(embed=embed, view=view)
                     # Access title from the dictionary for logging
-                    logging.info(f"nowplaying_display: Sent new message {self.nowplaying_message[guild_id].id} after edit failure for {data.get('title', 'Unknown Title')} in {guild.name}")
+                    logger.info("nowplaying_display: Sent new message %s after edit failure for %s in %s", self.nowplaying_message[guild_id].id, data.get('title', 'Unknown Title'), guild.name)
             else:
                 self.nowplaying_message[guild_id] = await channel.send(embed=embed, view=view)
                 # Access title from the dictionary for logging
-                logging.info(f"nowplaying_display: Sent initial message {self.nowplaying_message[guild_id].id} for {data.get('title', 'Unknown Title')} in {guild.name}")
+                logger.info("nowplaying_display: Sent initial message %s for %s in %s", self.nowplaying_message[guild_id].id, data.get('title', 'Unknown Title'), guild.name)
         else: # Nothing is playing
-            logging.debug(f"nowplaying_display: Nothing playing for guild {guild_id}. Stored message: {current_nowplaying_message.id if current_nowplaying_message else 'None'}")
+            logger.debug("nowplaying_display: Nothing playing for guild %s. Stored message: %s", guild_id, current_nowplaying_message.id if current_nowplaying_message else 'None')
             if current_nowplaying_message:
                 try:
                     # Attempt to fetch before deleting to avoid NotFound error if already gone
                     fetched_message = await channel.fetch_message(current_nowplaying_message.id)
-                    logging.debug(f"nowplaying_display: Fetched message {fetched_message.id} for deletion.")
+                    logger.debug("nowplaying_display: Fetched message %s for deletion.", fetched_message.id)
                     await fetched_message.delete()
                     del self.nowplaying_message[guild_id]
-                    logging.info(f"nowplaying_display: Deleted previous message {current_nowplaying_message.id} as nothing is playing in {guild.name}")
+                    logger.info("nowplaying_display: Deleted previous message %s as nothing is playing in %s", current_nowplaying_message.id, guild.name)
                 except discord.NotFound:
-                    logging.warning(f"nowplaying_display: Previous message {current_nowplaying_message.id} not found for deletion in {guild.name}. Already gone?")
+                    logger.warning("nowplaying_display: Previous message %s not found for deletion in %s. Already gone?", current_nowplaying_message.id, guild.name)
                     pass # Message already deleted
                 except Exception as e:
-                    logging.error(f"nowplaying_display: Error deleting message {current_nowplaying_message.id} in {guild.name}: {e}", exc_info=True)
+                    logger.error("nowplaying_display: Error deleting message %s in %s: %s", current_nowplaying_message.id, guild.name, e, exc_info=True)
             
             # Only send "Not Playing" if not a silent update and no message is currently displayed
             if not silent_update and not current_nowplaying_message:
                 self.nowplaying_message[guild_id] = await channel.send(embed=self.create_embed("Not Playing", "The bot is not currently playing anything."))
-                logging.info(f"nowplaying_display: Nothing playing in {guild.name}. Sent 'Not Playing' message.")
+                logger.info("nowplaying_display: Nothing playing in %s. Sent 'Not Playing' message.", guild.name)
             elif silent_update and current_nowplaying_message and current_nowplaying_message.embeds and current_nowplaying_message.embeds[0].title == "Not Playing":
                 # If it's a silent update and the current message is "Not Playing", do nothing to avoid spam
-                logging.debug(f"nowplaying_display: Silent update, and 'Not Playing' message already present for {guild.name}. Skipping.")
+                logger.debug("nowplaying_display: Silent update, and 'Not Playing' message already present for %s. Skipping.", guild.name)
                 pass
             elif silent_update and not current_nowplaying_message:
                 # If it's a silent update and no message is present, do nothing. A new message will be sent when a song starts.
-                logging.debug(f"nowplaying_display: Silent update, no message present for {guild.name}. Skipping sending 'Not Playing'.")
+                logger.debug("nowplaying_display: Silent update, no message present for %s. Skipping sending 'Not Playing'.", guild.name)
                 pass
             else:
                 # If it's not a silent update, or if there's an old song message, send a new "Not Playing" message
                 if not silent_update:
                     self.nowplaying_message[guild_id] = await channel.send(embed=self.create_embed("Not Playing", "The bot is not currently playing anything."))
-                    logging.info(f"nowplaying_display: Nothing playing in {guild.name}. Sent 'Not Playing' message (non-silent or old message).")
+                    logger.info("nowplaying_display: Nothing playing in %s. Sent 'Not Playing' message (non-silent or old message).", guild.name)
+
+    def _stream_died(self, guild_id, error):
+        """
+        Tells a stream that failed or ran dry mid-track (an expired or 403'd URL makes
+        FFmpeg exit early) apart from a track that finished or was skipped or stopped.
+        """
+        source = self.tracked_sources.get(guild_id)
+        data = self.current_song.get(guild_id)
+        if not source or not data:
+            return False
+        if error:
+            return True
+        duration = data.get('duration')
+        return source.ended and bool(duration) and source.position < duration - config.FAILOVER_END_TOLERANCE
+
+    def _failover_candidates(self, fresh, data):
+        """
+        Streams to try for a track, best first: the freshly resolved one, the other
+        audio-only formats (highest bitrate first), then a downloaded copy if one exists.
+        Each is a dict of format fields (url, ext, acodec, ...) to lay over the track's data.
+        """
+        candidates = [fresh] if fresh else []
+        for info in (fresh, data):
+            formats = [fmt for fmt in (info or {}).get('formats') or [] if fmt.get('vcodec') == 'none' and fmt.get('acodec') != 'none']
+            candidates += sorted(formats, key=lambda fmt: fmt.get('abr') or 0, reverse=True)
+        for download in data.get('requested_downloads') or []:
+            if download.get('filepath') and os.path.exists(download['filepath']):
+                candidates.append({'url': download['filepath'], 'ext': download.get('ext'), 'acodec': download.get('acodec')})
+        unique = {}
+        for candidate in candidates:
+            if candidate.get('url'):
+                unique.setdefault(candidate['url'], {field: candidate.get(field) for field in STREAM_FIELDS})
+        return list(unique.values())
+
+    async def _recover_stream(self, ctx, error):
+        """
+        Resumes the current track at the last delivered position from a fresh stream URL,
+        falling back to alternate formats. Returns False when every candidate has been
+        tried, in which case the track is lost and playback moves on.
+        """
+        guild_id = ctx.guild.id
+        data = self.current_song[guild_id]
+        failed = self.tracked_sources[guild_id]
+        position = failed.position
+        tried = self.failover_attempts.setdefault(guild_id, [])
+        if failed.frames * FRAME_LENGTH > 30:
+            tried.clear()  # It played for a while first, so this is a new failure rather than a retry
+        if len(tried) >= config.FAILOVER_MAX_ATTEMPTS or not ctx.voice_client or not ctx.voice_client.is_connected():
+            return False
+        tried.append(data['url'])
+        logger.warning("Stream for %s died at %s in guild %s (%s); re-resolving.", data.get('title'), format_timestamp(position), guild_id, error or "premature end of stream")
+
+        fresh = None
+        try:
+            ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+            ytdl_opts['noplaylist'] = True
+            result = await YTDLSource.from_url(data.get('webpage_url') or data['url'], loop=self.bot.loop, stream=True, ytdl_opts=ytdl_opts, guild_id=guild_id)
+            fresh = result['data'] if isinstance(result, dict) else None
+        except Exception as e:
+            logger.warning("Could not re-resolve %s: %s", data.get('title'), e)
+
+        candidates = [candidate for candidate in self._failover_candidates(fresh, data) if candidate['url'] not in tried]
+        if not candidates or ctx.voice_client.is_playing():
+            return False
+        recovered = {**data, **candidates[0]}
+        if fresh and fresh.get('formats'):
+            recovered['formats'] = fresh['formats']
+        source = None
+        try:
+            source = await self._create_source(guild_id, recovered, position=position)
+            ctx.voice_client.play(source, after=self._after_callback(ctx))
+        except Exception as e:
+            # Runs from _after_playback, whose future nobody awaits: a raise here would stop the guild's playback silently
+            logger.error("Could not restart %s in guild %s from a new stream: %s", data.get('title'), guild_id, e, exc_info=True)
+            if source is not None:
+                self.bot.loop.create_task(asyncio.to_thread(source.cleanup))
+            return False
+        self.current_song[guild_id] = recovered
+        self.tracked_sources[guild_id] = source
+        logger.info("Resumed %s at %s in guild %s from a new stream.", data.get('title'), format_timestamp(position), guild_id)
+        return True
+
+    def _voice_dropped(self, guild_id):
+        """
+        Whether the bot lost its voice connection mid-track without being told to leave.
+        """
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        source = self.tracked_sources.get(guild_id)
+        return guild_id not in self.intentional_disconnects and guild_id in self.voice_channels and \
+            source is not None and not source.ended and not (voice_client and voice_client.is_connected())
+
+    def _schedule_reconnect(self, guild_id, reason):
+        task = self.reconnect_tasks.get(guild_id)
+        if task is None or task.done():
+            logger.warning("Voice connection in guild %s dropped (%s); reconnecting.", guild_id, reason)
+            self.reconnect_tasks[guild_id] = self.bot.loop.create_task(self._reconnect_voice(guild_id))
+
+    async def _reconnect_voice(self, guild_id):
+        """
+        Supervises a dropped voice connection: reconnects to the same channel with
+        exponential backoff, then resumes the current track from the position it reached,
+        reusing its resolved stream rather than extracting it again. discord.py retries
+        the connection itself first, so each attempt starts by checking whether that worked.
+        """
+        dropped_at = time.perf_counter()
+        source = self.tracked_sources.get(guild_id)
+        position = source.position if source else 0.0
+        channel = self.voice_channels.get(guild_id)
+        ctx = self.player_contexts.get(guild_id)
+        delay = config.VOICE_RECONNECT_BACKOFF
+        try:
+            for attempt in range(1, config.VOICE_RECONNECT_ATTEMPTS + 1):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                guild = self.bot.get_guild(guild_id)
+                if guild is None or ctx is None or guild_id in self.intentional_disconnects:
+                    return
+                try:
+                    async with self._guild_lock(guild_id):
+                        voice_client = guild.voice_client
+                        if voice_client and voice_client.is_connected() and (voice_client.is_playing() or voice_client.is_paused()):
+                            logger.info("Voice connection in guild %s recovered on its own.", guild_id)
+                            return
+                        if not voice_client or not voice_client.is_connected():
+                            if voice_client:
+                                await voice_client.disconnect(force=True)
+                            voice_client = await channel.connect(reconnect=True)
+                        data = self.current_song[guild_id]
+                        resumed = await self._create_source(guild_id, data, position=position)
+                        voice_client.play(resumed, after=self._after_callback(ctx))
+                        self.tracked_sources[guild_id] = resumed
+                except Exception as e:
+                    logger.warning("Voice reconnect attempt %s/%s in guild %s failed: %s", attempt, config.VOICE_RECONNECT_ATTEMPTS, guild_id, e)
+                    continue
+                metrics.VOICE_RECONNECTS_TOTAL.labels(outcome='resumed').inc()
+                metrics.VOICE_OUTAGE_SECONDS.observe(time.perf_counter() - dropped_at)
+                logger.info("Reconnected to %s in guild %s and resumed %s at %s.", channel, guild_id, data.get('title'), format_timestamp(position))
+                return
+            metrics.VOICE_RECONNECTS_TOTAL.labels(outcome='failed').inc()
+            logger.error("Could not reconnect to voice in guild %s after %s attempts.", guild_id, config.VOICE_RECONNECT_ATTEMPTS)
+            await ctx.send(embed=self.create_embed("Playback Error", "I lost the voice connection and could not get it back. Use `?join` to bring me back.", discord.Color.red()))
+            self._end_session(guild_id, 'voice_lost')
+        finally:
+            if self.reconnect_tasks.get(guild_id) is asyncio.current_task():
+                del self.reconnect_tasks[guild_id]
 
     async def _after_playback(self, ctx, error):
+        if ctx.guild.id not in self.sessions:
+            return  # The bot left and the guild's state was reclaimed
+        if ctx.guild.id in self.reconnect_tasks:
+            return  # The player stopped because the voice connection dropped; it is being resumed
+        if self._voice_dropped(ctx.guild.id):
+            self._schedule_reconnect(ctx.guild.id, error or "disconnected")
+            return
+        if self._stream_died(ctx.guild.id, error):
+            async with self._guild_lock(ctx.guild.id):
+                recovered = await self._recover_stream(ctx, error)
+            if recovered:
+                metrics.STREAM_FAILOVERS_TOTAL.labels(outcome='recovered').inc()
+                return
+            metrics.STREAM_FAILOVERS_TOTAL.labels(outcome='lost').inc()
+            logger.error("Could not recover the stream for %s in guild %s; skipping it.", self.current_song[ctx.guild.id].get('title'), ctx.guild.id)
+            error = None  # Already reported
+        self.track_ended_at[ctx.guild.id] = time.perf_counter()
         queue = await self.get_queue(ctx.guild.id)
         if error:
-            logging.error(f"Player error in {ctx.guild.name}: {error}", exc_info=True)
+            logger.error("Player error in %s: %s", ctx.guild.name, error, exc_info=True)
             # Optionally, send an error message to the channel
             # await ctx.send(embed=self.create_embed("Playback Error", f"An error occurred during playback: {error}", discord.Color.red()))
         
@@ -507,7 +1125,7 @@ class Music(commands.Cog):
             current_song_data = self.current_song.get(ctx.guild.id)
             if current_song_data:
                 await queue.put(current_song_data)
-                logging.info(f"Looping enabled. Re-added {current_song_data.get('title', 'Unknown Title')} to queue.")
+                logger.info("Looping enabled. Re-added %s to queue.", current_song_data.get('title', 'Unknown Title'))
         
         # Play the next song in the queue
         await self.play_next(ctx)
@@ -520,7 +1138,7 @@ class Music(commands.Cog):
 
     @commands.command(name="volume")
     async def volume(self, ctx, volume: int):
-        logging.info(f"Volume command invoked by {ctx.author} in {ctx.guild.name} with volume: {volume}")
+        logger.info("Volume command invoked by %s in %s with volume: %s", ctx.author, ctx.guild.name, volume)
         guild_id = ctx.guild.id
         if not ctx.voice_client or not ctx.voice_client.is_playing():
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Not currently playing anything to set volume for.", discord.Color.red()))
@@ -530,15 +1148,15 @@ class Music(commands.Cog):
             new_volume_float = volume / 100
             ctx.voice_client.source.volume = new_volume_float
             self.current_volume[guild_id] = new_volume_float # Store the volume
-            logging.info(f"Volume set to {volume}% in {ctx.guild.name}. Actual source volume: {ctx.voice_client.source.volume}")
+            logger.info("Volume set to %s%% in %s. Actual source volume: %s", volume, ctx.guild.name, ctx.voice_client.source.volume)
             await ctx.send(embed=self.create_embed("Volume Control", f"{config.SUCCESS_EMOJI} Volume set to {volume}%"))
         else:
-            logging.warning(f"Invalid volume {volume} provided by {ctx.author} in {ctx.guild.name}")
+            logger.warning("Invalid volume %s provided by %s in %s", volume, ctx.author, ctx.guild.name)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Volume must be between 0 and 200.", discord.Color.red()))
 
     @commands.command(name="nowplaying")
     async def nowplaying(self, ctx, silent=False):
-        logging.info(f"Nowplaying command invoked by {ctx.author} in {ctx.guild.name} (silent: {silent})")
+        logger.info("Nowplaying command invoked by %s in %s (silent: %s)", ctx.author, ctx.guild.name, silent)
         guild_id = ctx.guild.id
 
         # If invoked by a user, send a new message and store it for future updates
@@ -548,17 +1166,17 @@ class Music(commands.Cog):
                 try:
                     await self.nowplaying_message[guild_id].delete()
                     del self.nowplaying_message[guild_id]
-                    logging.info(f"nowplaying: Deleted previous nowplaying message for {ctx.guild.name}")
+                    logger.info("nowplaying: Deleted previous nowplaying message for %s", ctx.guild.name)
                 except discord.NotFound:
                     pass
                 except Exception as e:
-                    logging.error(f"nowplaying: Error deleting old message in {ctx.guild.name}: {e}", exc_info=True)
+                    logger.error("nowplaying: Error deleting old message in %s: %s", ctx.guild.name, e, exc_info=True)
 
             # Send a new message and store it
             if guild_id in self.current_song and self.current_song[guild_id]:
                 data = self.current_song[guild_id]
                 queue = await self.get_queue(ctx.guild.id)
-                current_time = int(time.time() - self.song_start_time[guild_id])
+                current_time = int(self.current_position(guild_id))
                 progress_bar = self._get_progress_bar(current_time, data.get('duration', 0))
 
                 queue_list = list(queue._queue)
@@ -578,10 +1196,10 @@ class Music(commands.Cog):
                 view.add_item(discord.ui.Button(emoji=config.QUEUE_EMOJI, style=discord.ButtonStyle.primary, custom_id="queue"))
                 
                 self.nowplaying_message[guild_id] = await ctx.send(embed=embed, view=view)
-                logging.info(f"nowplaying: Sent initial message {self.nowplaying_message[guild_id].id} for {data.get('title', 'Unknown Title')} in {ctx.guild.name}")
+                logger.info("nowplaying: Sent initial message %s for %s in %s", self.nowplaying_message[guild_id].id, data.get('title', 'Unknown Title'), ctx.guild.name)
             else:
                 self.nowplaying_message[guild_id] = await ctx.send(embed=self.create_embed("Not Playing", "The bot is not currently playing anything."))
-                logging.info(f"nowplaying: Sent initial 'Not Playing' message for {ctx.guild.name}")
+                logger.info("nowplaying: Sent initial 'Not Playing' message for %s", ctx.guild.name)
         
         # The background task will call _update_nowplaying_display silently
         # This command itself doesn't need to call it if it just sent a new message
@@ -589,7 +1207,7 @@ class Music(commands.Cog):
 
     @commands.command(name="queue")
     async def queue_info(self, ctx):
-        logging.info(f"Queue command invoked by {ctx.author} in {ctx.guild.name})")
+        logger.info("Queue command invoked by %s in %s)", ctx.author, ctx.guild.name)
         queue = await self.get_queue(ctx.guild.id)
         if not queue.empty():
             queue_list = list(queue._queue)
@@ -602,115 +1220,279 @@ class Music(commands.Cog):
             embed = self.create_embed(f"{config.QUEUE_EMOJI} Current Queue", queue_text)
             embed.set_footer(text=f"Total Duration: {total_duration // 60}:{total_duration % 60:02d}")
             
-            logging.info(f"Displaying queue with {len(queue_list)} songs for {ctx.guild.name})")
+            logger.info("Displaying queue with %s songs for %s)", len(queue_list), ctx.guild.name)
             await ctx.send(embed=embed)
         else:
-            logging.info(f"Queue is empty for {ctx.guild.name})")
+            logger.info("Queue is empty for %s)", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Empty Queue", "The queue is currently empty."))
 
     @commands.command(name="skip")
     async def skip(self, ctx):
-        logging.info(f"Skip command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Skip command invoked by %s in %s", ctx.author, ctx.guild.name)
         if ctx.voice_client and ctx.voice_client.is_playing():
             ctx.voice_client.stop()
-            logging.info(f"Song skipped in {ctx.guild.name}")
+            logger.info("Song skipped in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Song Skipped", f"{config.SKIP_EMOJI} The current song has been skipped."))
         else:
-            logging.warning(f"Skip command invoked but nothing is playing in {ctx.guild.name}")
+            logger.warning("Skip command invoked but nothing is playing in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No song is currently playing to skip.", discord.Color.red()))
 
     @commands.command(name="stop")
     async def stop(self, ctx):
-        logging.info(f"Stop command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Stop command invoked by %s in %s", ctx.author, ctx.guild.name)
         queue = await self.get_queue(ctx.guild.id)
         if not queue.empty():
             while not queue.empty():
                 await queue.get()
-            logging.info(f"Queue cleared in {ctx.guild.name}")
+            logger.info("Queue cleared in %s", ctx.guild.name)
         if ctx.voice_client:
             ctx.voice_client.stop()
-            logging.info(f"Voice client stopped in {ctx.guild.name}")
+            logger.info("Voice client stopped in %s", ctx.guild.name)
         
         # Cancel nowplaying update task
         if ctx.guild.id in self.nowplaying_tasks and self.nowplaying_tasks[ctx.guild.id] and not self.nowplaying_tasks[ctx.guild.id].done():
             self.nowplaying_tasks[ctx.guild.id].cancel()
             del self.nowplaying_tasks[ctx.guild.id]
 
+        self._disable_autoplay(ctx.guild.id)
+        self._discard_standby(ctx.guild.id)
         await self.bot.change_presence(activity=None)
         await ctx.send(embed=self.create_embed("Playback Stopped", f"{config.SUCCESS_EMOJI} Music has been stopped and the queue has been cleared."))
 
     @commands.command(name="pause")
     async def pause(self, ctx):
-        logging.info(f"Pause command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Pause command invoked by %s in %s", ctx.author, ctx.guild.name)
         if ctx.voice_client and ctx.voice_client.is_playing():
             ctx.voice_client.pause()
-            logging.info(f"Music paused in {ctx.guild.name}")
+            logger.info("Music paused in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Playback Paused", f"{config.PAUSE_EMOJI} The music has been paused."))
         else:
-            logging.warning(f"Pause command invoked but nothing is playing or already paused in {ctx.guild.name}")
+            logger.warning("Pause command invoked but nothing is playing or already paused in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No music is currently playing to pause.", discord.Color.red()))
 
     @commands.command(name="resume")
     async def resume(self, ctx):
-        logging.info(f"Resume command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Resume command invoked by %s in %s", ctx.author, ctx.guild.name)
         if ctx.voice_client and ctx.voice_client.is_paused():
             ctx.voice_client.resume()
-            logging.info(f"Music resumed in {ctx.guild.name}")
+            logger.info("Music resumed in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Playback Resumed", f"{config.PLAY_EMOJI} The music has been resumed."))
         else:
-            logging.warning(f"Resume command invoked but nothing is paused or playing in {ctx.guild.name}")
+            logger.warning("Resume command invoked but nothing is paused or playing in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No music is currently paused to resume.", discord.Color.red()))
 
     @commands.command(name="clear")
     async def clear(self, ctx):
-        logging.info(f"Clear command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Clear command invoked by %s in %s", ctx.author, ctx.guild.name)
         queue = await self.get_queue(ctx.guild.id)
         if not queue.empty():
             while not queue.empty():
                 await queue.get()
-            logging.info(f"Queue cleared by {ctx.author} in {ctx.guild.name}")
+            logger.info("Queue cleared by %s in %s", ctx.author, ctx.guild.name)
             await ctx.send(embed=self.create_embed("Queue Cleared", f"{config.SUCCESS_EMOJI} The queue has been cleared."))
         else:
-            logging.info(f"Clear command invoked but queue already empty in {ctx.guild.name}")
+            logger.info("Clear command invoked but queue already empty in %s", ctx.guild.name)
             await ctx.send(embed=self.create_embed("Empty Queue", "The queue is already empty."))
 
     
 
     @commands.command(name="remove")
     async def remove(self, ctx, number: int):
-        logging.info(f"Remove command invoked by {ctx.author} in {ctx.guild.name} to remove song number {number}")
+        logger.info("Remove command invoked by %s in %s to remove song number %s", ctx.author, ctx.guild.name, number)
         queue = await self.get_queue(ctx.guild.id)
         if number > 0 and number <= queue.qsize():
-            removed_song = None
-            temp_queue = asyncio.Queue()
-            for i in range(queue.qsize()):
-                song = await queue.get()
-                if i + 1 == number:
-                    removed_song = song
-                else:
-                    await temp_queue.put(song)
-            
-            self.song_queues[ctx.guild.id] = temp_queue
-            
-            if removed_song:
-                logging.info(f"Removed song '{removed_song['data'].get('title', 'Unknown Title')}' (number {number}) from queue in {ctx.guild.name}")
-                await ctx.send(embed=self.create_embed("Song Removed", f"{config.SUCCESS_EMOJI} Removed `{removed_song['data'].get('title', 'Unknown Title')}` from the queue."))
-            else:
-                logging.error(f"Failed to remove song at position {number} from queue in {ctx.guild.name}")
-                await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not find a song at that position.", discord.Color.red()))
+            # In place: a fetch or playlist load in flight holds this same queue object
+            removed_song = queue._queue[number - 1]
+            del queue._queue[number - 1]
+            logger.info("Removed song '%s' (number %s) from queue in %s", removed_song['data'].get('title', 'Unknown Title'), number, ctx.guild.name)
+            await ctx.send(embed=self.create_embed("Song Removed", f"{config.SUCCESS_EMOJI} Removed `{removed_song['data'].get('title', 'Unknown Title')}` from the queue."))
         else:
-            logging.warning(f"Invalid song number {number} provided by {ctx.author} for remove command in {ctx.guild.name}")
+            logger.warning("Invalid song number %s provided by %s for remove command in %s", number, ctx.author, ctx.guild.name)
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Invalid song number.", discord.Color.red()))
 
+    @commands.command(name="seek")
+    async def seek(self, ctx, position: str):
+        """Jumps to a position in the current song, e.g. ?seek 1:30"""
+        logger.info("Seek command invoked by %s in %s to %s", ctx.author, ctx.guild.name, position)
+        try:
+            seconds = parse_timestamp(position)
+        except ValueError:
+            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Use a position like `90`, `1:30` or `1:02:03`.", discord.Color.red()))
+            return
+        await self._seek_to(ctx, seconds)
+
+    @commands.command(name="forward")
+    async def forward(self, ctx, seconds: int = 10):
+        """Skips ahead in the current song (default 10 seconds)."""
+        logger.info("Forward command invoked by %s in %s (%ss)", ctx.author, ctx.guild.name, seconds)
+        await self._seek_to(ctx, self.current_position(ctx.guild.id) + seconds)
+
+    @commands.command(name="rewind")
+    async def rewind(self, ctx, seconds: int = 10):
+        """Goes back in the current song (default 10 seconds)."""
+        logger.info("Rewind command invoked by %s in %s (%ss)", ctx.author, ctx.guild.name, seconds)
+        await self._seek_to(ctx, self.current_position(ctx.guild.id) - seconds)
+
+    async def _seek_to(self, ctx, seconds):
+        if not ctx.voice_client or not (ctx.voice_client.is_playing() or ctx.voice_client.is_paused()) or not self.current_song.get(ctx.guild.id):
+            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No song is currently playing.", discord.Color.red()))
+            return
+        try:
+            position = await self._restart_at(ctx, seconds)
+        except Exception as e:
+            logger.error("Error seeking in %s: %s", ctx.guild.name, e, exc_info=True)
+            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not seek: {e}", discord.Color.red()))
+            return
+        duration = self.current_song[ctx.guild.id].get('duration') or 0
+        await ctx.send(embed=self.create_embed("Seeked", f"{config.SUCCESS_EMOJI} Now at **{format_timestamp(position)}**" + (f" / {format_timestamp(duration)}" if duration else "") + "."))
+
+    @commands.command(name="ffmpeg")
+    @commands.is_owner()
+    async def ffmpeg_status(self, ctx):
+        """Shows the FFmpeg processes the bot is running, with their CPU and memory use."""
+        processes = self.ffmpeg.snapshot()
+        summary = f"{len(processes)}/{self.ffmpeg.max_processes} slots in use, {self.ffmpeg.waiting} waiting, {len(self.standby_sources)} on standby."
+        lines = [
+            f"`{process['pid']}` guild {process['guild_id']} ({process['encoding']}): {process['cpu_percent']:.0f}% CPU, {process['rss_bytes'] / 2 ** 20:.0f} MB, {format_timestamp(process['age_s'])} old"
+            for process in sorted(processes, key=lambda process: process['cpu_percent'], reverse=True)[:15]
+        ]
+        # What each stream costs per encoding, and what it saves against a full-rate encode
+        full = "{}k/c{}".format(*opus_encoder_settings(None))
+        per_stream = self.ffmpeg.cpu_per_stream()
+        if per_stream:
+            lines.append("CPU per stream: " + ", ".join(
+                f"{encoding} {cpu:.1f}%" + (f" ({per_stream[full] - cpu:+.1f}% saved)" if full in per_stream and encoding != full else "")
+                for encoding, cpu in sorted(per_stream.items())
+            ))
+        await ctx.send(embed=self.create_embed("FFmpeg Processes", "\n".join([summary] + lines)))
+
     @commands.command(name="loop")
     async def loop(self, ctx):
-        logging.info(f"Loop command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Loop command invoked by %s in %s", ctx.author, ctx.guild.name)
         guild_id = ctx.guild.id
         self.looping[guild_id] = not self.looping.get(guild_id, False)
         status = "enabled" if self.looping[guild_id] else "disabled"
-        logging.info(f"Looping {status} for {ctx.guild.name}")
+        logger.info("Looping %s for %s", status, ctx.guild.name)
         await ctx.send(embed=self.create_embed("Loop Toggled", f"{config.SUCCESS_EMOJI} Looping is now **{status}**."))
 
+    @commands.command(name="autoplay")
+    async def autoplay(self, ctx):
+        logger.info("Autoplay command invoked by %s in %s", ctx.author, ctx.guild.name)
+        guild_id = ctx.guild.id
+        if self.autoplay_enabled.get(guild_id):
+            self._disable_autoplay(guild_id)
+            logger.info("Autoplay disabled for %s", ctx.guild.name)
+            await ctx.send(embed=self.create_embed("Autoplay Toggled", f"{config.SUCCESS_EMOJI} Autoplay is now **disabled**."))
+            return
+
+        self.autoplay_enabled[guild_id] = True
+        pool = self.autoplay_pools.setdefault(guild_id, AutoplayPool(target_size=config.AUTOPLAY_POOL_SIZE))
+        pool.ctx = ctx
+        self._schedule_autoplay_refill(guild_id)
+        logger.info("Autoplay enabled for %s", ctx.guild.name)
+        await ctx.send(embed=self.create_embed("Autoplay Toggled", f"{config.SUCCESS_EMOJI} Autoplay is now **enabled**. I'll keep the queue going with similar songs when it runs low."))
+
+    def _disable_autoplay(self, guild_id):
+        self.autoplay_enabled.pop(guild_id, None)
+        pool = self.autoplay_pools.pop(guild_id, None)
+        if pool:
+            pool.clear()
+
+    def _autoplay_top_up(self, guild_id, queue):
+        """
+        Moves already-resolved candidates from the autoplay pool into the queue until it
+        reaches the low-water mark. Never waits on extraction or generation.
+        """
+        if not self.autoplay_enabled.get(guild_id):
+            return
+        pool = self.autoplay_pools[guild_id]
+        added = 0
+        while queue.qsize() < config.AUTOPLAY_LOW_WATER:
+            song_info = pool.pop()
+            if song_info is None:
+                break
+            queue.put_nowait(song_info)
+            added += 1
+        if added:
+            logger.info("Autoplay: topped up queue for guild %s with %s song(s), %s left in pool.", guild_id, added, len(pool))
+        self._schedule_autoplay_refill(guild_id)
+
+    def _schedule_autoplay_refill(self, guild_id):
+        pool = self.autoplay_pools.get(guild_id)
+        seed = self.current_song.get(guild_id)
+        if pool and seed and pool.needs_refill():
+            pool.refill_task = self.bot.loop.create_task(self._refill_autoplay_pool(guild_id, seed))
+
+    async def _autoplay_candidates(self, seed, limit, guild_id=None):
+        """
+        Gathers (key, query) candidates that could follow the seed track, cheapest source first:
+        the local similarity index, then YouTube's related mix, then one batched AI request.
+        """
+        candidates = []
+        ai_cog = self.bot.get_cog('OllamaAI')
+        if ai_cog:
+            for _, entry in await ai_cog.find_similar(data=seed, k=limit):
+                if entry.get('webpage_url'):
+                    candidates.append((entry['key'], entry['webpage_url']))
+
+        video_id = seed.get('id')
+        if len(candidates) < limit and video_id and seed.get('extractor_key') == 'Youtube':
+            mix_ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+            mix_ytdl_opts['noplaylist'] = False
+            mix_ytdl_opts['extract_flat'] = 'in_playlist'  # Related metadata only, no per-entry extraction
+            mix_ytdl_opts['playlist_items'] = f'2-{limit * 2 + 1}'
+            try:
+                mix = await YTDLSource.from_url(f"https://www.youtube.com/watch?v={video_id}&list=RD{video_id}", loop=self.bot.loop, ytdl_opts=mix_ytdl_opts,
+                                              priority='warmup', guild_id=guild_id)
+                for item in mix if isinstance(mix, list) else []:
+                    entry = item['data'] or {}
+                    if entry.get('id'):
+                        candidates.append((entry['id'], entry.get('url') or f"https://www.youtube.com/watch?v={entry['id']}"))
+            except Exception as e:
+                logger.warning("Autoplay: could not fetch related mix for %s: %s", video_id, e)
+
+        if len(candidates) < limit and ai_cog:
+            candidates.extend((None, query) for query in await ai_cog.suggest_songs([seed.get('title')], count=limit))
+        return candidates
+
+    async def _refill_autoplay_pool(self, guild_id, seed):
+        pool = self.autoplay_pools.get(guild_id)
+        if not pool:
+            return
+        logger.info("Autoplay: refilling candidate pool for guild %s from '%s' (%s/%s).", guild_id, seed.get('title'), len(pool), pool.target_size)
+        try:
+            for key, query in await self._autoplay_candidates(seed, pool.target_size, guild_id):
+                if pool.is_full():
+                    break
+                if key and pool.has_seen(key):
+                    continue
+                ytdl_opts = YTDL_FORMAT_OPTIONS.copy()
+                ytdl_opts['noplaylist'] = True
+                try:
+                    result = await YTDLSource.from_url(query, loop=self.bot.loop, stream=True, ytdl_opts=ytdl_opts, priority='warmup', guild_id=guild_id)
+                except Exception as e:
+                    logger.warning("Autoplay: could not resolve candidate '%s': %s", query, e)
+                    continue
+                song_info = result[0] if isinstance(result, list) and result else result
+                if not song_info or not song_info.get('data') or not song_info['data'].get('url'):
+                    continue
+                resolved_key = song_info['data'].get('id')
+                if pool.has_seen(resolved_key):
+                    continue
+                pool.mark_seen(resolved_key)
+                pool.add(song_info)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Autoplay: error refilling candidate pool for guild %s: %s", guild_id, e, exc_info=True)
+            return
+
+        logger.info("Autoplay: candidate pool for guild %s now has %s song(s).", guild_id, len(pool))
+        # If the queue ran dry while we were resolving, pick playback back up
+        ctx = pool.ctx
+        if ctx and ctx.voice_client and ctx.voice_client.is_connected() and not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused():
+            await self.play_next(ctx)
+
     def _get_current_speed_index(self, guild_id):
         current_speed = self.playback_speed.get(guild_id, 1.0)
         try:
@@ -720,82 +1502,26 @@ class Music(commands.Cog):
 
     async def _set_speed(self, ctx, new_speed):
         guild_id = ctx.guild.id
-        if not ctx.voice_client or not ctx.voice_client.is_playing():
-            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No song is currently playing to change speed.", discord.Color.red()))
-            return
-
-        self.playback_speed[guild_id] = new_speed
-        logging.info(f"Setting playback speed to {new_speed} for {ctx.guild.name}")
-
-        # Re-create the player with the new speed
-        guild_id = ctx.guild.id
-        if not ctx.voice_client or not ctx.voice_client.is_playing():
+        if not ctx.voice_client or not (ctx.voice_client.is_playing() or ctx.voice_client.is_paused()) or not self.current_song.get(guild_id):
             await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No song is currently playing to change speed.", discord.Color.red()))
             return
 
         self.playback_speed[guild_id] = new_speed
-        logging.info(f"Setting playback speed to {new_speed} for {ctx.guild.name}")
+        logger.info("Setting playback speed to %s for %s", new_speed, ctx.guild.name)
 
-        # Re-create the player with the new speed
-        current_song_data = self.current_song.get(guild_id)
-        if current_song_data:
-            # Stop current playback
-            ctx.voice_client.stop()
-
-            try:
-                # Get the original URL from the stored data
-                original_url = current_song_data.get('webpage_url') or current_song_data.get('url')
-                if not original_url:
-                     await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not apply speed change. Original song URL not found.", discord.Color.red()))
-                     return
-
-                # Dynamically create FFMPEG options with atempo filter
-                player_options = FFMPEG_OPTIONS.copy()
-                if new_speed != 1.0:
-                    # Ensure 'options' key exists
-                    if 'options' not in player_options:
-                        player_options['options'] = ''
-                    # Add atempo filter, ensuring it's space-separated if other options exist
-                    player_options['options'] += f' -filter:a "atempo={new_speed}"'
-
-                # Re-fetch the source with the updated FFmpeg options and stream=True
-                # This will create a new FFmpegOpusAudio source with the speed filter
-                new_source_info = await YTDLSource.from_url(original_url, loop=self.bot.loop, stream=True, ytdl_opts=YTDL_FORMAT_OPTIONS.copy())
-
-                if not new_source_info or not isinstance(new_source_info, dict) or 'data' not in new_source_info or 'stream' not in new_source_info:
-                     await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not re-fetch song data to apply speed change.", discord.Color.red()))
-                     return
-
-                new_data = new_source_info['data']
-                is_streaming = new_source_info['stream']
-
-                # Create the new player with the applied speed filter
-                if is_streaming:
-                    player = discord.FFmpegOpusAudio(new_data['url'], **player_options)
-                else:
-                    player = discord.FFmpegPCMAudio(new_data['url'], **player_options)
-
-                # Apply stored volume to the new player
-                player.volume = self.current_volume.get(guild_id, 0.5)
-
-                # Play the new source
-                ctx.voice_client.play(player, after=lambda e: self.bot.loop.create_task(self._after_playback(ctx, e)))
-
-                self.current_song[guild_id] = new_data # Update current song data
-                self.song_start_time[guild_id] = time.time() # Reset start time
-                await ctx.send(embed=self.create_embed("Speed Changed", f"{config.SUCCESS_EMOJI} Playback speed set to **{new_speed}x**. Restarting song to apply."))
-                await self.nowplaying(ctx, silent=True) # Update nowplaying message immediately
-
-            except Exception as e:
-                logging.error(f"Error applying speed change in _set_speed: {e}", exc_info=True)
-                await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not apply speed change: {e}", discord.Color.red()))
-
-        else:
-            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} No song is currently playing to change speed.", discord.Color.red()))
+        # Restart FFmpeg with the new atempo filter from where we are; no re-extraction needed
+        position = self.current_position(guild_id)
+        try:
+            await self._restart_at(ctx, position)
+            await ctx.send(embed=self.create_embed("Speed Changed", f"{config.SUCCESS_EMOJI} Playback speed set to **{new_speed}x**, continuing from {format_timestamp(position)}."))
+            await self.nowplaying(ctx, silent=True) # Update nowplaying message immediately
+        except Exception as e:
+            logger.error("Error applying speed change in _set_speed: %s", e, exc_info=True)
+            await ctx.send(embed=self.create_embed("Error", f"{config.ERROR_EMOJI} Could not apply speed change: {e}", discord.Color.red()))
 
     @commands.command(name="speedhigher")
     async def speedhigher(self, ctx):
-        logging.info(f"Speedhigher command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Speedhigher command invoked by %s in %s", ctx.author, ctx.guild.name)
         guild_id = ctx.guild.id
         current_index = self._get_current_speed_index(guild_id)
         if current_index < len(self.youtube_speeds) - 1:
@@ -806,7 +1532,7 @@ class Music(commands.Cog):
 
     @commands.command(name="speedlower")
     async def speedlower(self, ctx):
-        logging.info(f"Speedlower command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Speedlower command invoked by %s in %s", ctx.author, ctx.guild.name)
         guild_id = ctx.guild.id
         current_index = self._get_current_speed_index(guild_id)
         if current_index > 0:
@@ -817,7 +1543,7 @@ class Music(commands.Cog):
 
     @commands.command(name="shuffle")
     async def shuffle(self, ctx):
-        logging.info(f"Shuffle command invoked by {ctx.author} in {ctx.guild.name}")
+        logger.info("Shuffle command invoked by %s in %s", ctx.author, ctx.guild.name)
         queue = await self.get_queue(ctx.guild.id)
         if queue.empty():
             await ctx.send(embed=self.create_embed("Empty Queue", f"{config.ERROR_EMOJI} The queue is empty, nothing to shuffle.", discord.Color.orange()))
@@ -835,14 +1561,39 @@ class Music(commands.Cog):
         for item in queue_list:
             await queue.put(item)
         
-        logging.info(f"Queue shuffled for {ctx.guild.name}")
+        logger.info("Queue shuffled for %s", ctx.guild.name)
         await ctx.send(embed=self.create_embed("Queue Shuffled", f"{config.SUCCESS_EMOJI} The queue has been shuffled."))
 
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if not self.bot.user or member.id != self.bot.user.id:
+            return
+        guild_id = member.guild.id
+        if after.channel is not None:
+            if guild_id in self.voice_channels:
+                self.voice_channels[guild_id] = after.channel  # Moved; reconnect here from now on
+            return
+        if self._voice_dropped(guild_id):
+            self._schedule_reconnect(guild_id, "left the voice channel")
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self._end_session(guild.id, 'guild_removed')
+
     @commands.Cog.listener()
     async def on_interaction(self, interaction):
         if interaction.type == discord.InteractionType.component:
             custom_id = interaction.data["custom_id"]
-            logging.info(f"Interaction received: {custom_id} by {interaction.user} in {interaction.guild.name}")
+            logger.info("Interaction received: %s by %s in %s", custom_id, interaction.user, interaction.guild.name)
+            # Rapid repeated presses (double clicks, several listeners hitting skip) act once
+            presses = self.button_pressed_at.setdefault(interaction.guild.id, {})
+            now = time.monotonic()
+            if now - presses.get(custom_id, float('-inf')) < config.BUTTON_DEBOUNCE_SECONDS:
+                metrics.COALESCED_REQUESTS_TOTAL.labels(kind='button').inc()
+                logger.info("Debounced %s press in %s", custom_id, interaction.guild.name)
+                await interaction.response.defer()
+                return
+            presses[custom_id] = now
             ctx = await self.bot.get_context(interaction.message)
             if custom_id == "play":
                 await self.resume(ctx)
@@ -870,4 +1621,4 @@ async def setup(bot):
     try:
         await bot.add_cog(Music(bot))
     except Exception as e:
-        logging.error(f"Failed to load music cog: {e}", exc_info=True)
\ No newline at end of file
+        logger.error("Failed to load music cog: %s", e, exc_info=True)
\ No newline at end of file
@@ -1,25 +1,109 @@
 import asyncio
 import discord
-from discord.ext import commands
-import ollama
+from discord.ext import commands, tasks
 import logging
+import re
+import time
 import config
+from utils import metrics
+from utils.similarity import SimilarityIndex
 
 class OllamaAI(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.ollama_host = config.OLLAMA_HOST
         self.ollama_model = config.OLLAMA_MODEL
+        self.similarity_index = SimilarityIndex(config.SIMILARITY_INDEX_PATH, config.OLLAMA_EMBED_MODEL)
+        self._index_loaded = None
         logging.info(f"OllamaAI cog initialized with host: {self.ollama_host}, model: {self.ollama_model}")
 
+    async def cog_load(self):
+        # Load the index in the background so it doesn't hold up startup
+        self._index_loaded = asyncio.create_task(asyncio.to_thread(self.similarity_index.load))
+        self.save_similarity_index.start()
+
+    async def cog_unload(self):
+        self.save_similarity_index.cancel()
+        await self._wait_for_index()
+        await asyncio.to_thread(self.similarity_index.save)
+
+    async def _wait_for_index(self):
+        if self._index_loaded is not None:
+            await self._index_loaded
+
+    @tasks.loop(minutes=5)
+    async def save_similarity_index(self):
+        """
+        Periodically persists the similarity index so new tracks survive restarts.
+        """
+        await self._wait_for_index()
+        await asyncio.to_thread(self.similarity_index.save)
+
+    @commands.Cog.listener()
+    async def on_track_start(self, guild_id, data):
+        # Every track the bot plays is embedded once and becomes a candidate for ?similar
+        await self._wait_for_index()
+        await self.similarity_index.add_track(data)
+
+    def _parse_song_lines(self, text: str) -> list[tuple[str, str]]:
+        """
+        Parses 'Song Title - Artist' lines from an AI response into (title, artist) pairs.
+        """
+        songs = []
+        for line in text.split('\n'):
+            line = re.sub(r'^\s*(?:\d+[.)]|[-*•])\s*', '', line).strip()
+            parts = line.split(' - ', 1) if ' - ' in line else line.split('-', 1)
+            if len(parts) == 2 and parts[0].strip() and parts[1].strip():
+                songs.append((parts[0].strip(), parts[1].strip()))
+        return songs
+
+    async def suggest_songs(self, seeds: list[str], count: int = 10) -> list[str]:
+        """
+        Asks the AI for a batch of songs that would follow the given tracks, in a single
+        generation. Returns search queries ('Song Title Artist'), or an empty list on failure.
+        """
+        seed_list = "\n".join(f"- {seed}" for seed in seeds if seed)
+        prompt = f"""You are an AI DJ keeping a radio station going. Based on the recently played songs below, suggest {count} songs that should play next. List each song on a new line in the exact format: 'Song Title - Artist'. IMPORTANT: Do NOT include any numbering, introductory text, conversational filler, or songs from the list below. Only provide the song list, one song per line.
+
+            Recently played:
+            {seed_list}"""
+        recommendations_text = await self._get_ollama_response(prompt)
+        if "Sorry, I couldn't connect" in recommendations_text:
+            return []
+        return [f"{title} {artist}" for title, artist in self._parse_song_lines(recommendations_text)][:count]
+
+    async def find_similar(self, query: str | None = None, data: dict | None = None, k: int = 5) -> list[tuple[float, dict]]:
+        """
+        Looks up tracks similar to a played track or a text query in the local index.
+        Returns an empty list when the index has nothing close enough.
+        """
+        await self._wait_for_index()
+        results = None
+        if data is not None:
+            results = self.similarity_index.similar_to_track(data, k)
+            if results is None:
+                query = query or data.get('title')
+        if results is None and query:
+            try:
+                results = await self.similarity_index.search(query, k)
+            except Exception as e:
+                logging.warning(f"Similarity search failed for '{query}': {e}")
+                results = []
+        return [(score, entry) for score, entry in (results or []) if score >= config.SIMILARITY_MIN_SCORE]
+
     async def _get_ollama_response(self, prompt: str):
         try:
+            import ollama  # Imported on first use to keep startup fast
+            start = time.perf_counter()
             response = await asyncio.to_thread(
                 ollama.chat,
                 model=self.ollama_model,
                 messages=[{'role': 'user', 'content': prompt}],
                 options={'temperature': 0.7} # Adjust temperature for creativity/accuracy
             )
+            metrics.OLLAMA_REQUEST_SECONDS.labels(kind='chat').observe(time.perf_counter() - start)
+            if response.get('eval_count') and response.get('eval_duration'):
+                metrics.OLLAMA_TOKENS_PER_SECOND.observe(response['eval_count'] / (response['eval_duration'] / 1e9))
             return response['message']['content']
         except Exception as e:
             logging.error(f"Error communicating with Ollama: {e}", exc_info=True)
@@ -241,5 +325,44 @@ class OllamaAI(commands.Cog):
             embed.set_footer(text="Music cog not found, cannot add songs to queue.")
             await ctx.send(embed=embed)
 
+    @commands.command(name="similar", help="Find songs similar to the current one or to a query. Usage: ?similar [song/artist]")
+    async def similar(self, ctx, *, query: str = None):
+        data = None
+        if query is None:
+            music_cog = self.bot.get_cog('Music')
+            data = music_cog.current_song.get(ctx.guild.id) if music_cog else None
+            if not data:
+                await ctx.send("Nothing is playing right now. Usage: ?similar <song/artist>")
+                return
+
+        results = await self.find_similar(query=query, data=data)
+        seed = query or data.get('title', 'Unknown Title')
+        embed = discord.Embed(title="🔁 More Like This 🔁", description=f"Based on: '{seed}'", color=discord.Color.green())
+
+        if results:
+            lines = [f"**{i+1}.** [{entry.get('title') or entry['text']}]({entry.get('webpage_url') or '#'}) `{score:.2f}`" for i, (score, entry) in enumerate(results)]
+            embed.add_field(name="From the play history", value="\n".join(lines), inline=False)
+            await ctx.send(embed=embed)
+            return
+
+        # Unfamiliar query: nothing close enough in the index, so fall back to generation
+        await ctx.send(f"Nothing like '{seed}' in the play history yet, asking the AI...")
+        prompt = f"""You are a music recommendation AI. Suggest 5 songs similar to the following song or artist. List each song on a new line in the exact format: 'Song Title - Artist'. Do not include any numbering or additional conversational text.
+
+            Song/Artist: {seed}"""
+        recommendations_text = await self._get_ollama_response(prompt)
+
+        if "Sorry, I couldn't connect" in recommendations_text:
+            await ctx.send(recommendations_text)
+            return
+
+        songs = self._parse_song_lines(recommendations_text)
+        if songs:
+            embed.add_field(name="AI Suggestions", value="\n".join(f"**{i+1}.** {title} - {artist}" for i, (title, artist) in enumerate(songs)), inline=False)
+        else:
+            embed.add_field(name="AI Suggestions", value=recommendations_text, inline=False)
+        embed.set_footer(text="Use ?play <song> to queue any of these.")
+        await ctx.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(OllamaAI(bot))
\ No newline at end of file
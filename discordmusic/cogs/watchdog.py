@@ -0,0 +1,48 @@
+import logging
+
+import discord
+from discord.ext import commands
+
+import config
+from utils.watchdog import LoopWatchdog
+
+
+class Watchdog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.watchdog = LoopWatchdog(bot.loop, threshold=config.WATCHDOG_THRESHOLD_MS / 1000)
+
+    async def cog_load(self):
+        self.watchdog.start()
+        logging.info(f"Event loop watchdog started (threshold {config.WATCHDOG_THRESHOLD_MS} ms).")
+
+    async def cog_unload(self):
+        self.watchdog.stop()
+
+    @commands.command(name="blocking")
+    @commands.is_owner()
+    async def blocking(self, ctx, action: str = None):
+        """Shows the call sites that blocked the event loop the longest.
+        Usage: ?blocking [reset]
+        """
+        if action == "reset":
+            self.watchdog.reset()
+            return await ctx.send(embed=self.create_embed("Watchdog Reset", f"{config.SUCCESS_EMOJI} Cleared recorded event loop stalls."))
+
+        offenders = self.watchdog.report()
+        if not offenders:
+            return await ctx.send(embed=self.create_embed("Event Loop Watchdog", f"{config.SUCCESS_EMOJI} No stalls over {config.WATCHDOG_THRESHOLD_MS} ms recorded."))
+
+        embed = self.create_embed("Event Loop Watchdog", f"{self.watchdog.stalls} stall(s) over {config.WATCHDOG_THRESHOLD_MS} ms recorded. Worst offenders:")
+        for culprit, stats in offenders:
+            stack_tail = "\n".join(stats['stack'].strip().splitlines()[-4:])
+            value = f"{stats['count']}x, {stats['total_lag'] * 1000:.0f} ms total, {stats['max_lag'] * 1000:.0f} ms max\n```{stack_tail[-900:]}```"
+            embed.add_field(name=culprit[:256], value=value, inline=False)
+        await ctx.send(embed=embed)
+
+    def create_embed(self, title, description, color=discord.Color.blurple()):
+        return discord.Embed(title=title, description=description, color=color)
+
+
+async def setup(bot):
+    await bot.add_cog(Watchdog(bot))
@@ -2,12 +2,23 @@
 import asyncio
 import functools
 import logging
-import yt_dlp
 import discord
-import os
+import time
+import config
+from utils import metrics
+from utils.canonical import MediaKey, SearchCache, canonicalize
+from utils.throttle import ExtractionScheduler, IdentityPool
+from utils.ytdl_cache import YTDLCache
 
-# Suppress noise from yt-dlp
-yt_dlp.utils.bug_reports_hook = lambda *args, **kwargs: None
+
+def _yt_dlp():
+    """
+    Imports yt-dlp on first use rather than at startup, where it costs a few hundred milliseconds.
+    """
+    import yt_dlp
+    # Suppress noise from yt-dlp
+    yt_dlp.utils.bug_reports_hook = lambda *args, **kwargs: None
+    return yt_dlp
 
 # Configure logging for yt-dlp
 class YTDLLogger:
@@ -28,6 +39,76 @@ FFMPEG_OPTIONS = {
     'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5' # Options to reconnect
 }
 
+# yt-dlp container extensions and the FFmpeg demuxers that read them
+FFMPEG_DEMUXERS = {'webm': 'webm', 'weba': 'webm', 'm4a': 'mp4', 'mp4': 'mp4', 'mp3': 'mp3', 'ogg': 'ogg', 'opus': 'ogg'}
+
+def ffmpeg_input_options(data):
+    """
+    FFmpeg input options built from yt-dlp's format info: the demuxer to use and small
+    probe limits, so FFmpeg starts decoding without probing the remote container first.
+    Returns an empty string when the container is unknown (HLS, live streams, other sites).
+    """
+    demuxer = FFMPEG_DEMUXERS.get(data.get('ext'))
+    if not demuxer or data.get('protocol', 'https') not in ('http', 'https'):
+        return ''
+    return f"-f {demuxer} -probesize {config.FFMPEG_PROBESIZE} -analyzeduration {config.FFMPEG_ANALYZEDURATION}"
+
+# Opus encoder bitrates (kbps) a voice channel is matched down to, with the libopus
+# complexity used at each: below 128 kbps Discord's cap hides what the costlier modes add
+OPUS_BITRATE_TIERS = ((32, 5), (48, 6), (64, 7), (96, 8), (128, 10), (192, 10), (256, 10), (384, 10))
+# An Opus stream within this range of the target bitrate is played as is, without re-encoding
+OPUS_COPY_RANGE = (0.75, 1.1)
+
+def opus_encoder_settings(channel_bitrate):
+    """
+    Returns (bitrate_kbps, complexity) for encoding to a voice channel of channel_bitrate
+    bits per second, capped at OPUS_MAX_BITRATE. None means the channel is unknown.
+    """
+    limit = config.OPUS_MAX_BITRATE if channel_bitrate is None else min(channel_bitrate // 1000, config.OPUS_MAX_BITRATE)
+    fitting = [tier for tier in OPUS_BITRATE_TIERS if tier[0] <= limit]
+    return fitting[-1] if fitting else OPUS_BITRATE_TIERS[0]
+
+def opus_copyable(data, bitrate):
+    """
+    Whether data's stream is Opus at close enough to bitrate to be played without re-encoding.
+    Streams of unknown bitrate are copied.
+    """
+    abr = data.get('abr')
+    return data.get('acodec') == 'opus' and (not abr or OPUS_COPY_RANGE[0] * bitrate <= abr <= OPUS_COPY_RANGE[1] * bitrate)
+
+def pick_audio_format(data, bitrate, copy=True):
+    """
+    Picks the audio-only format of a resolved track that suits a bitrate (kbps) target:
+    the best Opus stream that can be copied, else the smallest stream at or above the
+    target (nothing is lost encoding it down), else the best there is. Returns None when
+    yt-dlp listed no usable formats.
+    """
+    formats = [
+        fmt for fmt in data.get('formats') or []
+        if fmt.get('vcodec') == 'none' and fmt.get('acodec') not in (None, 'none') and fmt.get('abr') and fmt.get('url')
+        and fmt.get('protocol', 'https') in ('http', 'https')
+    ]
+    if not formats:
+        return None
+    copyable = [fmt for fmt in formats if copy and opus_copyable(fmt, bitrate)]
+    if copyable:
+        return max(copyable, key=lambda fmt: fmt['abr'])
+    above = [fmt for fmt in formats if fmt['abr'] >= bitrate]
+    return min(above, key=lambda fmt: fmt['abr']) if above else max(formats, key=lambda fmt: fmt['abr'])
+
+# yt-dlp's on-disk and in-memory caches, shared by every guild's extractions
+YTDL_CACHE = YTDLCache(config.YTDL_CACHE_DIR, max_age_days=config.YTDL_CACHE_MAX_AGE_DAYS)
+
+# Top YouTube result of recent text queries, shared by every guild
+SEARCH_CACHE = SearchCache(max_size=config.SEARCH_CACHE_SIZE, ttl=config.SEARCH_CACHE_TTL)
+
+# Paces every extraction and rotates cookie files when YouTube throttles one
+EXTRACTION_SCHEDULER = ExtractionScheduler(
+    IdentityPool(path.strip() for path in config.YTDL_COOKIE_FILES.split(",") if path.strip()),
+    rate=config.EXTRACT_RATE, burst=config.EXTRACT_BURST, concurrency=config.EXTRACT_CONCURRENCY, max_wait=config.EXTRACT_MAX_WAIT,
+    backoff=config.EXTRACT_BACKOFF, max_backoff=config.EXTRACT_MAX_BACKOFF,
+)
+
 # YTDL options for extracting audio information
 YTDL_FORMAT_OPTIONS = {
     'format': 'bestaudio/best',  # Get the best audio format
@@ -41,8 +122,8 @@ YTDL_FORMAT_OPTIONS = {
     'no_warnings': True, # Suppress warnings
     'default_search': 'ytsearch', # Default search prefix
     'source_address': '0.0.0.0', # Bind to IPv4 since IPv6 often causes issues
-    'cookiefile': 'youtube_cookie.txt' if os.path.exists('youtube_cookie.txt') else None, # Use cookie file if it exists
     'logger': YTDLLogger(), # Use custom logger
+    'cachedir': config.YTDL_CACHE_DIR, # Persistent player and signature cache (see YTDL_CACHE)
     'http_headers': { # Add headers to mimic a browser
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.88 Safari/537.36)'
     },
@@ -64,7 +145,11 @@ class YTDLSource(discord.PCMVolumeTransformer):
         self.thumbnail = data.get('thumbnail')
 
     @classmethod
-    async def from_url(cls, url, *, loop=None, stream=False, ytdl_opts=None):
+    async def from_url(cls, url, *, loop=None, stream=False, ytdl_opts=None, priority='interactive', guild_id=None):
+        """
+        Extracts url with yt-dlp. priority is the job's class in EXTRACTION_SCHEDULER
+        (see utils.throttle.PRIORITIES) and guild_id the guild it is queued fairly under.
+        """
         loop = loop or asyncio.get_event_loop()
         
         # Ensure ytdl_opts is a dictionary
@@ -79,11 +164,48 @@ class YTDLSource(discord.PCMVolumeTransformer):
             ytdl_opts['outtmpl'] = '-'
             ytdl_opts['noplaylist'] = True # Ensure only single video is processed when streaming
 
-        ydl = yt_dlp.YoutubeDL(ytdl_opts)
+        # Known YouTube URL shapes go straight to their extractor; text goes through the search cache
+        key = canonicalize(url, noplaylist=ytdl_opts.get('noplaylist', True))
+        ie_key = None
+        if key is not None:
+            if key.kind == 'search':
+                video_id = SEARCH_CACHE.get(key.id)
+                metrics.SEARCH_CACHE_TOTAL.labels(result='hit' if video_id else 'miss').inc()
+                if video_id:
+                    key = MediaKey(key.source, video_id, 'video')
+            url, ie_key = key.url, key.ie_key
+
+        yt_dlp = _yt_dlp()
+        if YTDL_CACHE.due():
+            await loop.run_in_executor(None, YTDL_CACHE.maintain, yt_dlp.version.__version__)
+        start = None
+
+        def extract(cookiefile):
+            # Building a YoutubeDL loads its extractors and reads the cookie file, so it is
+            # blocking too and happens in the executor along with the extraction
+            ydl = yt_dlp.YoutubeDL({**ytdl_opts, 'cookiefile': cookiefile})
+            YTDL_CACHE.share(ydl)
+            # Use extract_info to get video data without downloading
+            return ydl.extract_info(url, download=False, ie_key=ie_key)
+
+        async def attempt(identity):
+            nonlocal start
+            start = time.perf_counter()
+            # run_in_executor is used to run blocking code in a separate thread
+            return await loop.run_in_executor(None, extract, identity.cookiefile)
+
+        data = await EXTRACTION_SCHEDULER.run(attempt, priority=priority, guild_id=guild_id)
+        searched = key is not None and key.kind == 'search'
+        metrics.YTDL_EXTRACT_SECONDS.labels(kind='search' if searched else 'playlist' if 'entries' in data else 'single').observe(time.perf_counter() - start)
 
-        # Use extract_info to get video data without downloading
-        # run_in_executor is used to run blocking code in a separate thread
-        data = await loop.run_in_executor(None, lambda: ydl.extract_info(url, download=False))
+        if searched:
+            # A search is for one song: its top result
+            entries = [entry for entry in data.get('entries') or [] if entry]
+            if not entries:
+                return []
+            if entries[0].get('id'):
+                SEARCH_CACHE.put(key.id, entries[0]['id'])
+            return {'data': entries[0], 'stream': stream}
 
         if 'entries' in data:
             # It's a playlist or a search result with multiple entries
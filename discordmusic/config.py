@@ -22,9 +22,87 @@ QUEUE_EMOJI = '🎵'
 ERROR_EMOJI = '❌'
 SUCCESS_EMOJI = '✅'
 
+# Logging to bot_activity.log and the console
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper() # Root log level
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "discord=INFO") # Per-module levels, e.g. "discord=WARNING,cogs.music=DEBUG"
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024))) # Rotate bot_activity.log at this size
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", "5")) # Number of rotated log files to keep
+
 # Discord Channel ID for sending bot logs (errors, warnings)
 LOG_CHANNEL_ID = int(os.environ.get("LOG_CHANNEL_ID"))
+DISCORD_LOG_LEVEL = os.environ.get("DISCORD_LOG_LEVEL", "WARNING").upper() # Only records at or above this level are sent to the channel
+DISCORD_LOG_FLUSH_INTERVAL = float(os.environ.get("DISCORD_LOG_FLUSH_INTERVAL", "10")) # Seconds between batched log messages
+
+# Metrics endpoint (Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics)
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1") # Only listen locally by default
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108")) # Set to 0 to disable the HTTP endpoint
+
+# Event loop watchdog (?blocking)
+WATCHDOG_THRESHOLD_MS = int(os.environ.get("WATCHDOG_THRESHOLD_MS", "250")) # Stalls longer than this are captured and reported
+
+# Startup
+FAST_START = os.environ.get("FAST_START", "true").lower() == "true" # Connect first and warm heavy dependencies in the background afterwards
+STARTUP_TARGET_SECONDS = float(os.environ.get("STARTUP_TARGET_SECONDS", "5")) # Warn when launch-to-ready takes longer than this
+
+# yt-dlp cache (YouTube player code and signature solutions, shared by all servers)
+YTDL_CACHE_DIR = os.environ.get("YTDL_CACHE_DIR", "yt_dlp_cache") # Directory yt-dlp caches into
+YTDL_CACHE_MAX_AGE_DAYS = float(os.environ.get("YTDL_CACHE_MAX_AGE_DAYS", "7")) # Cache entries not rewritten for this long (rotated-out players) are deleted
+
+# Search cache (text queries resolve to the top result's video ID without searching again)
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "1024")) # Distinct queries remembered
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "21600")) # Seconds before a query is searched again, as results are re-ranked
+
+# Extraction throttling (pacing and cookie rotation when YouTube rate-limits or asks for sign-in)
+YTDL_COOKIE_FILES = os.environ.get("YTDL_COOKIE_FILES", "youtube_cookie.txt") # Comma-separated cookie files to rotate between; extraction also falls back to no cookies
+EXTRACT_RATE = float(os.environ.get("EXTRACT_RATE", "2")) # Extractions started per second once YouTube throttles the bot (unpaced until then); halved on each further throttle and recovered gradually
+EXTRACT_BURST = int(os.environ.get("EXTRACT_BURST", "5")) # Extractions that may start back to back after a quiet spell
+EXTRACT_CONCURRENCY = int(os.environ.get("EXTRACT_CONCURRENCY", "6")) # Extractions running at once; one slot is always left to ?play and other interactive requests
+PLAYLIST_BATCH_SIZE = int(os.environ.get("PLAYLIST_BATCH_SIZE", "10")) # Playlist entries resolved per batch; interactive requests go ahead between batches
+EXTRACT_MAX_WAIT = float(os.environ.get("EXTRACT_MAX_WAIT", "30")) # Seconds a request waits for a throttled bot before failing with a retry time
+EXTRACT_BACKOFF = float(os.environ.get("EXTRACT_BACKOFF", "30")) # First cool-down in seconds of a throttled cookie file; doubles while it stays throttled
+EXTRACT_MAX_BACKOFF = float(os.environ.get("EXTRACT_MAX_BACKOFF", "1800")) # Longest cool-down in seconds
+
+# FFmpeg input probing (skipped when yt-dlp already reports the container)
+FFMPEG_PROBESIZE = int(os.environ.get("FFMPEG_PROBESIZE", "65536")) # Bytes FFmpeg reads before it starts decoding a hinted stream
+FFMPEG_ANALYZEDURATION = int(os.environ.get("FFMPEG_ANALYZEDURATION", "500000")) # Microseconds of a hinted stream FFmpeg analyses before decoding
+
+# Opus encoding (matched to each voice channel's bitrate)
+OPUS_MAX_BITRATE = int(os.environ.get("OPUS_MAX_BITRATE", "128")) # Highest Opus bitrate in kbps the bot encodes at, whatever the channel allows
+
+# FFmpeg process management
+FFMPEG_MAX_PROCESSES = int(os.environ.get("FFMPEG_MAX_PROCESSES", "32")) # FFmpeg processes allowed at once; further track starts wait for a free slot
+FFMPEG_QUEUE_TIMEOUT = float(os.environ.get("FFMPEG_QUEUE_TIMEOUT", "30")) # Seconds a track start waits for a free slot before giving up
+FFMPEG_NICE = int(os.environ.get("FFMPEG_NICE", "5")) # Niceness of FFmpeg processes, so decoding yields the CPU to the bot itself
+FFMPEG_MAX_RSS_MB = int(os.environ.get("FFMPEG_MAX_RSS_MB", "256")) # An FFmpeg process using more memory than this is killed
+FFMPEG_MAX_CPU_PERCENT = float(os.environ.get("FFMPEG_MAX_CPU_PERCENT", "90")) # An FFmpeg process above this CPU use for three samples in a row is killed
+FFMPEG_STANDBY_LEAD = float(os.environ.get("FFMPEG_STANDBY_LEAD", "10")) # Seconds before a track ends to start FFmpeg for the next one (0 disables)
+
+# Command concurrency
+BUTTON_DEBOUNCE_SECONDS = float(os.environ.get("BUTTON_DEBOUNCE_SECONDS", "1")) # Repeated presses of the same now-playing button within this window are ignored
+
+# Stream failover (tracks whose stream dies mid-song are re-resolved and resumed)
+FAILOVER_MAX_ATTEMPTS = int(os.environ.get("FAILOVER_MAX_ATTEMPTS", "3")) # Recovery attempts per failure before skipping the track
+FAILOVER_END_TOLERANCE = float(os.environ.get("FAILOVER_END_TOLERANCE", "5")) # A stream ending within this many seconds of the track's end counts as finished
+
+# Voice reconnect (playback resumes where it stopped after a dropped voice connection)
+VOICE_RECONNECT_ATTEMPTS = int(os.environ.get("VOICE_RECONNECT_ATTEMPTS", "5")) # Reconnect attempts before the track is given up
+VOICE_RECONNECT_BACKOFF = float(os.environ.get("VOICE_RECONNECT_BACKOFF", "1")) # Seconds before the first attempt, doubling after each failure (up to 30)
+
+# Guild sessions (per-guild state is reclaimed on leave, idle disconnect and guild removal)
+SESSION_IDLE_TTL = float(os.environ.get("SESSION_IDLE_TTL", "1800")) # Seconds a session outside voice is kept after its last change (e.g. ?search results)
+
+# Broadcast mode (?broadcast / ?tunein)
+BROADCAST_BUFFER_SECONDS = float(os.environ.get("BROADCAST_BUFFER_SECONDS", "10")) # Seconds of decoded audio kept for listeners; one that falls further behind skips to the live edge
 
 # Ollama Configuration
 OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434") # Default Ollama API host
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "phi3") # Default Ollama model to use
+OLLAMA_EMBED_MODEL = os.environ.get("OLLAMA_EMBED_MODEL", "nomic-embed-text") # Model used to embed tracks for the similarity index
+
+# Similarity index of played tracks (used by ?similar)
+SIMILARITY_INDEX_PATH = os.environ.get("SIMILARITY_INDEX_PATH", "similarity_index") # Stored as <path>.npy and <path>.json
+SIMILARITY_MIN_SCORE = float(os.environ.get("SIMILARITY_MIN_SCORE", "0.6")) # Below this cosine score a query counts as unfamiliar
+
+# Autoplay radio mode (?autoplay)
+AUTOPLAY_LOW_WATER = int(os.environ.get("AUTOPLAY_LOW_WATER", "2")) # Top the queue up from the candidate pool when it drops below this many songs
+AUTOPLAY_POOL_SIZE = int(os.environ.get("AUTOPLAY_POOL_SIZE", "5")) # Number of already-resolved candidates to keep ready per guild
@@ -0,0 +1,70 @@
+import time
+from collections import deque
+
+
+class AutoplayPool:
+    """
+    A per-guild pool of already-resolved candidate tracks for autoplay.
+
+    Candidates are extracted in the background well before they are needed, so
+    topping up the queue never waits on generation or extraction. Resolved stream
+    URLs expire, so entries older than max_age are dropped instead of played.
+    """
+
+    def __init__(self, target_size=5, max_age=3 * 3600, history_size=200):
+        self.target_size = target_size
+        self.max_age = max_age
+        self.ctx = None  # Context used to resume playback once candidates arrive
+        self.refill_task = None
+        self._items = deque()  # (resolved_at, song_info)
+        self._seen = set()
+        self._seen_order = deque()
+        self._history_size = history_size
+
+    def __len__(self):
+        self._drop_stale()
+        return len(self._items)
+
+    def _drop_stale(self):
+        cutoff = time.monotonic() - self.max_age
+        while self._items and self._items[0][0] < cutoff:
+            self._items.popleft()
+
+    def add(self, song_info):
+        self._items.append((time.monotonic(), song_info))
+
+    def pop(self):
+        """
+        Returns the oldest fresh candidate, or None if the pool is empty.
+        """
+        self._drop_stale()
+        if not self._items:
+            return None
+        return self._items.popleft()[1]
+
+    def clear(self):
+        self._items.clear()
+        if self.refill_task and not self.refill_task.done():
+            self.refill_task.cancel()
+        self.refill_task = None
+
+    def needs_refill(self):
+        return len(self) < self.target_size and (self.refill_task is None or self.refill_task.done())
+
+    def is_full(self):
+        return len(self) >= self.target_size
+
+    def has_seen(self, key):
+        return key in self._seen
+
+    def mark_seen(self, key):
+        """
+        Remembers a track so it is not suggested again. Only the most recent
+        history_size keys are kept.
+        """
+        if not key or key in self._seen:
+            return
+        self._seen.add(key)
+        self._seen_order.append(key)
+        while len(self._seen_order) > self._history_size:
+            self._seen.discard(self._seen_order.popleft())
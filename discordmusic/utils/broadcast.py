@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+
+import discord
+
+from utils.playback import FRAME_LENGTH
+
+logger = logging.getLogger(__name__)
+
+OPUS_SILENCE = b'\xf8\xff\xfe'
+JOIN_BACKLOG = 10  # Frames behind the live edge a new listener starts at, as a jitter cushion
+
+
+class FrameRing:
+    """
+    A fixed-capacity ring of Opus frames addressed by an ever-increasing sequence number.
+
+    One writer appends; any number of readers keep their own cursor. Frames are stored
+    and handed out as the same bytes objects, never copied.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.head = 0  # Sequence number the next frame will get
+        self._frames = [None] * capacity
+        self._cond = threading.Condition()
+
+    def append(self, frame):
+        with self._cond:
+            self._frames[self.head % self.capacity] = frame
+            self.head += 1
+            self._cond.notify_all()
+
+    def read(self, cursor, timeout):
+        """
+        Returns (frame, next_cursor), waiting up to timeout for the frame at cursor to be
+        written, or (None, cursor) if it wasn't. A reader that fell more than a full ring
+        behind is moved back up to the live edge.
+        """
+        with self._cond:
+            if cursor >= self.head and not self._cond.wait_for(lambda: cursor < self.head, timeout):
+                return None, cursor
+            if cursor < self.head - self.capacity:
+                cursor = max(0, self.head - JOIN_BACKLOG)
+            return self._frames[cursor % self.capacity], cursor + 1
+
+
+class Broadcast:
+    """
+    One decoder feeding any number of voice clients.
+
+    A pump thread reads Opus frames from the current source in real time and appends
+    them to a FrameRing. Each voice client plays a BroadcastListener with its own cursor
+    into the ring, so a stream is fetched and encoded once however many channels tune
+    in. When a source runs dry, on_track_end(source) is called from the pump thread;
+    listeners hear silence until set_source() supplies the next one.
+    """
+
+    def __init__(self, buffer_seconds=10.0, on_track_end=None):
+        self.ring = FrameRing(max(JOIN_BACKLOG * 2, int(buffer_seconds / FRAME_LENGTH)))
+        self.on_track_end = on_track_end
+        self.source = None
+        self.listeners = set()
+        self._source_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._pump, name="broadcast-pump", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the pump and returns the source that was playing, for the caller to clean up.
+        Listeners end their playback on their next read.
+        """
+        self._stop.set()
+        return self.set_source(None)
+
+    def set_source(self, source):
+        """
+        Switches the decoder to source (or to silence with None) and returns the previous one.
+        """
+        with self._source_lock:
+            previous, self.source = self.source, source
+        return previous
+
+    def listen(self):
+        listener = BroadcastListener(self)
+        self.listeners.add(listener)
+        return listener
+
+    def _pump(self):
+        next_frame = time.perf_counter()
+        while not self._stop.is_set():
+            source = self.source
+            try:
+                frame = source.read() if source is not None else b''
+            except Exception as e:
+                logger.error("Broadcast source failed: %s", e)
+                frame = b''
+            if not frame:
+                with self._source_lock:
+                    # A source swapped out mid-read also comes back empty; only report our own end
+                    finished = source is not None and self.source is source
+                    if finished:
+                        self.source = None
+                if finished and self.on_track_end:
+                    self.on_track_end(source)
+                time.sleep(FRAME_LENGTH)
+                next_frame = time.perf_counter()
+                continue
+            self.ring.append(frame)
+            next_frame += FRAME_LENGTH
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+
+
+class BroadcastListener(discord.AudioSource):
+    """
+    One voice client's view of a Broadcast: an Opus source reading the shared ring at its
+    own cursor. It starts just behind the live edge and plays silence while the decoder
+    is between tracks.
+    """
+
+    def __init__(self, broadcast):
+        self.broadcast = broadcast
+        self.cursor = max(0, broadcast.ring.head - JOIN_BACKLOG)
+
+    def is_opus(self):
+        return True
+
+    def read(self):
+        if self.broadcast.stopped:
+            return b''
+        frame, self.cursor = self.broadcast.ring.read(self.cursor, FRAME_LENGTH)
+        return frame if frame is not None else OPUS_SILENCE
+
+    def cleanup(self):
+        self.broadcast.listeners.discard(self)
@@ -0,0 +1,128 @@
+import re
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+YOUTUBE_HOSTS = {'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtube-nocookie.com', 'www.youtube-nocookie.com'}
+SHORT_HOSTS = {'youtu.be', 'www.youtu.be'}
+VIDEO_PATHS = {'shorts', 'embed', 'live', 'v', 'e'}  # /<path>/<video id>
+VIDEO_ID = re.compile(r'[0-9A-Za-z_-]{11}')
+PLAYLIST_ID = re.compile(r'[0-9A-Za-z_-]{10,}')
+MIX_ID = re.compile(r'RD(?:AMVM)?([0-9A-Za-z_-]{11})')  # A video's radio mix, only readable from its watch page
+SEARCH_PREFIX = re.compile(r'[a-z]+search(?:\d+|all|date)?:', re.IGNORECASE)  # An explicit yt-dlp search, e.g. scsearch:
+SCHEMELESS_URL = re.compile(r'[^\s/]+\.[^\s/]+/')  # What yt-dlp takes for a URL without a scheme
+
+IE_KEYS = {'video': 'Youtube', 'playlist': 'YoutubeTab', 'search': 'YoutubeSearch'}
+
+
+class MediaKey(NamedTuple):
+    """
+    A stable identity for what a query plays: ('youtube', video ID, 'video'),
+    ('youtube', playlist ID, 'playlist') or ('youtube', normalized text, 'search').
+    """
+    source: str
+    id: str
+    kind: str
+
+    @property
+    def url(self):
+        if self.kind == 'video':
+            return f"https://www.youtube.com/watch?v={self.id}"
+        if self.kind == 'playlist':
+            mix = MIX_ID.fullmatch(self.id)
+            if mix:
+                return f"https://www.youtube.com/watch?v={mix.group(1)}&list={self.id}"
+            return f"https://www.youtube.com/playlist?list={self.id}"
+        return f"ytsearch:{self.id}"
+
+    @property
+    def ie_key(self):
+        """
+        The yt-dlp extractor for url, so extract_info goes straight to it instead of
+        testing every extractor's URL pattern.
+        """
+        return IE_KEYS[self.kind]
+
+
+def normalize_search(text):
+    return ' '.join(text.casefold().split())
+
+
+def canonicalize(query, noplaylist=True):
+    """
+    Parses a query into its MediaKey without yt-dlp, or returns None for URLs of other
+    sites and shapes this doesn't know, which are passed to yt-dlp as they are.
+
+    Text becomes a search key. A YouTube URL keeps only the video or playlist ID, so
+    youtu.be links, music.youtube.com, shorts and watch URLs with t=, si= or
+    start_radio= all map to the same key. A watch URL with a list= is the playlist
+    unless noplaylist is set, as in yt-dlp.
+    """
+    query = query.strip()
+    if not query or SEARCH_PREFIX.match(query):
+        return None
+    if '://' not in query and not SCHEMELESS_URL.match(query):
+        return MediaKey('youtube', normalize_search(query), 'search')
+
+    parts = urlsplit(query if '://' in query else f"https://{query}")
+    host = (parts.hostname or '').lower()
+    params = parse_qs(parts.query)
+    segments = [segment for segment in parts.path.split('/') if segment]
+    if host in SHORT_HOSTS:
+        video_id = segments[0] if segments else None
+    elif host in YOUTUBE_HOSTS:
+        if segments == ['watch']:
+            video_id = params.get('v', [None])[0]
+        elif len(segments) >= 2 and segments[0] in VIDEO_PATHS:
+            video_id = segments[1]
+        elif segments == ['playlist']:
+            video_id = None
+        else:
+            return None  # Channels, feeds and the like
+    else:
+        return None
+
+    playlist_id = params.get('list', [None])[0]
+    if playlist_id and (not video_id or not noplaylist):
+        if not PLAYLIST_ID.fullmatch(playlist_id):
+            return None
+        if playlist_id.startswith('RD') and not MIX_ID.fullmatch(playlist_id) and not playlist_id.startswith('RDCLAK'):
+            return None  # Personal mixes (RDMM, ...) depend on the account and video they were opened from
+        return MediaKey('youtube', playlist_id, 'playlist')
+    if video_id and VIDEO_ID.fullmatch(video_id):
+        return MediaKey('youtube', video_id, 'video')
+    return None
+
+
+class SearchCache:
+    """
+    Maps normalized search text to the video ID of its top result, so a repeated text
+    query is extracted as that video directly instead of searched for again. Results
+    drift as YouTube re-ranks, so entries expire after ttl seconds; the least recently
+    used are evicted beyond max_size.
+    """
+
+    def __init__(self, max_size=1024, ttl=6 * 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # text -> (stored_at, video_id)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, text):
+        entry = self._entries.get(text)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[text]
+            return None
+        self._entries.move_to_end(text)
+        return entry[1]
+
+    def put(self, text, video_id):
+        self._entries[text] = (time.monotonic(), video_id)
+        self._entries.move_to_end(text)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
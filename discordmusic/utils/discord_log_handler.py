@@ -1,13 +1,33 @@
 import logging
 import asyncio
+import threading
+from collections import deque
 import discord
 
 class DiscordLogHandler(logging.Handler):
-    def __init__(self, bot, channel_id, level=logging.NOTSET):
+    """
+    Ships log records to a Discord channel in batches.
+
+    Records are kept in a bounded ring buffer and flushed every flush_interval
+    seconds as at most max_messages_per_flush messages of up to 2,000 characters,
+    so log shipping has a fixed, small REST cost however busy the bot is.
+    Consecutive repeats are collapsed into one line ("x57") and records pushed out
+    of the full buffer are counted and reported instead of silently lost.
+    """
+
+    MESSAGE_LIMIT = 2000
+    WRAPPER = "```log\n{}\n```"
+
+    def __init__(self, bot, channel_id, level=logging.WARNING, flush_interval=10.0, max_records=500, max_messages_per_flush=2):
         super().__init__(level)
         self.bot = bot
         self.channel_id = channel_id
-        self.queue = asyncio.Queue()
+        self.flush_interval = flush_interval
+        self.max_messages_per_flush = max_messages_per_flush
+        self.buffer = deque(maxlen=max_records)  # [dedupe key, record, repeat count]
+        self.dropped = 0
+        self.total_dropped = 0
+        self._lock = threading.Lock()  # emit() can be called from executor threads
         self.task = self.bot.loop.create_task(self._log_sender())
 
     async def _log_sender(self):
@@ -19,16 +39,78 @@ class DiscordLogHandler(logging.Handler):
 
         while True:
             try:
-                record = await self.queue.get()
-                log_entry = self.format(record)
-                if len(log_entry) > 1990:
-                    log_entry = log_entry[:1990] + "..."
-                await channel.send(f"```log\n{log_entry}\n```")
+                await asyncio.sleep(self.flush_interval)
+                for message in self._drain():
+                    await channel.send(message)
+            except asyncio.CancelledError:
+                break
+            except discord.HTTPException as e:
+                # Back off for a full interval rather than competing with command replies
+                print(f"Error in DiscordLogHandler: {e}")
+                await asyncio.sleep(self.flush_interval)
             except Exception as e:
                 print(f"Error in DiscordLogHandler: {e}")
 
+    def _drain(self):
+        """
+        Takes everything out of the buffer and packs it into at most
+        max_messages_per_flush code-block messages.
+        """
+        with self._lock:
+            entries = list(self.buffer)
+            self.buffer.clear()
+            dropped, self.dropped = self.dropped, 0
+        if not entries and not dropped:
+            return []
+
+        body_limit = self.MESSAGE_LIMIT - len(self.WRAPPER.format(""))
+        lines = []
+        for _, record, count in entries:
+            try:
+                line = self.format(record)
+            except Exception:
+                line = f"{record.levelname}:{record.name}: {record.msg}"
+            if count > 1:
+                line += f" (x{count})"
+            if len(line) > body_limit:
+                line = line[:body_limit - 3] + "..."
+            lines.append(line)
+
+        chunks = []
+        current = ""
+        for line in lines:
+            if current and len(current) + 1 + len(line) > body_limit:
+                chunks.append(current)
+                current = line
+            else:
+                current = f"{current}\n{line}" if current else line
+        if current:
+            chunks.append(current)
+
+        # Keep the newest messages when a flush would exceed its REST budget
+        if len(chunks) > self.max_messages_per_flush:
+            skipped = sum(chunk.count("\n") + 1 for chunk in chunks[:-self.max_messages_per_flush])
+            dropped += skipped
+            chunks = chunks[-self.max_messages_per_flush:]
+        if dropped:
+            self.total_dropped += dropped
+            notice = f"[DiscordLogHandler] {dropped} record(s) dropped since the last flush ({self.total_dropped} total)."
+            if chunks and len(chunks[0]) + 1 + len(notice) <= body_limit:
+                chunks[0] = f"{notice}\n{chunks[0]}"
+            elif len(chunks) < self.max_messages_per_flush:
+                chunks.insert(0, notice)
+        return [self.WRAPPER.format(chunk) for chunk in chunks]
+
     def emit(self, record):
-        self.queue.put_nowait(record)
+        key = (record.levelno, record.name, record.msg, record.args if isinstance(record.args, tuple) else None)
+        with self._lock:
+            if self.buffer and self.buffer[-1][0] == key:
+                self.buffer[-1][2] += 1
+                self.buffer[-1][1] = record  # Show the latest timestamp for the repeated message
+                return
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append([key, record, 1])
 
     def close(self):
         self.task.cancel()
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 5.0  # Seconds between accounting passes
+CPU_STRIKES = 3  # Consecutive samples over the CPU limit before a process is killed
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_process_stats(pid):
+    """
+    Returns (cpu_seconds, rss_bytes) for a process from /proc, or None if it is gone
+    or /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces, so split after its closing parenthesis
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, int(fields[21]) * PAGE_SIZE
+
+
+class _ManagedProcess:
+    __slots__ = ("source", "guild_id", "is_live", "encoding", "started_at", "cpu_seconds", "sampled_at", "cpu_percent", "rss_bytes", "cpu_strikes", "orphan_strikes")
+
+    def __init__(self, source, guild_id, is_live, encoding):
+        self.source = source
+        self.guild_id = guild_id
+        self.is_live = is_live
+        self.encoding = encoding
+        self.started_at = time.monotonic()
+        self.cpu_seconds = 0.0
+        self.sampled_at = self.started_at
+        self.cpu_percent = 0.0
+        self.rss_bytes = 0
+        self.cpu_strikes = 0
+        self.orphan_strikes = 0
+
+    @property
+    def process(self):
+        # discord.py's FFmpegAudio keeps its Popen here, and a falsy sentinel once cleaned up
+        return getattr(self.source, "_process", None) or None
+
+
+class FFmpegManager:
+    """
+    Owns every FFmpeg process the bot starts.
+
+    Processes are spawned through spawn(), which waits for one of max_processes slots,
+    renices the child and tracks it until release() (or its exit) frees the slot. A
+    background task samples each process's CPU and memory from /proc, kills ones over
+    the limits, and reaps orphans: tracked processes whose source is no longer live
+    (per the is_live callback) and FFmpeg children nothing tracks at all. CPU use is
+    also totalled by each process's encoding label, giving the average cost per stream
+    of each encoding.
+    """
+
+    def __init__(self, max_processes=32, queue_timeout=30.0, nice=0, max_rss_bytes=None, max_cpu_percent=None):
+        self.max_processes = max_processes
+        self.queue_timeout = queue_timeout
+        self.nice = nice
+        self.max_rss_bytes = max_rss_bytes
+        self.max_cpu_percent = max_cpu_percent
+        self.is_live = lambda source: True  # Replaced by the owner to enable orphan detection
+        self.processes = {}  # id(source) -> _ManagedProcess
+        self._slots = asyncio.Semaphore(max_processes)
+        self._loop = None
+        self._task = None
+        self._untracked = set()  # FFmpeg child PIDs seen untracked on the previous pass
+        self.encoding_usage = {}  # encoding -> [cpu_seconds, wall_seconds] of sampled processes
+
+    @property
+    def waiting(self):
+        return len(self._slots._waiters or ())
+
+    async def spawn(self, factory, *, guild_id=None, wait=True, is_live=None, encoding="unknown"):
+        """
+        Runs factory() (which starts FFmpeg) once a slot is free and returns its source.
+        With wait=False, returns None instead of queueing when every slot is taken.
+        is_live overrides the manager's orphan check for this process, and encoding
+        labels its CPU use.
+        """
+        self._loop = asyncio.get_running_loop()
+        if not wait and self._slots.locked():
+            return None
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"All {self.max_processes} FFmpeg slots are busy; try again shortly.") from None
+        metrics.FFMPEG_SLOT_WAIT_SECONDS.observe(time.perf_counter() - started)
+        try:
+            source = factory()
+        except Exception:
+            self._slots.release()
+            raise
+        managed = self.processes[id(source)] = _ManagedProcess(source, guild_id, is_live, encoding)
+        if managed.process is not None and self.nice and hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, managed.process.pid, self.nice)
+            except OSError as e:
+                logger.debug("Could not renice FFmpeg process %s: %s", managed.process.pid, e)
+        return source
+
+    def release(self, source):
+        """
+        Frees the slot held by source. Safe to call more than once, and from any thread.
+        """
+        if self._loop is not None and not self._on_loop():
+            if not self._loop.is_closed():  # Sources are also cleaned up on garbage collection
+                self._loop.call_soon_threadsafe(self.release, source)
+            return
+        if self.processes.pop(id(source), None) is not None:
+            self._slots.release()
+
+    def _on_loop(self):
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error("FFmpeg accounting pass failed: %s", e, exc_info=True)
+
+    async def check(self):
+        """
+        One accounting pass: releases exited processes, samples the rest, and kills
+        orphans and processes over their limits.
+        """
+        now = time.monotonic()
+        total_rss = total_cpu = 0.0
+        for managed in list(self.processes.values()):
+            process = managed.process
+            if process is not None and process.poll() is not None:
+                self.release(managed.source)
+                continue
+            is_live = managed.is_live or self.is_live
+            managed.orphan_strikes = 0 if is_live(managed.source) else managed.orphan_strikes + 1
+            if managed.orphan_strikes >= 2:
+                await self._kill(managed, "orphan")
+                continue
+            stats = read_process_stats(process.pid) if process is not None else None
+            if stats is None:
+                continue
+            cpu_seconds, managed.rss_bytes = stats
+            cpu_used, wall = cpu_seconds - managed.cpu_seconds, now - managed.sampled_at
+            managed.cpu_percent = 100 * cpu_used / max(wall, 1e-6)
+            usage = self.encoding_usage.setdefault(managed.encoding, [0.0, 0.0])
+            usage[0] += cpu_used
+            usage[1] += wall
+            metrics.FFMPEG_CPU_SECONDS_TOTAL.labels(encoding=managed.encoding).inc(cpu_used)
+            metrics.FFMPEG_STREAM_SECONDS_TOTAL.labels(encoding=managed.encoding).inc(wall)
+            managed.cpu_seconds, managed.sampled_at = cpu_seconds, now
+            managed.cpu_strikes = managed.cpu_strikes + 1 if self.max_cpu_percent and managed.cpu_percent > self.max_cpu_percent else 0
+            if self.max_rss_bytes and managed.rss_bytes > self.max_rss_bytes:
+                await self._kill(managed, "rss")
+            elif managed.cpu_strikes >= CPU_STRIKES:
+                await self._kill(managed, "cpu")
+            else:
+                total_rss += managed.rss_bytes
+                total_cpu += managed.cpu_percent
+        metrics.FFMPEG_RSS_BYTES.set(total_rss)
+        metrics.FFMPEG_CPU_PERCENT.set(total_cpu)
+        await self._reap_untracked()
+
+    async def _kill(self, managed, reason):
+        process = managed.process
+        logger.warning("Killing FFmpeg process %s in guild %s (%s; %.0f%% CPU, %.0f MB).", process.pid if process else "?", managed.guild_id, reason, managed.cpu_percent, managed.rss_bytes / 2 ** 20)
+        metrics.FFMPEG_KILLED_TOTAL.labels(reason=reason).inc()
+        # cleanup() kills and waits for the process, which can block briefly
+        await asyncio.to_thread(managed.source.cleanup)
+        self.release(managed.source)
+
+    async def _reap_untracked(self):
+        tracked = {managed.process.pid for managed in self.processes.values() if managed.process is not None}
+        untracked = set(await asyncio.to_thread(metrics.ffmpeg_child_pids)) - tracked
+        # Only kill a process seen untracked twice, so one still being registered is spared
+        for pid in untracked & self._untracked:
+            logger.warning("Killing untracked FFmpeg process %s.", pid)
+            metrics.FFMPEG_KILLED_TOTAL.labels(reason="untracked").inc()
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, os.WNOHANG)
+            except (OSError, ChildProcessError):
+                pass
+        self._untracked = untracked - self._untracked
+
+    def cpu_per_stream(self):
+        """
+        Average CPU percent of one stream for each encoding sampled so far.
+        """
+        return {encoding: 100 * cpu / wall for encoding, (cpu, wall) in self.encoding_usage.items() if wall > 0}
+
+    def snapshot(self):
+        """
+        Per-process accounting for display: guild, encoding, age, CPU percent and RSS.
+        """
+        now = time.monotonic()
+        return [
+            {'pid': managed.process.pid if managed.process is not None else None, 'guild_id': managed.guild_id, 'encoding': managed.encoding,
+             'age_s': now - managed.started_at, 'cpu_percent': managed.cpu_percent, 'rss_bytes': managed.rss_bytes}
+            for managed in self.processes.values()
+        ]
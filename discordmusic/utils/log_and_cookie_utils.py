@@ -1,20 +1,33 @@
 import re
 import os
-from datetime import datetime
+import json
+import threading
+from datetime import datetime, timedelta
+
+LOG_LINE_RE = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}):([A-Z]+):([^:]+): (.*)')
+LOG_LINE_BYTES_RE = re.compile(rb'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d{3}:([A-Z]+):([^:]+): (.*)')
+
+LOG_FILES = ["bot_activity.log", "cleaner.log"]
+INDEX_FILE = "log_index.json"
+BUCKET_CHARS = 15  # "YYYY-MM-DD HH:M" -> 10-minute buckets
+RETENTION_DAYS = 30
+MAX_RECENT_ISSUES = 200
+
+_index_lock = threading.Lock()
 
 def parse_log_entry(log_line: str) -> dict | None:
     """
     Parses a single log line into a dictionary of its components.
     Assumes log format: YYYY-MM-DD HH:MM:SS,ms:LEVEL:NAME: MESSAGE
     """
-    match = re.match(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}):([A-Z]+):([^:]+): (.*)', log_line)
+    match = LOG_LINE_RE.match(log_line)
     if match:
         timestamp_str, level, name, message = match.groups()
         try:
             dt_object = datetime.strptime(timestamp_str.split(',')[0], "%Y-%m-%d %H:%M:%S")
         except ValueError:
             dt_object = None
-        
+
         return {
             "timestamp": timestamp_str,
             "datetime": dt_object,
@@ -41,38 +54,135 @@ def parse_log_file(file_path: str) -> list[dict]:
         print(f"Error reading or parsing log file {file_path}: {e}")
     return parsed_data
 
-def analyze_logs(base_dir: str) -> str:
-    """
-    Analyzes log files in a given directory and returns a formatted summary string.
-    """
-    log_files = {
-        "bot_activity.log": os.path.join(base_dir, "bot_activity.log"),
-        "cleaner.log": os.path.join(base_dir, "cleaner.log")
-    }
-
-    analysis_output = "--- Log Analysis Summary ---\n"
-    found_issues = False
-
-    for log_name, file_path in log_files.items():
-        analysis_output += f"\n--- Parsing {log_name} ---\n"
-        logs = parse_log_file(file_path)
-        if logs:
-            log_issues = []
-            for entry in logs:
-                if entry['level'] in ['ERROR', 'WARNING'] or "error" in entry['message'].lower() or "fail" in entry['message'].lower():
-                    log_issues.append(f"[{entry['level']}] {entry['timestamp']} - {entry['message']}")
-            
-            if log_issues:
-                found_issues = True
-                analysis_output += "\n".join(log_issues) + "\n"
-            else:
-                analysis_output += "No significant issues found.\n"
-        else:
-            analysis_output += "No log entries found or file does not exist.\n"
-            
-    if not found_issues:
-        return "✅ All logs analyzed. No significant issues found."
-        
+def _is_issue(line: bytes) -> bool:
+    """
+    Cheap pre-filter applied before the regex: warnings, errors and any line mentioning errors or failures.
+    """
+    lowered = line.lower()
+    return b'error' in lowered or b'fail' in lowered or b':warning:' in lowered or b':critical:' in lowered
+
+def _empty_index() -> dict:
+    return {"files": {}, "buckets": {}, "recent": []}
+
+def load_log_index(base_dir: str) -> dict:
+    index_path = os.path.join(base_dir, INDEX_FILE)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if all(key in index for key in ("files", "buckets", "recent")):
+            return index
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading log index {index_path}, rebuilding: {e}")
+    return _empty_index()
+
+def _save_log_index(base_dir: str, index: dict):
+    index_path = os.path.join(base_dir, INDEX_FILE)
+    with open(index_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(index_path + ".tmp", index_path)
+
+def _index_file(index: dict, log_name: str, file_path: str):
+    """
+    Stream-parses the lines appended to a log file since the last run and adds
+    them to the index. Starts over if the file was rotated or truncated.
+    """
+    state = index["files"].get(log_name, {"offset": 0, "inode": None})
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        index["files"].pop(log_name, None)
+        return
+    if state["inode"] != stat.st_ino or stat.st_size < state["offset"]:
+        # Rotated: finish the tail of the previous file if it is still there as <name>.1
+        try:
+            if state["inode"] is not None and os.stat(file_path + ".1").st_ino == state["inode"]:
+                _scan_lines(index, log_name, file_path + ".1", state["offset"])
+        except FileNotFoundError:
+            pass
+        state = {"offset": 0, "inode": stat.st_ino}
+
+    state["offset"] = _scan_lines(index, log_name, file_path, state["offset"])
+    index["files"][log_name] = state
+    del index["recent"][:-MAX_RECENT_ISSUES]
+
+def _scan_lines(index: dict, log_name: str, file_path: str, offset: int) -> int:
+    """
+    Adds the issues found after offset in a log file to the index and returns the
+    offset just past the last complete line.
+    """
+    buckets = index["buckets"]
+    recent = index["recent"]
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # Partially written line; pick it up next time
+            offset += len(line)
+            if not _is_issue(line):
+                continue
+            match = LOG_LINE_BYTES_RE.match(line)
+            if not match:
+                continue
+            timestamp, level, name, message = (part.decode('utf-8', 'replace') for part in match.groups())
+            counts = buckets.setdefault(timestamp[:BUCKET_CHARS], {}).setdefault(level, {})
+            counts[name] = counts.get(name, 0) + 1
+            recent.append([timestamp, log_name, level, name, message.strip()[:300]])
+    return offset
+
+def update_log_index(base_dir: str) -> dict:
+    """
+    Brings the on-disk log index up to date with any new log lines and returns it.
+    Blocking; run it off the event loop.
+    """
+    with _index_lock:
+        index = load_log_index(base_dir)
+        for log_name in LOG_FILES:
+            _index_file(index, log_name, os.path.join(base_dir, log_name))
+        cutoff = (datetime.now() - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%d %H:%M")[:BUCKET_CHARS]
+        for bucket in [bucket for bucket in index["buckets"] if bucket < cutoff]:
+            del index["buckets"][bucket]
+        _save_log_index(base_dir, index)
+        return index
+
+def count_issues(index: dict, since_hours: float) -> dict:
+    """
+    Returns {level: {logger: count}} for the issues logged in the last since_hours hours.
+    """
+    cutoff = (datetime.now() - timedelta(hours=since_hours)).strftime("%Y-%m-%d %H:%M")[:BUCKET_CHARS]
+    totals = {}
+    for bucket, levels in index["buckets"].items():
+        if bucket < cutoff:
+            continue
+        for level, loggers in levels.items():
+            level_totals = totals.setdefault(level, {})
+            for name, count in loggers.items():
+                level_totals[name] = level_totals.get(name, 0) + count
+    return totals
+
+def analyze_logs(base_dir: str, since_hours: float = 24, max_lines: int = 20) -> str:
+    """
+    Updates the log index incrementally and returns a formatted summary of the
+    errors and warnings logged in the last since_hours hours.
+    """
+    index = update_log_index(base_dir)
+    totals = count_issues(index, since_hours)
+    if not totals:
+        return f"✅ All logs analyzed. No significant issues found in the last {since_hours:g} hour(s)."
+
+    analysis_output = f"--- Log Analysis Summary (last {since_hours:g} hour(s)) ---\n"
+    for level in sorted(totals, key=lambda level: -sum(totals[level].values())):
+        loggers = totals[level]
+        analysis_output += f"\n[{level}] {sum(loggers.values())} total\n"
+        for name, count in sorted(loggers.items(), key=lambda item: -item[1])[:10]:
+            analysis_output += f"  {name}: {count}\n"
+
+    cutoff = (datetime.now() - timedelta(hours=since_hours)).strftime("%Y-%m-%d %H:%M:%S")
+    recent = [entry for entry in index["recent"] if entry[0] >= cutoff][-max_lines:]
+    if recent:
+        analysis_output += "\n--- Most Recent Issues ---\n"
+        analysis_output += "\n".join(f"[{level}] {timestamp} ({log_name}) - {message}" for timestamp, log_name, level, _, message in recent) + "\n"
     return analysis_output
 
 if __name__ == "__main__":
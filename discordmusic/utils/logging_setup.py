@@ -0,0 +1,52 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = '%(asctime)s:%(levelname)s:%(name)s: %(message)s'
+
+
+def parse_log_levels(spec: str) -> dict[str, int]:
+    """
+    Parses a per-module level spec such as "discord=INFO,cogs.music=DEBUG".
+    """
+    levels = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        name, level = (part.strip() for part in item.split('=', 1))
+        level_no = logging.getLevelName(level.upper())
+        if name and isinstance(level_no, int):
+            levels[name] = level_no
+        else:
+            logging.warning(f"Ignoring invalid log level setting: {item!r}")
+    return levels
+
+
+def setup_logging(log_file: str, level: str = "INFO", module_levels: str = "", max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5) -> QueueListener:
+    """
+    Installs a non-blocking logging pipeline on the root logger.
+
+    Log calls on the event loop only put the record on a queue; a background
+    QueueListener thread does the formatting and the file and console I/O. The log
+    file is rotated once it reaches max_bytes, keeping backup_count old files.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.getLevelName(level.upper()))
+    for name, level_no in parse_log_levels(module_levels).items():
+        logging.getLogger(name).setLevel(level_no)
+
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Flush whatever is still queued on exit
+    return listener
@@ -0,0 +1,252 @@
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal Prometheus-style metrics. Metrics are module-level objects so any cog or
+# helper can record into them; the Metrics cog serves REGISTRY over HTTP.
+
+REGISTRY = []
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()  # Samples are recorded from executor and voice threads too
+        REGISTRY.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def remove(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._children.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = list(self._children.items())
+        for labelvalues, child in children:
+            lines.extend(child.render(self.name, self.labelnames, labelvalues))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+    def render(self, name, labelnames, labelvalues):
+        return [f"{name}{_format_labels(labelnames, labelvalues)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self, name, labelnames, labelvalues):
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labelnames, labelvalues, [('le', _format_value(bound))])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, labelvalues)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, labelvalues)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+def render() -> str:
+    """
+    Renders every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def count_ffmpeg_children() -> int:
+    """
+    Counts live FFmpeg child processes of this bot by walking /proc. Returns 0 where /proc is unavailable.
+    """
+    return len(ffmpeg_child_pids())
+
+
+def ffmpeg_child_pids() -> list:
+    """
+    PIDs of this bot's FFmpeg child processes, read from /proc. Empty where /proc is unavailable.
+    """
+    pids = []
+    try:
+        tasks = os.listdir("/proc/self/task")
+    except OSError:
+        return pids
+    for tid in tasks:
+        try:
+            with open(f"/proc/self/task/{tid}/children") as f:
+                children = f.read().split()
+        except OSError:
+            continue
+        for pid in children:
+            try:
+                with open(f"/proc/{pid}/comm") as f:
+                    if f.read().strip() == "ffmpeg":
+                        pids.append(int(pid))
+            except OSError:
+                continue
+    return pids
+
+
+# --- Hot-path metrics ---
+
+YTDL_EXTRACT_SECONDS = Histogram("musicbot_ytdl_extract_seconds", "Latency of YTDLSource.from_url extractions.", ["kind"])
+TIME_TO_FIRST_AUDIO_SECONDS = Histogram("musicbot_time_to_first_audio_seconds", "Time from a ?play command to the first audio packet.")
+TTFA_PHASE_SECONDS = Histogram("musicbot_time_to_first_audio_phase_seconds", "Time-to-first-audio by phase; voice_connect and extract overlap, ffmpeg_start runs from play() to the first packet.", ["phase"])
+TRACK_TRANSITION_SECONDS = Histogram("musicbot_track_transition_seconds", "Gap between a track ending (_after_playback) and the next one starting (play_next).")
+OLLAMA_REQUEST_SECONDS = Histogram("musicbot_ollama_request_seconds", "Latency of Ollama requests.", ["kind"], buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+OLLAMA_TOKENS_PER_SECOND = Histogram("musicbot_ollama_tokens_per_second", "Ollama generation throughput.", buckets=(1, 2, 5, 10, 20, 40, 80, 160))
+DISCORD_REST_REQUESTS_TOTAL = Counter("musicbot_discord_rest_requests_total", "Discord REST API calls by route.", ["route"])
+DISCORD_RATE_LIMITED_TOTAL = Counter("musicbot_discord_rate_limited_total", "Discord REST responses with status 429 by route.", ["route"])
+
+QUEUE_LENGTH = Gauge("musicbot_queue_length", "Songs waiting in each guild's queue.", ["guild"])
+VOICE_CLIENTS = Gauge("musicbot_voice_clients", "Active voice clients.")
+FFMPEG_PROCESSES = Gauge("musicbot_ffmpeg_processes", "Live FFmpeg child processes.")
+SEARCH_CACHE_TOTAL = Counter("musicbot_search_cache_total", "Text queries resolved from the search cache (hit) or by a YouTube search (miss).", ["result"])
+EXTRACT_RATE = Gauge("musicbot_extract_rate", "Extractions per second the scheduler admits while YouTube is throttling the bot; 0 while extractions are not paced.")
+EXTRACT_IDENTITIES_COOLING = Gauge("musicbot_extract_identities_cooling", "Cookie identities cooling down after YouTube throttled them.")
+EXTRACT_THROTTLED_TOTAL = Counter("musicbot_extract_throttled_total", "Extractions YouTube answered with a 429 or a bot check, by identity.", ["identity"])
+EXTRACT_REJECTED_TOTAL = Counter("musicbot_extract_rejected_total", "Extractions refused because every identity was cooling down for too long.")
+EXTRACT_WAIT_SECONDS = Histogram("musicbot_extract_wait_seconds", "Time extractions waited for the scheduler (priority queue, rate limit and cool-downs) before starting, by priority.", ["priority"])
+EXTRACT_QUEUED = Gauge("musicbot_extract_queued", "Extractions waiting to be admitted, by priority.", ["priority"])
+EXTRACT_RUNNING = Gauge("musicbot_extract_running", "Extractions in progress.")
+COALESCED_REQUESTS_TOTAL = Counter("musicbot_coalesced_requests_total", "Duplicate requests absorbed instead of executed, by kind.", ["kind"])
+STREAM_FAILOVERS_TOTAL = Counter("musicbot_stream_failovers_total", "Streams that died mid-track, by whether playback was recovered or the track was lost.", ["outcome"])
+VOICE_RECONNECTS_TOTAL = Counter("musicbot_voice_reconnects_total", "Dropped voice connections, by whether playback was resumed.", ["outcome"])
+VOICE_OUTAGE_SECONDS = Histogram("musicbot_voice_outage_seconds", "Time from a voice connection dropping to playback resuming.", buckets=(1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+GUILD_SESSIONS = Gauge("musicbot_guild_sessions", "Guilds with live Music state.")
+GUILD_SESSION_BYTES = Gauge("musicbot_guild_session_bytes", "Approximate memory held by all guild sessions.")
+GUILD_SESSIONS_RECLAIMED_TOTAL = Counter("musicbot_guild_sessions_reclaimed_total", "Guild sessions reclaimed, by reason.", ["reason"])
+TIMER_WHEEL_TIMERS = Gauge("musicbot_timer_wheel_timers", "Timers pending on the Music cog's timer wheel.")
+FFMPEG_RSS_BYTES = Gauge("musicbot_ffmpeg_rss_bytes", "Resident memory of all managed FFmpeg processes.")
+FFMPEG_CPU_PERCENT = Gauge("musicbot_ffmpeg_cpu_percent", "CPU use of all managed FFmpeg processes, in percent of one core.")
+FFMPEG_SLOT_WAIT_SECONDS = Histogram("musicbot_ffmpeg_slot_wait_seconds", "Time track starts waited for a free FFmpeg slot.")
+FFMPEG_KILLED_TOTAL = Counter("musicbot_ffmpeg_killed_total", "FFmpeg processes killed by the process manager, by reason.", ["reason"])
+FFMPEG_STANDBY_TOTAL = Counter("musicbot_ffmpeg_standby_total", "Pre-spawned FFmpeg processes for the next track, by whether they were used.", ["outcome"])
+BROADCAST_LISTENERS = Gauge("musicbot_broadcast_listeners", "Voice clients currently playing the broadcast.")
+FFMPEG_CPU_SECONDS_TOTAL = Counter("musicbot_ffmpeg_cpu_seconds_total", "CPU time used by FFmpeg processes, by Opus encoding ('copy' or bitrate/complexity).", ["encoding"])
+FFMPEG_STREAM_SECONDS_TOTAL = Counter("musicbot_ffmpeg_stream_seconds_total", "Wall time FFmpeg processes ran, by Opus encoding; CPU seconds over this is the CPU share per stream.", ["encoding"])
+EVENT_LOOP_LAG_SECONDS = Gauge("musicbot_event_loop_lag_seconds", "How late the event loop ran a timer that should have fired immediately.")
+STARTUP_PHASE_SECONDS = Gauge("musicbot_startup_phase_seconds", "Duration of each startup phase of the current process.", ["phase"])
+EVENT_LOOP_STALL_SECONDS = Histogram("musicbot_event_loop_stall_seconds", "Duration of event loop stalls caught by the watchdog.", buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
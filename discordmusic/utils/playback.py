@@ -0,0 +1,76 @@
+import time
+
+import discord
+
+FRAME_LENGTH = 0.02  # Seconds of audio in each Opus frame Discord sends
+
+
+def parse_timestamp(text: str) -> float:
+    """
+    Parses '90', '1:30' or '1:02:03' into seconds. Raises ValueError on anything else.
+    """
+    parts = text.strip().split(':')
+    if not 1 <= len(parts) <= 3 or any(not part.replace('.', '', 1).isdigit() for part in parts):
+        raise ValueError(f"Invalid timestamp: {text}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    if hours:
+        return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+    return f"{rest // 60}:{rest % 60:02d}"
+
+
+class TrackedAudio(discord.AudioSource):
+    """
+    Wraps an audio source and counts the 20 ms frames the voice client actually pulls from it.
+
+    The frame count is the playback clock: it stops while paused or stalled, because
+    no frames are read then, and each frame covers 20 ms * speed of the track when
+    FFmpeg applies an atempo filter. Reading the position is O(1). `ended` is set when
+    the source itself ran dry, as opposed to the player being stopped. on_first_frame,
+    if set, is called from the player thread when the first frame is delivered, and
+    on_cleanup after the wrapped source has been cleaned up. bitrate records the Opus
+    bitrate (kbps) the source was built for, if its creator sets it.
+    """
+
+    def __init__(self, source, start: float = 0.0, speed: float = 1.0):
+        self.source = source
+        self.start = start
+        self.speed = speed
+        self.frames = 0
+        self.ended = False
+        self.created_at = time.perf_counter()
+        self.first_frame_at = None
+        self.on_first_frame = None
+        self.on_cleanup = None
+        self.bitrate = None
+
+    @property
+    def position(self) -> float:
+        return self.start + self.frames * FRAME_LENGTH * self.speed
+
+    def read(self) -> bytes:
+        data = self.source.read()
+        if data:
+            if not self.frames:
+                self.first_frame_at = time.perf_counter()
+                if self.on_first_frame:
+                    self.on_first_frame()
+            self.frames += 1
+        else:
+            self.ended = True
+        return data
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self):
+        self.source.cleanup()
+        if self.on_cleanup:
+            self.on_cleanup()
@@ -0,0 +1,133 @@
+import sys
+import time
+from collections.abc import MutableMapping
+
+
+class GuildSession:
+    """
+    All of the Music cog's state for one guild, owned in one place so it can be reclaimed
+    in one step. A field that has never been set is absent, not None: the cog reads
+    fields through GuildSessions.field() views, which behave like the per-guild dicts
+    they replaced.
+    """
+
+    __slots__ = (
+        'guild_id', 'last_used',
+        'song_queues', 'search_results', 'current_song', 'nowplaying_message', 'queue_message',
+        'playback_speed', 'looping', 'current_volume', 'nowplaying_tasks', 'autoplay_enabled', 'autoplay_pools',
+        'tracked_sources',  # TrackedAudio of the current track, its playback clock
+        'inactivity_timers',  # TimerHandle of the pending idle disconnect
+        'play_requested_at', 'track_ended_at',
+        'ttfa_phases',  # {phase: seconds} for the pending play request
+        'player_contexts',  # ctx that started the current playback
+        'failover_attempts',  # Stream URLs already tried for the current track
+        'guild_locks',  # asyncio.Lock serializing voice connection and playback transitions
+        'button_pressed_at',  # {custom_id: time of the last handled press}
+        'standby_sources',  # (song_info, speed, TrackedAudio) started ahead for the next track
+        'standby_tasks',
+        'voice_channels',  # Voice channel the bot last played in
+        'reconnect_tasks',  # Task reconnecting a dropped voice connection
+        'intentional_disconnects',  # Set when the bot left voice on purpose, so it isn't reconnected
+    )
+    FIELDS = __slots__[2:]
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.last_used = time.monotonic()
+
+    def size_bytes(self):
+        """
+        Approximate memory held by the session: the object, its fields and, for containers,
+        their direct contents (queued songs are counted with their info dicts).
+        """
+        total = sys.getsizeof(self)
+        for name in self.FIELDS:
+            value = getattr(self, name, None)
+            if value is None:
+                continue
+            total += sys.getsizeof(value)
+            items = getattr(value, '_queue', value)  # asyncio.Queue keeps its items in a deque
+            if isinstance(items, (list, tuple, set, dict)) or hasattr(items, 'popleft'):
+                for item in (items.values() if isinstance(items, dict) else items):
+                    total += sys.getsizeof(item)
+                    if isinstance(item, dict) and isinstance(item.get('data'), dict):
+                        total += sys.getsizeof(item['data'])
+        return total
+
+
+class GuildSessions:
+    """
+    The live GuildSessions by guild ID. Sessions are created when a field is first set
+    and live until reclaim().
+    """
+
+    def __init__(self):
+        self.sessions = {}
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, guild_id):
+        return guild_id in self.sessions
+
+    def get(self, guild_id):
+        return self.sessions.get(guild_id)
+
+    def open(self, guild_id):
+        session = self.sessions.get(guild_id)
+        if session is None:
+            session = self.sessions[guild_id] = GuildSession(guild_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def reclaim(self, guild_id):
+        """
+        Removes and returns a guild's session, or None if it had none. The caller stops
+        whatever the session's tasks and timers were doing.
+        """
+        return self.sessions.pop(guild_id, None)
+
+    def field(self, name):
+        return SessionField(self, name)
+
+    def size_bytes(self):
+        return sum(session.size_bytes() for session in list(self.sessions.values()))
+
+
+class SessionField(MutableMapping):
+    """
+    A dict-like view of one GuildSession field across guilds: view[guild_id] reads or
+    sets that guild's session field. Setting a field opens the session.
+    """
+
+    __slots__ = ('_sessions', '_name')
+
+    def __init__(self, sessions, name):
+        self._sessions = sessions
+        self._name = name
+
+    def __getitem__(self, guild_id):
+        session = self._sessions.sessions.get(guild_id)
+        try:
+            return getattr(session, self._name)
+        except AttributeError:
+            raise KeyError(guild_id) from None
+
+    def __setitem__(self, guild_id, value):
+        setattr(self._sessions.open(guild_id), self._name, value)
+
+    def __delitem__(self, guild_id):
+        session = self._sessions.sessions.get(guild_id)
+        try:
+            delattr(session, self._name)
+        except AttributeError:
+            raise KeyError(guild_id) from None
+
+    def __iter__(self):
+        return (guild_id for guild_id, session in list(self._sessions.sessions.items()) if hasattr(session, self._name))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"SessionField({self._name!r}, {dict(self)!r})"
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils import metrics
+
+
+def track_key(data: dict) -> str | None:
+    """
+    Returns a stable key for a yt-dlp info dict, preferring the video ID.
+    """
+    return data.get('id') or data.get('webpage_url')
+
+
+def track_text(data: dict) -> str:
+    """
+    Builds the text that gets embedded for a track: its title and artist.
+    """
+    title = data.get('track') or data.get('title') or ''
+    artist = data.get('artist') or data.get('creator') or data.get('uploader') or data.get('channel') or ''
+    if artist and artist.lower() not in title.lower():
+        return f"{title} - {artist}"
+    return title
+
+
+class SimilarityIndex:
+    """
+    A local embedding index of the tracks the bot has played.
+
+    Each track is embedded once through Ollama and stored as a normalized row of a
+    NumPy matrix, so "more like this" lookups are a single matrix-vector product
+    instead of a generative LLM call.
+    """
+
+    def __init__(self, path: str, model: str, initial_capacity: int = 256):
+        self.path = path
+        self.model = model
+        self._entries = []  # One metadata dict per row of the matrix
+        self._rows = {}  # track key -> row index
+        self._matrix = None
+        self._size = 0
+        self._initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self._pending = set()  # Keys currently being embedded
+        self._dirty = False
+
+    def __len__(self):
+        return self._size
+
+    def load(self):
+        """
+        Loads the index from disk, if it exists. Blocking; run it off the event loop.
+        """
+        meta_path, matrix_path = f"{self.path}.json", f"{self.path}.npy"
+        if not (os.path.exists(meta_path) and os.path.exists(matrix_path)):
+            return
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            matrix = np.load(matrix_path)
+            if meta.get('model') != self.model or len(meta.get('entries', [])) != matrix.shape[0]:
+                logging.warning(f"Similarity index at {self.path} was built with a different model or is inconsistent. Starting fresh.")
+                return
+            with self._lock:
+                self._entries = meta['entries']
+                self._rows = {entry['key']: i for i, entry in enumerate(self._entries)}
+                self._size = matrix.shape[0]
+                self._matrix = np.zeros((max(self._initial_capacity, self._size * 2), matrix.shape[1]), dtype=np.float32)
+                self._matrix[:self._size] = matrix
+            logging.info(f"Loaded similarity index with {self._size} tracks from {self.path}.")
+        except Exception as e:
+            logging.error(f"Error loading similarity index from {self.path}: {e}", exc_info=True)
+
+    def save(self):
+        """
+        Writes the index to disk if it changed. Blocking; run it off the event loop.
+        """
+        with self._lock:
+            if not self._dirty or self._matrix is None:
+                return
+            matrix = self._matrix[:self._size].copy()
+            meta = {'model': self.model, 'entries': list(self._entries)}
+            self._dirty = False
+        try:
+            with open(f"{self.path}.npy.tmp", 'wb') as f:
+                np.save(f, matrix, allow_pickle=False)
+            os.replace(f"{self.path}.npy.tmp", f"{self.path}.npy")
+            with open(f"{self.path}.json.tmp", 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(f"{self.path}.json.tmp", f"{self.path}.json")
+        except Exception as e:
+            logging.error(f"Error saving similarity index to {self.path}: {e}", exc_info=True)
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embeds a piece of text through Ollama and returns it as a unit vector.
+        """
+        import ollama  # Imported on first use to keep startup fast
+        start = time.perf_counter()
+        response = await asyncio.to_thread(ollama.embeddings, model=self.model, prompt=text)
+        metrics.OLLAMA_REQUEST_SECONDS.labels(kind='embed').observe(time.perf_counter() - start)
+        vector = np.asarray(response['embedding'], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def contains(self, data: dict) -> bool:
+        return track_key(data) in self._rows
+
+    async def add_track(self, data: dict):
+        """
+        Embeds a played track and adds it to the index. Tracks already indexed are skipped.
+        """
+        key = track_key(data)
+        if not key or key in self._rows or key in self._pending:
+            return
+        text = track_text(data)
+        if not text:
+            return
+        self._pending.add(key)
+        try:
+            vector = await self.embed(text)
+        except Exception as e:
+            logging.warning(f"Could not embed track '{text}' for the similarity index: {e}")
+            return
+        finally:
+            self._pending.discard(key)
+
+        with self._lock:
+            if key in self._rows:
+                return
+            if self._matrix is None:
+                self._matrix = np.zeros((self._initial_capacity, vector.shape[0]), dtype=np.float32)
+            elif vector.shape[0] != self._matrix.shape[1]:
+                logging.warning(f"Embedding dimension changed ({self._matrix.shape[1]} -> {vector.shape[0]}). Skipping '{text}'.")
+                return
+            if self._size == self._matrix.shape[0]:
+                # Grow geometrically so appends stay amortized O(1)
+                grown = np.zeros((self._matrix.shape[0] * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            self._matrix[self._size] = vector
+            self._rows[key] = self._size
+            self._entries.append({
+                'key': key,
+                'text': text,
+                'title': data.get('title'),
+                'webpage_url': data.get('webpage_url'),
+                'duration': data.get('duration'),
+            })
+            self._size += 1
+            self._dirty = True
+        logging.debug(f"Added '{text}' to the similarity index ({self._size} tracks).")
+
+    def top_k(self, vector: np.ndarray, k: int = 5, exclude=()) -> list[tuple[float, dict]]:
+        """
+        Returns the k most similar tracks to a unit vector as (cosine score, entry) pairs.
+        """
+        with self._lock:
+            if not self._size:
+                return []
+            scores = self._matrix[:self._size] @ vector
+        for key in exclude:
+            row = self._rows.get(key)
+            if row is not None and row < scores.shape[0]:
+                scores[row] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self._entries[i]) for i in top]
+
+    def similar_to_track(self, data: dict, k: int = 5) -> list[tuple[float, dict]] | None:
+        """
+        Returns tracks similar to an already indexed track without any Ollama call,
+        or None if the track has not been indexed yet.
+        """
+        key = track_key(data)
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        with self._lock:
+            vector = self._matrix[row].copy()
+        return self.top_k(vector, k, exclude=(key,))
+
+    async def search(self, text: str, k: int = 5) -> list[tuple[float, dict]]:
+        """
+        Returns the indexed tracks most similar to a free-text query.
+        """
+        if not self._size:
+            return []
+        return self.top_k(await self.embed(text), k)
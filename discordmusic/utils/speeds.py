@@ -1,10 +1,11 @@
-import asyncio
-import discord
-import yt_dlp
-from googleapiclient.discovery import build
+import importlib
 import logging
+import time
 from functools import lru_cache
-from numba import jit
+
+# Heavy optional dependencies are imported on first use (or warmed in the background
+# by preload_dependencies) so they do not delay connecting to the gateway.
+HEAVY_MODULES = ("yt_dlp", "googleapiclient.discovery", "ollama")
 
 # --- Pre-loading and Caching ---
 
@@ -13,30 +14,30 @@ def get_youtube_service(api_key):
     """
     Creates and caches a YouTube service object.
     """
+    from googleapiclient.discovery import build
     logging.info("Creating new YouTube service object.")
     return build("youtube", "v3", developerKey=api_key)
 
-@jit(nopython=True)
-def calculate_audio_levels(audio_data):
-    """
-    A placeholder for a computationally intensive audio processing function.
-    """
-    # In a real application, this would be a much more complex calculation.
-    return audio_data * 0.9
-
 def preload_dependencies():
     """
-    Pre-loads and initializes key dependencies to improve startup time.
+    Imports the heavy dependencies so the first command that needs them doesn't pay for it.
+    Blocking; in fast-start mode it runs in a worker thread after the bot is ready.
+    Returns the import time of each module in seconds.
     """
     logging.info("Pre-loading dependencies...")
-    try:
-        # Pre-load the yt-dlp library
-        yt_dlp.YoutubeDL({})
-        logging.info("Dependencies pre-loaded successfully.")
-    except Exception as e:
-        logging.error(f"Error pre-loading dependencies: {e}")
+    timings = {}
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logging.error(f"Error pre-loading {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+    logging.info("Dependencies pre-loaded: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
 
 # --- Main Execution ---
 
 if __name__ == '__main__':
-    preload_dependencies()
\ No newline at end of file
+    preload_dependencies()
@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from collections import OrderedDict, deque
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# How yt-dlp reports YouTube rate-limiting a client or asking it to prove it isn't a bot
+THROTTLE_ERROR = re.compile(r"HTTP Error 429|Too Many Requests|confirm you.?re not a bot|rate.?limit|try again later", re.IGNORECASE)
+
+# Extraction job classes, most urgent first, and their shares of extraction capacity
+PRIORITIES = ('interactive', 'prefetch', 'background', 'warmup')
+PRIORITY_WEIGHTS = {'interactive': 8, 'prefetch': 4, 'background': 2, 'warmup': 1}
+RESERVED_PRIORITIES = ('interactive', 'prefetch')  # May take the slot bulk work leaves free
+
+
+def is_throttle_error(error):
+    return bool(THROTTLE_ERROR.search(str(error)))
+
+
+class ExtractionThrottled(Exception):
+    """
+    Raised instead of extracting while every identity is cooling down for longer than
+    the scheduler lets a request wait.
+    """
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"YouTube is rate-limiting the bot. Try again in about {int(retry_after) + 1} seconds.")
+
+
+class TokenBucket:
+    """
+    Paces extractions to `rate` per second with bursts of up to `burst`. Waiters are
+    served in arrival order.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Identity:
+    """
+    One way of presenting to YouTube: a cookie file, or none (anonymous).
+    """
+
+    __slots__ = ('name', 'cookiefile', 'cooldown_until', 'strikes', 'last_used')
+
+    def __init__(self, cookiefile=None):
+        self.name = os.path.basename(cookiefile) if cookiefile else "anonymous"
+        self.cookiefile = cookiefile
+        self.cooldown_until = 0.0
+        self.strikes = 0  # Consecutive throttles; sets the length of the next cool-down
+        self.last_used = 0.0
+
+    def cooldown(self):
+        return max(0.0, self.cooldown_until - time.monotonic())
+
+    def usable(self):
+        return self.cookiefile is None or os.path.exists(self.cookiefile)
+
+
+class IdentityPool:
+    """
+    The cookie files (and the anonymous identity) extractions rotate between. A throttled
+    identity cools down and the others carry the load meanwhile.
+    """
+
+    def __init__(self, cookiefiles=(), anonymous=True):
+        self.identities = [Identity(path) for path in dict.fromkeys(cookiefiles)]
+        if anonymous:
+            self.identities.append(Identity(None))
+
+    def add(self, cookiefile):
+        """
+        Adds a cookie file, or clears the cool-down of one already in the pool (its cookies
+        were just replaced).
+        """
+        for identity in self.identities:
+            if identity.cookiefile == cookiefile:
+                identity.cooldown_until = 0.0
+                identity.strikes = 0
+                return identity
+        identity = Identity(cookiefile)
+        self.identities.insert(len([i for i in self.identities if i.cookiefile]), identity)  # Before anonymous
+        return identity
+
+    def pick(self, exclude=()):
+        """
+        Returns the ready identity used longest ago, preferring cookies over anonymous,
+        or None if every identity not in exclude is cooling down.
+        """
+        ready = [i for i in self.identities if i not in exclude and i.usable() and not i.cooldown()]
+        if not ready:
+            return None
+        return min(ready, key=lambda i: (i.cookiefile is None, i.last_used))
+
+    def ready_in(self, exclude=()):
+        """
+        Seconds until an identity not in exclude comes out of its cool-down, or None if
+        there is no such identity.
+        """
+        waits = [i.cooldown() for i in self.identities if i not in exclude and i.usable()]
+        return min(waits) if waits else None
+
+    def cooling(self):
+        return sum(1 for i in self.identities if i.cooldown())
+
+
+class ExtractionScheduler:
+    """
+    Admits yt-dlp extractions by priority and pace, and keeps them away from throttled
+    identities.
+
+    Jobs wait in one queue per priority class, and within a class in one queue per
+    guild. When a concurrency slot and a token from the TokenBucket are free, the next
+    job is picked by stride scheduling across the classes, weighted by
+    PRIORITY_WEIGHTS, and round-robin across guilds within a class. Background and
+    warmup work never takes the last free slot, so an interactive request starts as
+    soon as it is admitted however much bulk work is waiting. Long jobs such as
+    playlists are submitted as many small ones, so they yield between batches.
+
+    Each job runs with the ready identity used longest ago. When YouTube answers with a
+    429 or a bot check, that identity cools down with exponential backoff and the job
+    is retried with the next one. Extractions are not paced until the first throttle;
+    from then on they are paced at `rate`, halved on every further throttle and
+    recovered additively with each success, so the bot backs off as a whole instead of
+    every retry adding load. Pacing is lifted again once the rate has recovered and no
+    identity is cooling. When every identity is cooling, a request waits up to
+    max_wait for one and otherwise fails at once with ExtractionThrottled.
+    """
+
+    def __init__(self, pool, rate=2.0, burst=5, concurrency=6, max_wait=30.0, backoff=30.0, max_backoff=1800.0):
+        self.pool = pool
+        self.base_rate = rate
+        self.min_rate = rate / 16
+        self.bucket = TokenBucket(rate, burst)
+        self.paced = False  # Set from the first throttle until the rate has recovered
+        self.concurrency = concurrency
+        self.reserved = 1 if concurrency > 1 else 0  # Slots only RESERVED_PRIORITIES may take
+        self.max_wait = max_wait
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.running = 0
+        self.last_throttle = None  # (monotonic time, identity name, message)
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}  # priority -> guild ID -> deque of futures
+        self._pass = dict.fromkeys(PRIORITIES, 0.0)  # Stride scheduling position of each class
+        self._vtime = 0.0  # Position of the last class served
+        self._wake = asyncio.Event()
+        self._pump_task = None
+        metrics.EXTRACT_RATE.set(0)
+
+    @property
+    def throttled(self):
+        return self.paced or self.pool.cooling() > 0
+
+    def queued(self, priority):
+        return sum(len(jobs) for jobs in self._queues[priority].values())
+
+    async def run(self, attempt, priority='interactive', guild_id=None):
+        """
+        Runs attempt(identity), a coroutine function performing one extraction, once it is
+        admitted and returns its result. Errors other than throttling are raised as they are.
+        """
+        tried = set()
+        waited_since = time.perf_counter()
+        while True:
+            if self.pool.pick(exclude=tried) is None:
+                wait = self.pool.ready_in(exclude=tried)
+                if wait is None or wait > self.max_wait - (time.perf_counter() - waited_since):
+                    metrics.EXTRACT_REJECTED_TOTAL.inc()
+                    raise ExtractionThrottled(wait if wait is not None else self.pool.ready_in() or self.backoff)
+                await asyncio.sleep(wait)
+                continue
+            await self._admit(priority, guild_id)
+            try:
+                identity = self.pool.pick(exclude=tried)
+                if identity is None:
+                    continue  # Throttled while this job waited; wait for a cool-down unadmitted
+                metrics.EXTRACT_WAIT_SECONDS.labels(priority=priority).observe(time.perf_counter() - waited_since)
+                identity.last_used = time.monotonic()
+                try:
+                    result = await attempt(identity)
+                except Exception as e:
+                    if not is_throttle_error(e):
+                        raise
+                    self._throttled(identity, e)
+                    tried.add(identity)
+                    waited_since = time.perf_counter()
+                    continue
+                self._succeeded(identity)
+                return result
+            finally:
+                self._release()
+
+    async def _admit(self, priority, guild_id):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        guilds = self._queues[priority]
+        if not guilds:
+            self._pass[priority] = max(self._pass[priority], self._vtime)  # No credit for time spent idle
+        guilds.setdefault(guild_id, deque()).append(future)
+        self._wake.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = loop.create_task(self._pump())
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # Admitted just as the caller gave up
+            raise
+
+    def _release(self):
+        self.running -= 1
+        self._wake.set()
+
+    def _eligible(self):
+        bulk_allowed = self.concurrency - self.running > self.reserved
+        return [priority for priority in PRIORITIES if self._queues[priority] and (bulk_allowed or priority in RESERVED_PRIORITIES)]
+
+    def _next_job(self):
+        while True:
+            eligible = self._eligible()
+            if not eligible:
+                return None
+            priority = min(eligible, key=lambda p: (self._pass[p], PRIORITIES.index(p)))
+            guilds = self._queues[priority]
+            guild_id, jobs = next(iter(guilds.items()))
+            future = jobs.popleft()
+            if jobs:
+                guilds.move_to_end(guild_id)  # Next guild's turn
+            else:
+                del guilds[guild_id]
+            if future.cancelled():
+                continue
+            self._vtime = self._pass[priority]
+            self._pass[priority] += 1 / PRIORITY_WEIGHTS[priority]
+            return future
+
+    async def _pump(self):
+        while any(self._queues.values()):
+            if self.running >= self.concurrency or not self._eligible():
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            paced = self.paced
+            if paced:
+                await self.bucket.acquire()
+            future = self._next_job()
+            if future is None:
+                if paced:
+                    self.bucket.tokens += 1  # Everything eligible was cancelled meanwhile
+                continue
+            self.running += 1
+            future.set_result(None)
+
+    def _throttled(self, identity, error):
+        identity.strikes += 1
+        cooldown = min(self.max_backoff, self.backoff * 2 ** (identity.strikes - 1)) * random.uniform(0.8, 1.2)
+        identity.cooldown_until = time.monotonic() + cooldown
+        if self.paced:
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        else:
+            self.paced = True
+            self.bucket.rate = self.base_rate
+            self.bucket.tokens = min(self.bucket.tokens, 1.0)  # No burst straight after a throttle
+        self.last_throttle = (time.monotonic(), identity.name, str(error))
+        metrics.EXTRACT_THROTTLED_TOTAL.labels(identity=identity.name).inc()
+        metrics.EXTRACT_RATE.set(self.bucket.rate)
+        logger.warning("YouTube throttled identity %s (strike %s); cooling it down for %.0fs, extraction rate now %.2f/s: %s",
+                       identity.name, identity.strikes, cooldown, self.bucket.rate, error)
+
+    def _succeeded(self, identity):
+        identity.strikes = 0
+        if not self.paced:
+            return
+        if self.bucket.rate < self.base_rate:
+            self.bucket.rate = min(self.base_rate, self.bucket.rate + self.base_rate / 10)
+            metrics.EXTRACT_RATE.set(self.bucket.rate)
+        elif not self.pool.cooling():
+            self.paced = False
+            metrics.EXTRACT_RATE.set(0)
+            logger.info("YouTube is no longer throttling the bot; extraction pacing lifted.")
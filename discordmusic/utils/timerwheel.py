@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    __slots__ = ("callback", "args", "deadline", "rounds", "cancelled")
+
+    def __init__(self, callback, args, deadline, rounds):
+        self.callback = callback
+        self.args = args
+        self.deadline = deadline
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class TimerWheel:
+    """
+    A hashed timer wheel for the bot's coarse per-guild deadlines: idle disconnects,
+    refresh loops and state expiry.
+
+    Timers are hashed into one of `slots` buckets by their deadline, so scheduling and
+    cancelling are O(1) and a single task ticking every `tick` seconds fires them all,
+    instead of one event loop timer (and closure) per guild. Deadlines are rounded up
+    to the next tick. Callbacks run on the event loop; a coroutine function's
+    coroutine is started as a task. The wheel starts ticking when the first timer is
+    scheduled.
+    """
+
+    def __init__(self, tick=1.0, slots=512):
+        self.tick = tick
+        self._buckets = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._count = 0
+        self._task = None
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay, callback, *args):
+        ticks = max(1, -int(-delay // self.tick))  # Rounded up, and never the bucket being fired
+        rounds, offset = divmod(ticks - 1, len(self._buckets))
+        handle = TimerHandle(callback, args, time.monotonic() + delay, rounds)
+        self._buckets[(self._cursor + 1 + offset) % len(self._buckets)].append(handle)
+        self._count += 1
+        self.start()
+        return handle
+
+    async def sleep(self, delay):
+        """
+        Like asyncio.sleep, but parked on the wheel rather than on its own loop timer.
+        """
+        future = asyncio.get_running_loop().create_future()
+        handle = self.schedule(delay, lambda: future.done() or future.set_result(None))
+        try:
+            await future
+        finally:
+            handle.cancel()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            next_tick += self.tick
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            self._advance()
+
+    def _advance(self):
+        self._cursor = (self._cursor + 1) % len(self._buckets)
+        bucket = self._buckets[self._cursor]
+        due = []
+        pending = []
+        for handle in bucket:
+            if handle.cancelled:
+                self._count -= 1
+            elif handle.rounds:
+                handle.rounds -= 1
+                pending.append(handle)
+            else:
+                self._count -= 1
+                due.append(handle)
+        self._buckets[self._cursor] = pending
+        for handle in due:
+            try:
+                result = handle.callback(*handle.args)
+                if asyncio.iscoroutine(result):
+                    asyncio.get_running_loop().create_task(result)
+            except Exception as e:
+                logger.error("Timer callback %s failed: %s", handle.callback, e, exc_info=True)
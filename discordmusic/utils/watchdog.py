@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import site
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+
+from utils import metrics
+
+BOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Installed packages, which launch.sh's venv puts inside BOT_DIR
+LIBRARY_DIRS = tuple({os.path.abspath(path) + os.sep for path in (
+    *site.getsitepackages(), site.getusersitepackages(), sysconfig.get_paths()['purelib'], sysconfig.get_paths()['platlib'])})
+
+
+def is_bot_frame(filename):
+    """
+    Whether a frame's file is the bot's own code rather than a library or the watchdog.
+    """
+    return filename.startswith(BOT_DIR + os.sep) and not filename.startswith(LIBRARY_DIRS) \
+        and os.sep + "site-packages" + os.sep not in filename and not filename.endswith(os.path.join(os.sep + "utils", "watchdog.py"))
+
+
+class LoopWatchdog:
+    """
+    Detects event loop stalls and captures the stack of whatever is holding the loop.
+
+    A heartbeat task on the loop stamps the time every interval seconds; a separate
+    thread checks the stamp, and when it is older than threshold seconds it grabs the
+    loop thread's current stack. The innermost frame in the bot's own code is blamed,
+    so offenders are aggregated per call site.
+    """
+
+    def __init__(self, loop, threshold=0.25, interval=0.05, max_offenders=50):
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self.max_offenders = max_offenders
+        self.offenders = {}  # culprit -> stats
+        self.stalls = 0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._stall = None  # (beat it started after, culprit) while a stall is in progress
+        self._stop = threading.Event()
+        self._heartbeat_task = None
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = self.loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+
+    async def _heartbeat(self):
+        self._loop_thread_id = threading.get_ident()
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            lag = time.monotonic() - beat - self.interval
+            if self._stall and self._stall[0] != beat:
+                self._finish_stall(beat)
+            if lag > self.threshold and self._stall is None and self._loop_thread_id is not None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    stack = traceback.extract_stack(frame)
+                    del frame
+                    self._stall = (beat, self._record_offender(stack))
+
+    def _record_offender(self, stack):
+        culprit_frame = next((f for f in reversed(stack) if is_bot_frame(f.filename)), stack[-1] if stack else None)
+        if culprit_frame is None:
+            return None
+        culprit = f"{os.path.relpath(culprit_frame.filename, BOT_DIR) if culprit_frame.filename.startswith(BOT_DIR) else culprit_frame.filename}:{culprit_frame.lineno} in {culprit_frame.name}"
+        stats = self.offenders.get(culprit)
+        if stats is None:
+            if len(self.offenders) >= self.max_offenders:
+                # Forget the least significant offender to keep memory bounded
+                del self.offenders[min(self.offenders, key=lambda key: self.offenders[key]['total_lag'])]
+            stats = self.offenders[culprit] = {'count': 0, 'total_lag': 0.0, 'max_lag': 0.0, 'stack': None, 'last_seen': None}
+        stats['count'] += 1
+        stats['stack'] = "".join(traceback.format_list(stack[-12:]))
+        stats['last_seen'] = time.time()
+        return culprit
+
+    def _finish_stall(self, new_beat):
+        started_after, culprit = self._stall
+        self._stall = None
+        duration = new_beat - started_after - self.interval
+        self.stalls += 1
+        metrics.EVENT_LOOP_STALL_SECONDS.observe(duration)
+        stats = self.offenders.get(culprit)
+        if stats is not None:
+            stats['total_lag'] += duration
+            stats['max_lag'] = max(stats['max_lag'], duration)
+            logging.warning("Event loop blocked for %.0f ms by %s\n%s", duration * 1000, culprit, stats['stack'])
+
+    def report(self, limit=5):
+        """
+        Returns the worst offenders as (culprit, stats) pairs, by total time blocked.
+        """
+        return sorted(self.offenders.items(), key=lambda item: -item[1]['total_lag'])[:limit]
+
+    def reset(self):
+        self.offenders.clear()
+        self.stalls = 0
@@ -0,0 +1,90 @@
+import logging
+import os
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+VERSION_FILE = ".yt-dlp-version"
+MAINTENANCE_INTERVAL = 24 * 3600  # Seconds between stale-entry sweeps
+
+
+class YTDLCache:
+    """
+    The bot's persistent yt-dlp cache, shared by every extraction in every guild.
+
+    On disk (yt-dlp's cachedir) it holds YouTube's solved signature and n-parameter
+    challenges and preprocessed player code. These are keyed by player version, so when
+    YouTube rotates its player new entries appear beside the old ones. maintain() clears
+    the directory when yt-dlp itself is upgraded, because its cache formats change
+    between versions. It also deletes entries not written for max_age_days, which
+    belong to rotated-out players. An entry still in use is just solved once more.
+
+    In memory, share() gives every YoutubeDL the same downloaded player code and solved
+    challenges. Without it, each extraction builds a fresh YoutubeDL, which starts
+    with empty caches and downloads the player again. yt-dlp writes its cache files
+    atomically, so concurrent extractions can share them safely.
+    """
+
+    def __init__(self, directory, max_age_days=7):
+        self.directory = directory
+        self.max_age = max_age_days * 86400
+        self.code_cache = {}  # Player JS by player key
+        self.player_cache = {}  # Solved challenges by (section, player key, ...)
+        self.maintained_at = None
+        self._lock = threading.Lock()
+
+    def share(self, ydl):
+        """
+        Points ydl's YouTube extractor at the shared in-memory player caches.
+        """
+        extractor = ydl.get_info_extractor('Youtube')
+        if hasattr(extractor, '_code_cache') and hasattr(extractor, '_player_cache'):
+            extractor._code_cache = self.code_cache
+            extractor._player_cache = self.player_cache
+
+    def due(self):
+        return self.maintained_at is None or time.monotonic() - self.maintained_at > MAINTENANCE_INTERVAL
+
+    def maintain(self, version):
+        """
+        Clears the cache if it was written by another yt-dlp version, then removes stale
+        entries. Blocking, so run it off the event loop. Returns the number of files removed.
+        """
+        with self._lock:
+            if not self.due():
+                return 0
+            self.maintained_at = time.monotonic()
+            os.makedirs(self.directory, exist_ok=True)
+            marker = os.path.join(self.directory, VERSION_FILE)
+            try:
+                with open(marker) as f:
+                    cached_version = f.read().strip()
+            except OSError:
+                cached_version = None
+            removed = 0
+            if cached_version != version:
+                for entry in os.scandir(self.directory):
+                    if entry.is_dir(follow_symlinks=False):
+                        removed += sum(len(files) for _, _, files in os.walk(entry.path))
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                with open(marker, "w") as f:
+                    f.write(version)
+                logger.info("yt-dlp cache reset for yt-dlp %s (was %s).", version, cached_version)
+            cutoff = time.time() - self.max_age
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        if path != marker and os.path.getmtime(path) < cutoff:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        pass
+            # Players cached in memory by earlier rotations are never asked for again
+            self.code_cache.clear()
+            self.player_cache.clear()
+            if removed:
+                logger.info("Removed %s stale yt-dlp cache file(s).", removed)
+            return removed